@@ -1,10 +1,9 @@
-from pathlib import Path
-
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse
 
 from ....config import settings
-from ....models.schemas import JobStatus
+from ....models.schemas import ImageResult, JobStatus
+from ....services.encoding import OutputFormat, output_filename
 from ....services.job_manager import job_manager
 
 router = APIRouter()
@@ -30,18 +29,16 @@ async def download_image(job_id: str, image_id: str) -> FileResponse:
     if image.status != JobStatus.COMPLETED:
         raise HTTPException(status_code=400, detail=f"Image not ready. Status: {image.status}")
 
-    # Find the processed file
-    processed_dir = settings.processed_dir / job_id
+    return processed_file_response(job_id, image)
 
-    if not processed_dir.exists():
-        raise HTTPException(status_code=404, detail="Processed file not found")
 
-    # Get the output filename (PNG)
-    base_name = Path(image.original_filename).stem
-    output_filename = f"{base_name}.png"
-    file_path = processed_dir / output_filename
+def processed_file_response(job_id: str, image: ImageResult, headers: dict[str, str] | None = None) -> FileResponse:
+    """The processed file of a completed image, as an attachment in its output format."""
+    filename = output_filename(image.original_filename, image.output_format)
+    file_path = settings.processed_dir / job_id / filename
 
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Processed file not found")
 
-    return FileResponse(path=str(file_path), media_type="image/png", filename=output_filename)
+    media_type = OutputFormat(image.output_format).media_type
+    return FileResponse(path=str(file_path), media_type=media_type, filename=filename, headers=headers)
@@ -1,42 +1,159 @@
-from fastapi import APIRouter, Depends, File, Request, UploadFile
+import asyncio
 
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from ....config import settings
 from ....middleware.api_key_auth import check_batch_allowed, optional_api_key
 from ....middleware.rate_limit import limiter
 from ....models.api_key import ApiKey
-from ....models.schemas import UploadResponse
+from ....models.schemas import ImageResult, JobEvent, JobStatus, UploadResponse
+from ....services.admission import pixel_cost
+from ....services.animation import output_format_for
+from ....services.buffers import ImageBuffer
+from ....services.encoding import OutputFormat
+from ....services.job_events import job_event_hub
 from ....services.job_manager import job_manager
+from ....services.result_cache import cache_key, result_cache
+from ....services.scheduling import queue_priority, tier_of
 from ....services.storage.local import storage
+from ....tasks.queue import huey
 from ....tasks.worker import process_batch_task, process_image_task
-from ....utils.validators import validate_batch, validate_image
+from ....utils.validators import validate_batch, validate_image, validate_model
+from .downloads import processed_file_response
 
 router = APIRouter()
 
 
-@router.post("/remove-bg", response_model=UploadResponse)
+async def _complete_from_cache(
+    job_id: str,
+    image_id: str,
+    filename: str,
+    content: ImageBuffer,
+    model_name: str,
+    output_format: OutputFormat,
+    refine_edges: bool,
+) -> bool:
+    """Finish an image straight from the result cache. Returns False on a miss."""
+    cached = result_cache.get(cache_key(content, model_name, format=output_format, refine_edges=refine_edges))
+    if cached is None:
+        return False
+    await storage.save_processed(cached, filename, job_id, output_format_for(content, output_format))
+    download_url = f"/api/v1/download/{job_id}/{image_id}"
+    job_manager.update_image_status(job_id, image_id, JobStatus.COMPLETED, download_url=download_url)
+    return True
+
+
+async def _save_original(file: UploadFile, job_id: str, filename: str) -> str:
+    """Write an upload to storage from the file Starlette spooled it to, not from a copy of its bytes."""
+    await file.seek(0)
+    path: str = await run_in_threadpool(storage.write_original, file.file, filename, job_id)
+    return path
+
+
+async def _sync_allowed() -> bool:
+    """Whether a ``sync=true`` upload may wait for its result: enabled, and few enough tasks queued ahead of it."""
+    if settings.sync_timeout <= 0:
+        return False
+    # Counting the queue is a SQLite query; keep it off the event loop.
+    pending: int = await run_in_threadpool(huey.pending_count)
+    return pending < settings.sync_max_queued
+
+
+async def _wait_for_image(events: "asyncio.Queue[JobEvent]", timeout: float) -> ImageResult | None:
+    """The image once its job completes or fails, or None if that takes longer than ``timeout`` seconds."""
+    try:
+        async with asyncio.timeout(timeout):
+            while True:
+                event = await events.get()
+                if event.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+                    return event.image
+    except TimeoutError:
+        return None
+
+
+def _result_response(job_id: str, image: ImageResult) -> FileResponse:
+    """The cutout of a finished ``sync=true`` upload, or an error if it failed."""
+    if image.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=422, detail=f"Image could not be processed: {image.error}")
+    return processed_file_response(job_id, image, headers={"X-Job-Id": job_id, "X-Image-Id": image.image_id})
+
+
+@router.post(
+    "/remove-bg",
+    response_model=UploadResponse,
+    responses={200: {"content": {f.media_type: {} for f in OutputFormat}, "description": "The cutout, with sync=true"}},
+)
 @limiter.limit("10/minute")
 async def remove_background(
     request: Request,
     file: UploadFile = File(...),
+    model: str | None = Query(None, description="Segmentation model; defaults to the tier's model"),
+    output_format: OutputFormat | None = Query(None, alias="format", description="Output format; defaults to png"),
+    refine_edges: bool = Query(False, description="Refine hair and fur edges of the mask"),
+    sync: bool = Query(False, description="Wait for the result and return the cutout instead of a job"),
     api_key: ApiKey | None = Depends(optional_api_key),
-) -> UploadResponse:
-    """Upload a single image for background removal."""
+) -> UploadResponse | FileResponse:
+    """Upload a single image for background removal.
+
+    With ``sync=true`` the response is the cutout itself, with the job in the
+    ``X-Job-Id`` and ``X-Image-Id`` headers, if it is ready within
+    ``settings.sync_timeout`` seconds. Otherwise, or while
+    ``settings.sync_max_queued`` tasks or more are queued, the usual job is
+    returned and the image finishes in the background. The job is recorded
+    either way.
+    """
+
+    model_name = validate_model(model, api_key)
+    output_format = output_format or OutputFormat(settings.output_format)
 
     # Validate the image
     content = await validate_image(file)
 
     filename = file.filename or "upload.jpg"
+    pixels = pixel_cost(content)
 
     # Create a job
-    job = job_manager.create_job([{"filename": filename}])
+    job = job_manager.create_job(
+        [{"filename": filename, "output_format": output_format_for(content, output_format), "pixels": pixels}],
+        tier=tier_of(api_key),
+    )
 
     # Get the image ID from the job
     image_id = list(job.images.keys())[0]
 
-    # Save original file
-    original_path = await storage.save_original(content, filename, job.job_id)
+    if await _complete_from_cache(job.job_id, image_id, filename, content, model_name, output_format, refine_edges):
+        if sync:
+            completed = job.images[image_id].model_copy(update={"status": JobStatus.COMPLETED})
+            return _result_response(job.job_id, completed)
+        return UploadResponse(job_id=job.job_id, message="Image processed (cached result).", total_images=1)
 
-    # Enqueue processing task via Huey
-    process_image_task(job.job_id, image_id, original_path, filename)
+    # Save original file
+    original_path = await _save_original(file, job.job_id, filename)
+
+    # Subscribe before enqueueing, so the completion cannot be missed
+    events = job_event_hub.subscribe(job.job_id) if sync and await _sync_allowed() else None
+    try:
+        # Enqueue processing task via Huey, ahead of lower tiers' tasks
+        process_image_task(
+            job.job_id,
+            image_id,
+            original_path,
+            filename,
+            model_name,
+            output_format,
+            refine_edges,
+            pixels,
+            priority=queue_priority(api_key),
+        )
+        if events is not None:
+            image = await _wait_for_image(events, settings.sync_timeout)
+            if image is not None:
+                return _result_response(job.job_id, image)
+    finally:
+        if events is not None:
+            job_event_hub.unsubscribe(job.job_id, events)
 
     return UploadResponse(job_id=job.job_id, message="Image uploaded successfully. Processing started.", total_images=1)
 
@@ -46,19 +163,31 @@ async def remove_background(
 async def remove_background_batch(
     request: Request,
     files: list[UploadFile] = File(...),
+    model: str | None = Query(None, description="Segmentation model; defaults to the tier's model"),
+    output_format: OutputFormat | None = Query(None, alias="format", description="Output format; defaults to png"),
+    refine_edges: bool = Query(False, description="Refine hair and fur edges of the mask"),
     api_key: ApiKey | None = Depends(optional_api_key),
 ) -> UploadResponse:
     """Upload multiple images for background removal (max 20)."""
 
     # Check if batch is allowed for this tier
     check_batch_allowed(api_key)
+    model_name = validate_model(model, api_key)
+    output_format = output_format or OutputFormat(settings.output_format)
 
     # Validate all files
     validated_files = await validate_batch(files)
 
     # Create a job with all files
-    images_info = [{"filename": f.filename or "upload.jpg"} for f, _ in validated_files]
-    job = job_manager.create_job(images_info)
+    images_info = [
+        {
+            "filename": f.filename or "upload.jpg",
+            "output_format": output_format_for(content, output_format),
+            "pixels": pixel_cost(content),
+        }
+        for f, content in validated_files
+    ]
+    job = job_manager.create_job(images_info, tier=tier_of(api_key))
 
     # Prepare batch processing data
     batch_data = []
@@ -68,13 +197,32 @@ async def remove_background_batch(
         image_id = image_ids[i]
         filename = file.filename or "upload.jpg"
 
-        # Save original file
-        original_path = await storage.save_original(content, filename, job.job_id)
+        if await _complete_from_cache(job.job_id, image_id, filename, content, model_name, output_format, refine_edges):
+            continue
 
-        batch_data.append({"image_id": image_id, "original_path": original_path, "filename": filename})
-
-    # Enqueue batch processing task via Huey
-    process_batch_task(job.job_id, batch_data)
+        # Save original file
+        original_path = await _save_original(file, job.job_id, filename)
+
+        batch_data.append(
+            {
+                "image_id": image_id,
+                "original_path": original_path,
+                "filename": filename,
+                "pixels": images_info[i]["pixels"],
+            }
+        )
+
+    # Enqueue the images not served from the cache as one Huey task per chunk, so idle workers share the job
+    chunk_size = settings.batch_chunk_size or max(1, len(batch_data))
+    for start in range(0, len(batch_data), chunk_size):
+        process_batch_task(
+            job.job_id,
+            batch_data[start : start + chunk_size],
+            model_name,
+            output_format,
+            refine_edges,
+            priority=queue_priority(api_key),
+        )
 
     return UploadResponse(
         job_id=job.job_id,
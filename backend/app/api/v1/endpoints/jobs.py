@@ -1,10 +1,29 @@
+import asyncio
+from collections.abc import AsyncIterator
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
-from ....models.schemas import StatusResponse
-from ....services.job_manager import job_manager
+from ....config import settings
+from ....models.schemas import JobEvent, JobStatus, StatusResponse
+from ....services.job_events import job_event_hub
+from ....services.job_manager import Job, job_manager
 
 router = APIRouter()
 
+_FINISHED = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+
+def _status_response(job: Job) -> StatusResponse:
+    return StatusResponse(
+        job_id=job.job_id,
+        status=job.status,
+        progress=job.progress,
+        images=list(job.images.values()),
+        completed_count=job.completed_count,
+        total_count=job.total_count,
+    )
+
 
 @router.get("/status/{job_id}", response_model=StatusResponse)
 async def get_job_status(job_id: str) -> StatusResponse:
@@ -15,11 +34,46 @@ async def get_job_status(job_id: str) -> StatusResponse:
     if not job:
         raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
 
-    return StatusResponse(
-        job_id=job.job_id,
-        status=job.status,
-        progress=job.progress,
-        images=list(job.images.values()),
-        completed_count=job.completed_count,
-        total_count=job.total_count,
+    return _status_response(job)
+
+
+@router.get("/status/{job_id}/stream")
+async def stream_job_status(job_id: str) -> StreamingResponse:
+    """Stream a job's progress as server-sent events until it finishes.
+
+    The first event, ``status``, is the job's current status, as returned by
+    ``/status/{job_id}``. Each image status change after it is sent as an
+    ``image`` event (a ``JobEvent``). The stream ends after the event that
+    completes or fails the job.
+    """
+    # Subscribe before loading the job, so no change made after the snapshot is missed.
+    events = job_event_hub.subscribe(job_id)
+    job = job_manager.get_job(job_id)
+
+    if not job:
+        job_event_hub.unsubscribe(job_id, events)
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    return StreamingResponse(
+        _job_event_stream(job, events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+async def _job_event_stream(job: Job, events: "asyncio.Queue[JobEvent]") -> AsyncIterator[str]:
+    try:
+        yield f"event: status\ndata: {_status_response(job).model_dump_json()}\n\n"
+        if job.status in _FINISHED:
+            return
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), settings.job_events_keepalive_seconds)
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: image\ndata: {event.model_dump_json()}\n\n"
+            if event.status in _FINISHED:
+                return
+    finally:
+        job_event_hub.unsubscribe(job.job_id, events)
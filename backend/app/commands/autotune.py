@@ -0,0 +1,101 @@
+"""
+Benchmark candidate ONNX Runtime profiles on this machine and save the best one.
+
+Run with:
+    cd backend
+    python -m app.commands.autotune [--model birefnet-general] [--iterations 4] [--dry-run]
+
+Each candidate loads a fresh session and runs ``--concurrency`` threads of
+inference at once (default: the worker's concurrent session count), the way
+Huey worker threads share a session. The profile with the highest
+throughput is written to ``RUNTIME_PROFILE_PATH`` and picked up by workers
+on their next session load.
+"""
+
+import argparse
+import threading
+import time
+from dataclasses import replace
+
+from PIL import Image, ImageDraw
+
+from ..services.inference import get_model_spec, predict_masks
+from ..services.runtime_profile import (
+    RuntimeProfile,
+    available_cpus,
+    concurrent_sessions,
+    default_profile,
+    save_profile,
+)
+
+
+def candidate_profiles(cpus: int, concurrency: int) -> list[RuntimeProfile]:
+    """Thread splits around the even share, plus arena, parallel-mode and optimization variants."""
+    share = max(1, cpus // concurrency)
+    threads = sorted({1, share, max(1, share // 2), min(cpus, share * 2)} | {n for n in (2, 4, 8) if n <= cpus})
+
+    base = default_profile(cpus, concurrency)
+    candidates = [replace(base, intra_op_threads=n) for n in threads]
+    candidates.append(replace(base, enable_cpu_mem_arena=False))
+    candidates.append(replace(base, graph_optimization="extended"))
+    if share >= 2:
+        candidates.append(
+            replace(base, intra_op_threads=max(1, share // 2), inter_op_threads=2, execution_mode="parallel")
+        )
+    return list(dict.fromkeys(candidates))
+
+
+def _sample_image() -> Image.Image:
+    img = Image.new("RGB", (1600, 1200), color=(230, 230, 230))
+    ImageDraw.Draw(img).ellipse((300, 200, 1300, 1000), fill=(50, 100, 160))
+    return img
+
+
+def measure(profile: RuntimeProfile, model_name: str, concurrency: int, iterations: int) -> float:
+    """Images per second with ``concurrency`` threads sharing one session."""
+    from ..services.sessions import load_session
+
+    session = load_session(model_name, profile)
+    spec = get_model_spec(model_name)
+    img = _sample_image()
+    predict_masks(session, [img], spec, 1)  # warm-up
+
+    def work() -> None:
+        for _ in range(iterations):
+            predict_masks(session, [img], spec, 1)
+
+    threads = [threading.Thread(target=work) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return concurrency * iterations / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="birefnet-general")
+    parser.add_argument("--iterations", type=int, default=4, help="inferences per thread per candidate")
+    parser.add_argument("--concurrency", type=int, default=0, help="concurrent sessions (default: from settings)")
+    parser.add_argument("--dry-run", action="store_true", help="print results without writing the profile")
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    concurrency = args.concurrency or concurrent_sessions()
+    print(f"{cpus} available cores, {concurrency} concurrent sessions")
+
+    results: list[tuple[float, RuntimeProfile]] = []
+    for profile in candidate_profiles(cpus, concurrency):
+        throughput = measure(profile, args.model, concurrency, args.iterations)
+        results.append((throughput, profile))
+        print(f"{throughput:8.2f} img/s  {profile.to_dict()}")
+
+    best_throughput, best = max(results, key=lambda r: r[0])
+    print(f"Best: {best_throughput:.2f} img/s  {best.to_dict()}")
+    if not args.dry_run:
+        print(f"Wrote {save_profile(best)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Build INT8-quantized model variants and report their accuracy and latency.
+
+Run with:
+    cd backend
+    pip install onnx
+    python -m app.commands.quantize build birefnet-general [--static --calibration-dir samples/]
+    python -m app.commands.quantize report birefnet-general --samples samples/ [--output report.md]
+
+``build`` writes ``<model>-int8.onnx`` next to rembg's FP32 model; the
+variant is then selectable as ``?model=<model>-int8``. ``report`` runs the
+FP32 and INT8 sessions on every image in ``--samples`` and prints mask IoU
+against FP32 and median inference latency, so a variant is only put in
+front of users once its mask quality is known.
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from ..services.inference import decode_image, get_model_spec, predict_masks
+from ..services.quantization import fp32_model_path, mask_iou, quantize_model, quantized_model_path
+from ..services.sessions import load_session
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _sample_paths(directory: Path) -> list[Path]:
+    paths = sorted(p for p in directory.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not paths:
+        raise SystemExit(f"No images found in {directory}")
+    return paths
+
+
+def compare(model_name: str, samples: list[Path]) -> dict:
+    """Mask IoU and median latency of ``<model_name>-int8`` against FP32 over ``samples``."""
+    base_spec = get_model_spec(model_name)
+    int8_spec = get_model_spec(f"{model_name}-int8")
+    fp32 = load_session(base_spec.name)
+    int8 = load_session(int8_spec.name)
+
+    ious: list[float] = []
+    latency: dict[str, list[float]] = {"fp32": [], "int8": []}
+    for path in samples:
+        img = decode_image(path.read_bytes())
+        masks = {}
+        for label, session, spec in (("fp32", fp32, base_spec), ("int8", int8, int8_spec)):
+            start = time.perf_counter()
+            masks[label] = predict_masks(session, [img], spec, 1)[0]
+            latency[label].append(time.perf_counter() - start)
+        ious.append(mask_iou(masks["fp32"], masks["int8"]))
+
+    fp32_ms = statistics.median(latency["fp32"]) * 1000
+    int8_ms = statistics.median(latency["int8"]) * 1000
+    return {
+        "model": model_name,
+        "images": len(samples),
+        "mean_iou": statistics.fmean(ious),
+        "min_iou": min(ious),
+        "fp32_ms": fp32_ms,
+        "int8_ms": int8_ms,
+        "speedup": fp32_ms / int8_ms,
+        "fp32_mb": fp32_model_path(model_name).stat().st_size / 1e6,
+        "int8_mb": quantized_model_path(model_name).stat().st_size / 1e6,
+    }
+
+
+def format_report(rows: list[dict]) -> str:
+    lines = [
+        "| Model | Images | Mean IoU | Min IoU | FP32 ms | INT8 ms | Speedup | FP32 MB | INT8 MB |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in rows:
+        lines.append(
+            f"| {r['model']} | {r['images']} | {r['mean_iou']:.4f} | {r['min_iou']:.4f} | {r['fp32_ms']:.0f} "
+            f"| {r['int8_ms']:.0f} | {r['speedup']:.2f}x | {r['fp32_mb']:.0f} | {r['int8_mb']:.0f} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="quantize FP32 models to INT8")
+    build.add_argument("models", nargs="+")
+    build.add_argument("--static", action="store_true", help="static quantization with calibration images")
+    build.add_argument("--calibration-dir", type=Path, help="images used to calibrate static quantization")
+
+    report = sub.add_parser("report", help="compare INT8 variants against FP32")
+    report.add_argument("models", nargs="+")
+    report.add_argument("--samples", type=Path, required=True, help="directory of representative images")
+    report.add_argument("--output", type=Path, help="also write the report as Markdown")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        calibration = _sample_paths(args.calibration_dir) if args.static and args.calibration_dir else None
+        for model in args.models:
+            get_model_spec(model)
+            print(f"Wrote {quantize_model(model, static=args.static, calibration_images=calibration)}")
+        return
+
+    samples = _sample_paths(args.samples)
+    text = format_report([compare(model, samples) for model in args.models])
+    print(text, end="")
+    if args.output:
+        args.output.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+List the images the worker gave up on after repeated failures.
+
+Run with:
+    cd backend
+    python -m app.commands.quarantine [--limit 20] [--traceback]
+
+Each entry shows the image, its job, the model, how many attempts were
+made and the last error; ``--traceback`` adds where it was raised. The
+original stays at the listed path until the retention cleanup removes it.
+"""
+
+import argparse
+
+from ..db.database import init_db
+from ..services.quarantine import quarantined_images
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--traceback", action="store_true", help="print the traceback of each last failure")
+    args = parser.parse_args()
+
+    init_db()
+    entries = quarantined_images(args.limit)
+    if not entries:
+        print("No quarantined images")
+    for entry in entries:
+        print(
+            f"{entry['quarantined_at']}  {entry['image_id']}  job {entry['job_id']}  {entry['model']}  "
+            f"{entry['attempts']} attempts on {entry['worker_id']}"
+        )
+        print(f"    {entry['original_filename']} ({entry['pixels']} px) at {entry['original_path']}")
+        print(f"    {entry['error']}")
+        if args.traceback:
+            print("    " + entry["traceback"].rstrip().replace("\n", "\n    "))
+
+
+if __name__ == "__main__":
+    main()
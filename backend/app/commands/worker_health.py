@@ -0,0 +1,29 @@
+"""
+Exit 0 if a Huey consumer on this host is warmed up and heartbeating.
+
+Run with:
+    cd backend
+    python -m app.commands.worker_health
+
+Used as the worker container's health check, so dependants wait until the
+models are loaded rather than until the process has started.
+"""
+
+import socket
+import sys
+
+from ..services.worker_health import worker_registry
+
+
+def main() -> int:
+    workers = worker_registry.workers(socket.gethostname())
+    for worker in workers:
+        print(f"{worker['worker_id']}: {worker['status']}{' (stale)' if worker['stale'] else ''}")
+    if not any(worker["ready"] for worker in workers):
+        print("No ready worker on this host", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
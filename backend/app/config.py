@@ -20,7 +20,94 @@ class Settings(BaseSettings):
     max_file_size: int = 20 * 1024 * 1024  # 20MB
     max_batch_size: int = 20
     max_resolution: int = 25_000_000  # 25 megapixels
-    processing_timeout: int = 60  # seconds
+    # Seconds per image before the attempt is abandoned; 0 = no deadline. Only the engine (engine_processes > 0)
+    # stops the inference itself; in the worker threads the task stops waiting and the inference runs on.
+    processing_timeout: int = 60
+
+    # Inference settings
+    default_model: str = "birefnet-general"  # used when neither the request nor the caller's tier picks one
+    int8_models: list[str] = []  # built INT8 variants requests may choose, e.g. ["birefnet-general-int8"]
+    inference_batch_size: int = 4  # images per ONNX session call in batch jobs
+    batch_chunk_size: int = 4  # images per worker task when a batch job is enqueued; 0 = the whole batch in one task
+    queue_fifo_every: int = 4  # every Nth queued task is taken oldest-first whatever its tier; 0 = strict priority
+    session_cache_size: int = 2  # model sessions kept loaded per worker process
+    session_memory_budget_mb: int = 4096  # estimated memory allowed for loaded sessions
+
+    # Worker start-up (see tasks/worker.py and services/worker_health.py)
+    warmup_models: list[str] = []  # sessions loaded and warmed before a worker takes tasks; empty = the tier defaults
+    worker_heartbeat_seconds: int = 15  # readiness heartbeat interval; 3 missed beats mark a worker stale
+
+    # Micro-batching of single-image uploads across worker threads (the pipeline's inference stage uses the wait)
+    microbatch_enabled: bool = True
+    microbatch_max_size: int = 4  # run as soon as this many requests are waiting
+    microbatch_max_wait_ms: int = 25  # max latency added while waiting for a batch to fill
+
+    # Retries of images that time out or hit a transient error, then quarantine (see services/quarantine.py)
+    task_max_attempts: int = 3  # attempts per image before it is quarantined
+    task_max_busy_retries: int = 10  # requeues for waiting on the pipeline that do not count as attempts
+    retry_backoff_seconds: float = 5.0  # delay before the second attempt, doubled for each one after it
+    retry_backoff_max_seconds: float = 300.0
+
+    # Admission control: pixels of images processed at once per worker process (see services/admission.py).
+    # About 15 bytes per pixel are in use while an image is processed; 0 = no limit.
+    worker_pixel_budget: int = 60_000_000
+
+    # Staged read/decode -> inference -> encode/write pipeline in the worker (see services/pipeline.py)
+    pipeline_enabled: bool = True
+    pipeline_decode_threads: int = 2  # storage read, decode and resize for the model
+    pipeline_infer_threads: int = 1  # sessions running at once; each gets its share of the cores
+    pipeline_encode_threads: int = 2  # full-size decode, compositing, encode and storage write
+    pipeline_queue_size: int = 4  # images waiting in front of each stage
+    # Seconds an image may wait to reach inference before it is requeued; 0 = no limit
+    pipeline_queue_timeout: int = 300
+
+    # Process-pool inference engine (0 = run inference in the Huey worker threads)
+    engine_processes: int = 0
+    engine_threads_per_process: int = 0  # ONNX intra-op threads per process; 0 = from the runtime profile
+
+    # ONNX Runtime profile (see services/runtime_profile.py); 0 thread counts are derived from the CPU quota
+    worker_count: int = 2  # Huey consumer --workers; keep in sync with docker-compose
+    ort_intra_op_threads: int = 0
+    ort_inter_op_threads: int = 1
+    ort_execution_mode: str = "sequential"  # "sequential" or "parallel"
+    ort_graph_optimization: str = "all"  # "disable", "basic", "extended" or "all"
+    ort_enable_cpu_mem_arena: bool = True
+    runtime_profile_path: Path = get_upload_base() / "runtime_profile.json"  # written by the autotune command
+
+    # Tiled edge refinement for very large images (see services/tiling.py)
+    tiled_min_pixels: int = 16_000_000  # refine images of at least this many pixels with tiles; 0 disables
+    tile_size: int = 2048  # tile edge in source pixels
+    tile_overlap: int = 256  # pixels blended between neighbouring tiles and the coarse mask
+
+    # Animated inputs (see services/animation.py)
+    max_animation_frames: int = 300
+    animation_reuse_threshold: float = 0.01  # frames differing less than this (mean abs, 0-1) reuse the last mask
+
+    # Trimap-limited edge refinement, enabled per request with ?refine_edges=true (see services/edges.py)
+    edge_refine_radius: int = 64  # window local colors are estimated from, in model-mask pixels
+    edge_refine_erode: int = 2  # trimap erosion in model-mask pixels
+
+    # Uploads whose alpha channel is already a cutout are re-encoded without inference (see services/transparency.py)
+    skip_existing_cutouts: bool = True
+
+    # Output encoding (clients may override output_format per request with ?format=)
+    output_format: str = "png"  # "png", "webp" (lossless), "mask" (grayscale alpha) or "jpeg"
+    png_compress_level: int = 1  # zlib level 0-9; PIL's default of 6 takes ~2x longer for ~15% smaller files
+    webp_method: int = 0  # lossless WebP effort 0-6; higher is much slower for smaller files
+    jpeg_quality: int = 90
+    jpeg_background: str = "#ffffff"  # flat background for the jpeg format
+
+    # Content-addressed result cache (0 MB disables it)
+    result_cache_dir: Path = get_upload_base() / "cache"
+    result_cache_max_mb: int = 1024
+
+    # Job progress streams at /status/{job_id}/stream (see services/job_events.py)
+    job_events_poll_interval: float = 0.1  # seconds between reads of new job events while any stream is open
+    job_events_keepalive_seconds: float = 15.0  # idle streams send a comment this often
+
+    # /remove-bg?sync=true waits for the result and returns the cutout
+    sync_timeout: float = 10.0  # seconds to wait before returning the job instead; 0 disables sync=true
+    sync_max_queued: int = 2  # with this many tasks queued, sync=true returns the job at once
 
     # Storage settings
     upload_dir: Path = get_upload_base()
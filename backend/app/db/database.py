@@ -53,7 +53,8 @@ def init_db() -> None:
                 job_id       TEXT PRIMARY KEY,
                 status       TEXT NOT NULL DEFAULT 'pending',
                 created_at   TEXT NOT NULL,
-                updated_at   TEXT NOT NULL
+                updated_at   TEXT NOT NULL,
+                tier         TEXT NOT NULL DEFAULT 'anonymous'
             );
 
             CREATE TABLE IF NOT EXISTS job_images (
@@ -63,6 +64,12 @@ def init_db() -> None:
                 status            TEXT NOT NULL DEFAULT 'pending',
                 download_url      TEXT,
                 error             TEXT,
+                output_format     TEXT NOT NULL DEFAULT 'png',
+                inference_skipped INTEGER NOT NULL DEFAULT 0,
+                pixels            INTEGER NOT NULL DEFAULT 0,
+                started_at        TEXT,
+                attempts          INTEGER NOT NULL DEFAULT 0,
+                busy_retries      INTEGER NOT NULL DEFAULT 0,
                 FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
             );
 
@@ -81,5 +88,57 @@ def init_db() -> None:
             );
 
             CREATE INDEX IF NOT EXISTS idx_api_keys_email ON api_keys(user_email);
+
+            CREATE TABLE IF NOT EXISTS worker_heartbeats (
+                worker_id   TEXT PRIMARY KEY,
+                hostname    TEXT NOT NULL,
+                pid         INTEGER NOT NULL,
+                status      TEXT NOT NULL,
+                models      TEXT NOT NULL DEFAULT '[]',
+                sessions    TEXT NOT NULL DEFAULT '{}',
+                pipeline    TEXT NOT NULL DEFAULT '{}',
+                started_at  TEXT NOT NULL,
+                last_seen   TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS quarantine (
+                image_id          TEXT PRIMARY KEY,
+                job_id            TEXT NOT NULL,
+                original_filename TEXT NOT NULL,
+                original_path     TEXT NOT NULL,
+                model             TEXT NOT NULL,
+                pixels            INTEGER NOT NULL DEFAULT 0,
+                attempts          INTEGER NOT NULL,
+                error             TEXT NOT NULL,
+                traceback         TEXT NOT NULL,
+                worker_id         TEXT NOT NULL,
+                quarantined_at    TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS job_events (
+                seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id     TEXT NOT NULL,
+                payload    TEXT NOT NULL,
+                FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_job_events_job_id ON job_events(job_id);
         """)
+        _add_column(conn, "job_images", "output_format", "TEXT NOT NULL DEFAULT 'png'")
+        _add_column(conn, "job_images", "inference_skipped", "INTEGER NOT NULL DEFAULT 0")
+        _add_column(conn, "job_images", "pixels", "INTEGER NOT NULL DEFAULT 0")
+        _add_column(conn, "job_images", "started_at", "TEXT")
+        _add_column(conn, "job_images", "attempts", "INTEGER NOT NULL DEFAULT 0")
+        _add_column(conn, "job_images", "busy_retries", "INTEGER NOT NULL DEFAULT 0")
+        _add_column(conn, "jobs", "tier", "TEXT NOT NULL DEFAULT 'anonymous'")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_job_images_started_at ON job_images(started_at)")
+        _add_column(conn, "worker_heartbeats", "sessions", "TEXT NOT NULL DEFAULT '{}'")
+        _add_column(conn, "worker_heartbeats", "pipeline", "TEXT NOT NULL DEFAULT '{}'")
         conn.commit()
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, definition: str) -> None:
+    """Add a column to a table created by an older version, if it is missing."""
+    columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
@@ -4,12 +4,17 @@ from contextlib import asynccontextmanager
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
 
 from .api.v1.router import api_router
 from .config import settings
 from .db.database import init_db
 from .middleware.rate_limit import limiter, rate_limit_exceeded_handler
+from .services.quarantine import quarantine_count
+from .services.result_cache import result_cache
+from .services.scheduling import queue_wait_stats
+from .services.worker_health import worker_registry
 from .utils.cleanup import cleanup_old_files, get_storage_stats
 
 scheduler = AsyncIOScheduler()
@@ -68,6 +73,22 @@ async def health_check() -> dict[str, str]:
     return {"status": "healthy"}
 
 
+@app.get("/health/workers")
+async def worker_health() -> JSONResponse:
+    """Worker readiness from heartbeats; 503 until at least one worker has warmed up."""
+    workers = worker_registry.workers()
+    ready = sum(1 for w in workers if w["ready"])
+    return JSONResponse(
+        {"status": "ready" if ready else "unavailable", "ready": ready, "workers": workers},
+        status_code=200 if ready else 503,
+    )
+
+
 @app.get("/stats")
 async def storage_stats() -> dict:
-    return get_storage_stats()
+    return {
+        **get_storage_stats(),
+        "result_cache": result_cache.stats(),
+        "queue_wait": queue_wait_stats(),
+        "quarantined": quarantine_count(),
+    }
@@ -10,14 +10,37 @@ class Tier(StrEnum):
     ENTERPRISE = "enterprise"
 
 
-# Tier limits: (daily_request_limit, max_file_size_mb, batch_allowed)
+# Tier limits: (daily_request_limit, max_file_size_mb, batch_allowed, default_model, queue_priority)
 TIER_LIMITS: dict[str, dict] = {
-    Tier.FREE: {"requests_limit": 50, "max_file_size_mb": 5, "batch_allowed": False},
-    Tier.PRO: {"requests_limit": 1000, "max_file_size_mb": 20, "batch_allowed": True},
-    Tier.ENTERPRISE: {"requests_limit": 100_000, "max_file_size_mb": 50, "batch_allowed": True},
+    Tier.FREE: {
+        "requests_limit": 50,
+        "max_file_size_mb": 5,
+        "batch_allowed": False,
+        "default_model": "birefnet-general-lite",
+        "queue_priority": 0,  # also anonymous web uploads
+    },
+    Tier.PRO: {
+        "requests_limit": 1000,
+        "max_file_size_mb": 20,
+        "batch_allowed": True,
+        "default_model": "birefnet-general",
+        "queue_priority": 50,
+    },
+    Tier.ENTERPRISE: {
+        "requests_limit": 100_000,
+        "max_file_size_mb": 50,
+        "batch_allowed": True,
+        "default_model": "birefnet-general",
+        "queue_priority": 100,
+    },
 }
 
 
+def tier_default_models() -> list[str]:
+    """The models requests get when they do not choose one, free tier (and anonymous uploads) first."""
+    return list(dict.fromkeys(str(limits["default_model"]) for limits in TIER_LIMITS.values()))
+
+
 @dataclass
 class ApiKey:
     key: str
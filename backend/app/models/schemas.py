@@ -17,6 +17,8 @@ class ImageResult(BaseModel):
     status: JobStatus
     download_url: str | None = None
     error: str | None = None
+    output_format: str = "png"
+    inference_skipped: bool = False  # the upload was already a cutout and was only re-encoded
 
 
 class JobResponse(BaseModel):
@@ -43,5 +45,16 @@ class StatusResponse(BaseModel):
     total_count: int
 
 
+class JobEvent(BaseModel):
+    """A change to one image of a job, with the job's status after it (see ``services.job_events``)."""
+
+    job_id: str
+    status: JobStatus
+    progress: float
+    completed_count: int
+    total_count: int
+    image: ImageResult
+
+
 class ErrorResponse(BaseModel):
     detail: str
@@ -0,0 +1,123 @@
+"""Pixel-budget admission control for worker processes.
+
+A worker's memory grows with the pixels of the images it is working on:
+the full-resolution decode, the upsampled mask, the RGBA cutout and the
+encoder's buffers come to roughly 15 bytes per pixel. Two threads that pick
+up 25 MP uploads at the same moment can run a container out of memory,
+while a fixed number of threads leaves it underused on small images.
+
+``PixelBudget`` admits images by pixel count instead. An image starts once
+the pixels already in flight plus its own fit within the budget, so many
+small images run together and large ones wait for room. Waiters are
+admitted in arrival order, so a stream of small images cannot starve a
+large one, and an image larger than the whole budget runs on its own.
+
+Pixel counts are measured from the header at upload time (``pixel_cost``),
+stored on the image row and passed to the task.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from PIL import Image
+
+from ..config import settings
+from .animation import is_animation
+from .buffers import ImageBuffer, open_buffer
+
+
+def pixel_cost(data: ImageBuffer) -> int:
+    """Pixels a worker holds decoded for an image: width x height, times the frame count of an animation.
+
+    Only the first frame of a multi-picture JPEG (MPO) is decoded.
+    """
+    with Image.open(open_buffer(data)) as img:
+        width, height = img.size
+        return width * height * (int(getattr(img, "n_frames", 1)) if is_animation(img) else 1)
+
+
+class PixelBudget:
+    """Blocks callers until the pixels they declare fit within the budget; 0 disables it."""
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self._reset()
+
+    def _reset(self) -> None:
+        """Start empty (also run in forked children, which inherit the parent's counters but not its threads)."""
+        self._cond = threading.Condition()
+        self._waiting: deque[object] = deque()
+        self._pixels: int = 0
+        self._images: int = 0
+        self._peak: int = 0
+        self._admitted: int = 0
+        self._wait_total: float = 0.0
+
+    @contextmanager
+    def reserve(self, pixels: int) -> Iterator[None]:
+        """Hold ``pixels`` of the budget for the duration of the block."""
+        self.acquire(pixels)
+        try:
+            yield
+        finally:
+            self.release(pixels)
+
+    def acquire(self, pixels: int, timeout: float | None = None) -> bool:
+        """Wait until ``pixels`` fit (or nothing else is in flight) and take them.
+
+        Returns False, without taking them, if ``timeout`` seconds pass first.
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        ticket = object()
+        with self._cond:
+            self._waiting.append(ticket)
+            while self._waiting[0] is not ticket or not self._fits(pixels):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(ticket)
+                    # The waiter behind this one may now be first in line.
+                    self._cond.notify_all()
+                    return False
+                self._cond.wait(remaining)
+            self._waiting.popleft()
+            self._pixels += pixels
+            self._images += 1
+            self._peak = max(self._peak, self._pixels)
+            self._admitted += 1
+            self._wait_total += time.monotonic() - started
+            # The next waiter may fit as well.
+            self._cond.notify_all()
+        return True
+
+    def release(self, pixels: int) -> None:
+        with self._cond:
+            self._pixels -= pixels
+            self._images -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Current and peak pixels in flight, and how long images waited to be admitted."""
+        with self._cond:
+            return {
+                "budget_pixels": self.budget,
+                "in_flight_pixels": self._pixels,
+                "in_flight_images": self._images,
+                "waiting": len(self._waiting),
+                "peak_pixels": self._peak,
+                "admitted": self._admitted,
+                "mean_wait_ms": round(self._wait_total * 1000 / self._admitted, 2) if self._admitted else 0.0,
+            }
+
+    def _fits(self, pixels: int) -> bool:
+        return self.budget <= 0 or self._images == 0 or self._pixels + pixels <= self.budget
+
+
+# Singleton instance, shared by every task thread in a worker process.
+pixel_budget = PixelBudget(settings.worker_pixel_budget)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=pixel_budget._reset)
@@ -0,0 +1,108 @@
+"""Background removal for animated images (animated WebP, GIF, APNG).
+
+An animation is split into frames and consecutive frames that barely
+change share one mask: each frame is compared with the last frame that went
+through the model, on a 64x64 grayscale thumbnail, and reuses its mask when
+the mean absolute difference is below ``settings.animation_reuse_threshold``.
+Comparing against that keyframe rather than the previous frame keeps slow
+drift from accumulating. Keyframes go through the session in batches of
+``settings.inference_batch_size``, and the cutout frames are re-encoded as a
+lossless animated WebP with alpha, keeping the frame durations and loop
+count. The result is always an animated WebP, whatever format was requested.
+"""
+
+import io
+import logging
+from typing import Any
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from ..config import settings
+from .buffers import ImageBuffer, open_buffer
+from .edges import refine_alpha
+from .encoding import OutputFormat
+from .inference import ModelSpec, apply_mask, predict_masks, upsample_mask
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (64, 64)
+# Pillow also reports multi-picture JPEGs (MPO, the format of many phone photos) as animated;
+# their extra frames are previews or depth maps, so they are processed as still JPEGs.
+ANIMATION_FORMATS = frozenset({"GIF", "WEBP", "PNG"})
+
+
+def is_animation(img: Image.Image) -> bool:
+    """True for an opened GIF, WebP or APNG with more than one frame."""
+    return img.format in ANIMATION_FORMATS and bool(getattr(img, "is_animated", False))
+
+
+def is_animated(data: ImageBuffer) -> bool:
+    """True for animations with more than one frame (reads the header only)."""
+    try:
+        with Image.open(open_buffer(data)) as img:
+            return is_animation(img)
+    except Exception:
+        return False
+
+
+def output_format_for(data: ImageBuffer, requested: str) -> str:
+    """The format a result is stored in: animated inputs always come back as animated WebP."""
+    return OutputFormat.WEBP if is_animated(data) else requested
+
+
+def load_frames(data: ImageBuffer) -> tuple[list[Image.Image], list[int], int]:
+    """Decoded RGBA frames, their durations in ms and the loop count."""
+    with Image.open(open_buffer(data)) as img:
+        loop = int(img.info.get("loop", 0))
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(img):
+            frames.append(frame.convert("RGBA"))
+            durations.append(int(frame.info.get("duration", 100)))
+    return frames, durations, loop
+
+
+def keyframe_indices(frames: list[Image.Image], threshold: float) -> list[int]:
+    """For each frame, the index of the keyframe whose mask it uses."""
+    keyframes: list[int] = []
+    reference: np.ndarray | None = None
+    for i, frame in enumerate(frames):
+        thumb = np.asarray(frame.convert("L").resize(THUMBNAIL_SIZE, Image.Resampling.BOX), dtype=np.int16)
+        if reference is None or np.abs(thumb - reference).mean() / 255 > threshold:
+            reference = thumb
+            keyframes.append(i)
+        else:
+            keyframes.append(keyframes[-1])
+    return keyframes
+
+
+def remove_background_animated(session: Any, data: ImageBuffer, spec: ModelSpec, refine_edges: bool = False) -> bytes:
+    """Cut out every frame of an animation and encode the result as an animated WebP."""
+    frames, durations, loop = load_frames(data)
+    keys = keyframe_indices(frames, settings.animation_reuse_threshold)
+    unique = sorted(set(keys))
+    predicted = predict_masks(session, [frames[i] for i in unique], spec, settings.inference_batch_size)
+    masks = dict(zip(unique, predicted, strict=True))
+    logger.info("Animated input: %d frames, %d run through the model", len(frames), len(unique))
+
+    # Keyframe indices only grow, so one upsampled mask is live at a time.
+    current, base = -1, np.empty(0, dtype=np.uint8)
+    cutouts = []
+    for frame, key in zip(frames, keys, strict=True):
+        if key != current:
+            current, base = key, upsample_mask(masks.pop(key), frame.size)
+        alpha = refine_alpha(frame, base) if refine_edges else base
+        cutouts.append(Image.fromarray(apply_mask(frame, alpha)))
+
+    buf = io.BytesIO()
+    cutouts[0].save(
+        buf,
+        format="WEBP",
+        save_all=True,
+        append_images=cutouts[1:],
+        duration=durations,
+        loop=loop,
+        lossless=True,
+        method=settings.webp_method,
+    )
+    return buf.getvalue()
@@ -0,0 +1,130 @@
+"""Dynamic micro-batching of single-image inference requests.
+
+Each Huey worker thread handles one upload at a time. Instead of every thread
+calling the session with a batch of one, threads hand their decoded image to
+a shared ``MicroBatcher``. A scheduler thread collects requests until
+``max_batch_size`` arrive or ``max_wait_ms`` has passed since the first one,
+then runs them through the session in one call. Requests are batched per
+model, with one scheduler thread per model in use.
+
+The batch sizes achieved and the time requests waited for a batch are
+reported by ``stats()``, under ``pipeline.microbatch`` in the worker
+heartbeat (see ``/health/workers``).
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from .inference import get_model_spec, predict_masks
+
+logger = logging.getLogger(__name__)
+
+# Log a batch-size summary after this many batches.
+_LOG_EVERY_BATCHES = 100
+
+
+@dataclass
+class _Pending:
+    image: Image.Image
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class MicroBatcher:
+    """Collects concurrent inference requests and runs them as one batched session call."""
+
+    def __init__(self, session_factory: Callable[[str], Any], max_batch_size: int, max_wait_ms: float) -> None:
+        self._session_factory = session_factory
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queues: dict[str, queue.Queue[_Pending]] = {}
+        self._threads: dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._batch_sizes: Counter[int] = Counter()
+        self._wait_total = 0.0
+
+    def predict(self, image: Image.Image, model_name: str) -> np.ndarray:
+        """Queue an image for the next batch of ``model_name`` and block until its mask is ready."""
+        pending = _Pending(image)
+        self._queue_for(model_name).put(pending)
+        mask: np.ndarray = pending.future.result()
+        return mask
+
+    def stats(self) -> dict:
+        """Batch sizes actually achieved since start-up."""
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            images = sum(size * count for size, count in self._batch_sizes.items())
+            return {
+                "batches": batches,
+                "images": images,
+                "mean_batch_size": round(images / batches, 2) if batches else 0.0,
+                "mean_wait_ms": round(self._wait_total * 1000 / images, 2) if images else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            }
+
+    def _queue_for(self, model_name: str) -> "queue.Queue[_Pending]":
+        """Return the request queue for a model, starting its scheduler thread if needed."""
+        with self._lock:
+            if model_name not in self._queues:
+                self._queues[model_name] = queue.Queue()
+            thread = self._threads.get(model_name)
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(
+                    target=self._run, args=(model_name,), name=f"micro-batcher-{model_name}", daemon=True
+                )
+                self._threads[model_name] = thread
+                thread.start()
+            return self._queues[model_name]
+
+    def _collect(self, requests: "queue.Queue[_Pending]") -> list[_Pending]:
+        """Block for the first request, then gather more until the batch is full or the window closes."""
+        batch = [requests.get()]
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, model_name: str) -> None:
+        requests = self._queues[model_name]
+        while True:
+            self._run_batch(model_name, self._collect(requests))
+
+    def _run_batch(self, model_name: str, batch: list[_Pending]) -> None:
+        started = time.monotonic()
+        try:
+            session = self._session_factory(model_name)
+            spec = get_model_spec(model_name)
+            masks = predict_masks(session, [p.image for p in batch], spec, len(batch))
+        except Exception as e:
+            for pending in batch:
+                pending.future.set_exception(e)
+            return
+
+        for pending, mask in zip(batch, masks, strict=True):
+            pending.future.set_result(mask)
+
+        with self._lock:
+            self._batch_sizes[len(batch)] += 1
+            self._wait_total += sum(started - p.enqueued_at for p in batch)
+            batches = sum(self._batch_sizes.values())
+        if batches % _LOG_EVERY_BATCHES == 0:
+            logger.info("Micro-batcher stats: %s", self.stats())
@@ -0,0 +1,81 @@
+"""Encoded image data held as bytes or mapped from a file.
+
+Workers map originals from local storage (``LocalStorage.map_file``), and
+the API maps uploads from the file Starlette spooled them to
+(``map_file_object``), instead of reading them into a bytes object. The
+mapped pages belong to the page cache, so an image costs no heap memory,
+and pages the decoder has read can be dropped under memory pressure. Hashing and shared
+memory take a mapping as they take bytes. Decoders read one through
+``open_buffer``, which gives every reader its own position over the mapping
+without copying it.
+"""
+
+import io
+import mmap
+import os
+from typing import BinaryIO
+
+ImageBuffer = bytes | mmap.mmap
+
+
+class _BufferReader(io.RawIOBase):
+    """Read-only, seekable file over a buffer; only the ranges read are copied."""
+
+    def __init__(self, data: ImageBuffer) -> None:
+        self._view = memoryview(data)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b: bytearray | memoryview) -> int:  # type: ignore[override]
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._pos = offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+def open_buffer(data: ImageBuffer) -> BinaryIO:
+    """A file object over encoded image data, for ``Image.open``."""
+    if isinstance(data, bytes):
+        return io.BytesIO(data)  # shares the bytes object until written to
+    return io.BufferedReader(_BufferReader(data))
+
+
+def map_file_object(f: BinaryIO) -> ImageBuffer:
+    """The whole content of an open file, mapped read-only if it is a file on disk.
+
+    A ``SpooledTemporaryFile`` still in memory, such as an upload under
+    Starlette's spool limit, is read instead: ``fileno()`` would first copy
+    it onto disk.
+    """
+    if getattr(f, "_rolled", True):
+        try:
+            fd = f.fileno()
+            if os.fstat(fd).st_size == 0:
+                return b""
+            return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except (OSError, io.UnsupportedOperation, AttributeError):
+            pass
+    f.seek(0)
+    return f.read()
@@ -0,0 +1,87 @@
+"""Output encodings for processed images.
+
+Encoding a multi-megapixel RGBA cutout at PIL's default PNG settings costs
+more CPU than anything else after inference. Clients pick a format per
+request; the encoder settings for each come from ``settings``.
+"""
+
+import io
+from enum import StrEnum
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from ..config import settings
+
+
+class OutputFormat(StrEnum):
+    PNG = "png"  # RGBA cutout
+    WEBP = "webp"  # lossless RGBA cutout
+    MASK = "mask"  # grayscale alpha mask only
+    JPEG = "jpeg"  # cutout flattened onto JPEG_BACKGROUND
+
+    @property
+    def extension(self) -> str:
+        return {"png": "png", "webp": "webp", "mask": "png", "jpeg": "jpg"}[self.value]
+
+    @property
+    def media_type(self) -> str:
+        return {"png": "image/png", "webp": "image/webp", "mask": "image/png", "jpeg": "image/jpeg"}[self.value]
+
+
+def output_filename(original_filename: str, output_format: str) -> str:
+    """Name of the processed file for an upload, e.g. ``photo.jpg`` -> ``photo.webp``."""
+    return f"{Path(original_filename).stem}.{OutputFormat(output_format).extension}"
+
+
+def _background_rgb() -> tuple[int, int, int]:
+    color = settings.jpeg_background.lstrip("#")
+    if len(color) != 6:
+        raise ValueError(f"Invalid JPEG background color: {settings.jpeg_background}")
+    r, g, b = (int(color[i : i + 2], 16) for i in (0, 2, 4))
+    return r, g, b
+
+
+def encoder_settings() -> dict[str, object]:
+    """The settings that shape encoded output, for result-cache keys."""
+    return {
+        "png_compress_level": settings.png_compress_level,
+        "webp_method": settings.webp_method,
+        "jpeg_quality": settings.jpeg_quality,
+        "jpeg_background": settings.jpeg_background,
+    }
+
+
+def flatten(rgba: np.ndarray, background: tuple[int, int, int]) -> Image.Image:
+    """Alpha-composite an RGBA array onto a solid color, returning an RGB image.
+
+    PIL's masked paste blends in C, ~3x faster than the equivalent NumPy arithmetic.
+    """
+    img = Image.fromarray(rgba)
+    flat = Image.new("RGB", img.size, background)
+    flat.paste(img, mask=img.getchannel("A"))
+    return flat
+
+
+def encode_mask(alpha: np.ndarray) -> bytes:
+    """Encode a full-resolution alpha mask as a grayscale PNG."""
+    buf = io.BytesIO()
+    Image.fromarray(alpha).save(buf, format="PNG", compress_level=settings.png_compress_level)
+    return buf.getvalue()
+
+
+def encode_rgba(rgba: np.ndarray, output_format: str) -> bytes:
+    """Encode an RGBA cutout in the requested format."""
+    fmt = OutputFormat(output_format)
+    if fmt is OutputFormat.MASK:
+        return encode_mask(np.ascontiguousarray(rgba[..., 3]))
+
+    buf = io.BytesIO()
+    if fmt is OutputFormat.PNG:
+        Image.fromarray(rgba).save(buf, format="PNG", compress_level=settings.png_compress_level)
+    elif fmt is OutputFormat.WEBP:
+        Image.fromarray(rgba).save(buf, format="WEBP", lossless=True, method=settings.webp_method)
+    else:
+        flatten(rgba, _background_rgb()).save(buf, format="JPEG", quality=settings.jpeg_quality)
+    return buf.getvalue()
@@ -0,0 +1,281 @@
+"""Process-pool inference engine.
+
+Huey thread workers share one GIL, so PIL decode, NumPy pre/post-processing
+and PNG encode serialize across threads. The engine runs whole images in a
+pool of long-lived worker processes instead, each with its own LRU of model
+sessions and its own ONNX thread budget.
+
+Tasks talk to a process over a ``multiprocessing`` pipe. Only shared-memory
+block names and sizes cross the pipe; image bytes are written to and read
+from ``multiprocessing.shared_memory`` blocks.
+
+A request that has not been answered within ``timeout`` seconds is
+abandoned: its process is killed and replaced, so a pathological image
+cannot hold on to an engine process, which a worker thread could not be
+made to let go of.
+"""
+
+import atexit
+import contextlib
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+from ..config import settings
+from .buffers import ImageBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class EngineError(RuntimeError):
+    """Raised when an engine process fails to handle a request."""
+
+
+class EngineDiedError(EngineError):
+    """Raised when an engine process exits while handling a request; it has been replaced."""
+
+
+class EngineTimeoutError(EngineError):
+    """Raised when a request runs past the engine's timeout; its process has been killed and replaced."""
+
+
+def _to_shm(data: ImageBuffer) -> SharedMemory:
+    """Copy bytes into a new shared-memory block owned by the caller."""
+    shm = SharedMemory(create=True, size=max(1, len(data)))
+    assert shm.buf is not None
+    shm.buf[: len(data)] = data
+    return shm
+
+
+def _from_shm(name: str, size: int, unlink: bool = False) -> bytes:
+    """Copy ``size`` bytes out of a named shared-memory block."""
+    shm = SharedMemory(name=name)
+    try:
+        assert shm.buf is not None
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+
+
+def _serve(conn: Connection, handler: Callable[..., bytes]) -> None:
+    """Request loop run inside an engine process.
+
+    Requests are ``(shm_name, size, *args)`` and call ``handler(data, *args)``;
+    replies are ``("ok", shm_name, size)`` for a result block the parent must
+    unlink, or ``("error", message)``. A ``None`` request shuts the loop down.
+    """
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+
+        name, size, *args = request
+        try:
+            result = handler(_from_shm(name, size), *args)
+            out = _to_shm(result)
+            conn.send(("ok", out.name, len(result)))
+            out.close()
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+def _session_loader(threads: int) -> Callable[[str], Any]:
+    """Session loader using the runtime profile, optionally with a fixed intra-op thread count."""
+    from .runtime_profile import check_oversubscription, load_profile, with_threads
+
+    profile = load_profile()
+    if threads:
+        profile = with_threads(profile, threads)
+    check_oversubscription(profile)
+
+    def load(model_name: str) -> Any:
+        from .sessions import load_session
+
+        return load_session(model_name, profile)
+
+    return load
+
+
+def _engine_main(conn: Connection, model_name: str, threads: int) -> None:
+    """Entry point of an engine process: preload the default model once, then serve."""
+    from .inference import remove_background
+    from .sessions import SessionCache
+
+    sessions = SessionCache(settings.session_cache_size, settings.session_memory_budget_mb, _session_loader(threads))
+    sessions.get(model_name)
+    conn.send(("ready", os.getpid()))
+    _serve(
+        conn,
+        lambda data, model, output_format, refine_edges: remove_background(
+            sessions.get(model), data, output_format, refine_edges
+        ),
+    )
+
+
+class _Slot:
+    """One engine process and the parent end of its pipe."""
+
+    def __init__(self, process: multiprocessing.process.BaseProcess, conn: Connection) -> None:
+        self.process = process
+        self.conn = conn
+
+
+class InferenceEngine:
+    """Pool of long-lived processes that each keep their model sessions loaded."""
+
+    def __init__(self, processes: int, model_name: str, threads_per_process: int = 0, timeout: float = 0) -> None:
+        self.processes = processes
+        self.model_name = model_name
+        # 0 lets each process take its share of the CPU budget from the runtime profile.
+        self.threads_per_process = threads_per_process
+        # Seconds a request may take before its process is killed; 0 waits indefinitely.
+        self.timeout = timeout
+        self._target: Callable[..., None] = _engine_main
+        self._idle: queue.Queue[_Slot] = queue.Queue()
+        self._slots: list[_Slot] = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0
+
+    def process(
+        self, data: ImageBuffer, model_name: str, output_format: str = "png", refine_edges: bool = False
+    ) -> bytes:
+        """Run one image through an idle engine process and return the encoded result."""
+        self._ensure_started()
+        slot = self._idle.get()
+        try:
+            result = self._call(slot, data, model_name, output_format, refine_edges, timeout=self.timeout)
+        except EngineTimeoutError:
+            self._replace(slot)
+            raise
+        except (EOFError, OSError) as e:
+            self._replace(slot)
+            raise EngineDiedError(f"Engine process died: {e}") from e
+        except BaseException:
+            self._idle.put(slot)  # the process survives handler errors
+            raise
+        self._idle.put(slot)
+        return result
+
+    def process_many(
+        self, images: list[ImageBuffer], model_name: str, output_format: str = "png", refine_edges: bool = False
+    ) -> list[bytes | Exception]:
+        """Fan images out across all engine processes; failures are returned in place."""
+
+        def run(data: ImageBuffer) -> bytes | Exception:
+            try:
+                return self.process(data, model_name, output_format, refine_edges)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, self.processes)) as pool:
+            return list(pool.map(run, images))
+
+    def warm_up(self, data: bytes, model_name: str, output_format: str = "png") -> None:
+        """Start the processes and run ``data`` through each of them once."""
+        self._ensure_started()
+        slots = [self._idle.get() for _ in range(self.processes)]
+        try:
+            for slot in slots:
+                self._call(slot, data, model_name, output_format, False)
+        finally:
+            for slot in slots:
+                self._idle.put(slot)
+
+    def shutdown(self) -> None:
+        """Stop all engine processes."""
+        with self._lock:
+            for slot in self._slots:
+                with contextlib.suppress(OSError):
+                    slot.conn.send(None)
+                slot.process.join(timeout=5)
+                if slot.process.is_alive():
+                    slot.process.kill()
+            self._slots.clear()
+            self._idle = queue.Queue()
+            self._started = False
+
+    def _call(self, slot: _Slot, data: ImageBuffer, *args: object, timeout: float = 0) -> bytes:
+        shm = _to_shm(data)
+        try:
+            slot.conn.send((shm.name, len(data), *args))
+            if timeout > 0 and not slot.conn.poll(timeout):
+                raise EngineTimeoutError(f"Engine process took longer than {timeout:g}s")
+            reply = slot.conn.recv()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        if reply[0] == "error":
+            raise EngineError(reply[1])
+        _, name, size = reply
+        return _from_shm(name, size, unlink=True)
+
+    def _spawn(self) -> _Slot:
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(
+            target=self._target,
+            args=(child_conn, self.model_name, self.threads_per_process),
+            name="inference-engine",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        _, pid = parent_conn.recv()
+        logger.info("Inference engine process %s ready (%s)", pid, self.model_name)
+        return _Slot(process, parent_conn)
+
+    def _replace(self, slot: _Slot) -> None:
+        """Kill a slot's process and make a new one idle in its place.
+
+        The dead slot is never handed out again. If the new process cannot
+        be started (for example under memory pressure), the pool runs one
+        short until ``_ensure_started`` tops it up on the next request.
+        """
+        with self._lock:
+            if slot.process.is_alive():
+                slot.process.kill()
+            self._slots.remove(slot)
+            try:
+                new_slot = self._spawn()
+            except Exception:
+                logger.exception("Could not replace an engine process; retrying on the next request")
+                return
+            self._slots.append(new_slot)
+        self._idle.put(new_slot)
+
+    def _ensure_started(self) -> None:
+        """Start the processes on first use, and any that could not be replaced since."""
+        with self._lock:
+            if not self._started:
+                self._started = True
+                atexit.register(self.shutdown)
+            while len(self._slots) < self.processes:
+                slot = self._spawn()
+                self._slots.append(slot)
+                self._idle.put(slot)
+
+
+# Singleton instance; processes start on first use, so importing this in the API is free.
+inference_engine = InferenceEngine(
+    settings.engine_processes,
+    settings.default_model,
+    threads_per_process=settings.engine_threads_per_process,
+    timeout=settings.processing_timeout,
+)
@@ -1,20 +1,25 @@
 import asyncio
-
-from rembg import new_session, remove
+from typing import Any
 
 from ..models.schemas import JobStatus
 from .job_manager import job_manager
+from .sessions import session_cache
 from .storage.local import storage
 
 
 class ImageProcessor:
     """Service for processing images with background removal."""
 
-    def __init__(self) -> None:
+    def __init__(self, model_name: str = "birefnet-general") -> None:
         self.storage = storage
         self.job_manager = job_manager
         # Use BiRefNet for better quality background removal
-        self.session = new_session("birefnet-general")
+        self.model_name = model_name
+
+    @property
+    def session(self) -> Any:
+        """Shared session from the process's session cache, loaded on first use."""
+        return session_cache.get(self.model_name)
 
     async def process_image(self, image_data: bytes) -> bytes:
         """Remove background from an image using rembg with BiRefNet."""
@@ -25,6 +30,8 @@ class ImageProcessor:
 
     def _remove_background(self, image_data: bytes) -> bytes:
         """Synchronous background removal using rembg with BiRefNet."""
+        from rembg import remove
+
         # Process with rembg using BiRefNet model (better quality than U2-Net)
         output: bytes = remove(image_data, session=self.session)
         return output
@@ -70,5 +77,5 @@ class ImageProcessor:
             )
 
 
-# Singleton instance
+# Singleton instance; no model is loaded until an image is processed.
 image_processor = ImageProcessor()
@@ -0,0 +1,267 @@
+"""Background-removal pipeline on top of rembg's ONNX sessions.
+
+rembg's ``remove`` runs one image per session call and composites the
+cutout at full size through PIL. Here the image is decoded once, a
+model-sized copy is made for inference, and only the single-channel mask is
+upsampled and applied to the full-resolution pixels with NumPy.
+
+For batch jobs several preprocessed images are stacked into one input tensor
+and the ONNX session is called once per chunk.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from typing import Any
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from ..config import settings
+from .buffers import ImageBuffer, open_buffer
+from .edges import refine_alpha
+from .encoding import OutputFormat, encode_mask, encode_rgba
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Pre/post-processing parameters for a segmentation model."""
+
+    name: str
+    input_size: tuple[int, int]
+    mean: tuple[float, float, float] = IMAGENET_MEAN
+    std: tuple[float, float, float] = IMAGENET_STD
+    sigmoid: bool = False
+    memory_mb: int = 1000  # approximate resident size of a loaded session
+    base_model: str | None = None  # FP32 model an INT8 variant was quantized from
+
+
+MODEL_SPECS: dict[str, ModelSpec] = {
+    "u2netp": ModelSpec("u2netp", (320, 320), memory_mb=60),
+    "silueta": ModelSpec("silueta", (320, 320), memory_mb=180),
+    "isnet-general-use": ModelSpec(
+        "isnet-general-use", (1024, 1024), mean=(0.5, 0.5, 0.5), std=(1.0, 1.0, 1.0), memory_mb=700
+    ),
+    "birefnet-general-lite": ModelSpec("birefnet-general-lite", (1024, 1024), sigmoid=True, memory_mb=900),
+    "birefnet-general": ModelSpec("birefnet-general", (1024, 1024), sigmoid=True, memory_mb=2500),
+}
+
+# INT8 variants (built with ``python -m app.commands.quantize build``) share their base model's processing.
+for _base in list(MODEL_SPECS.values()):
+    MODEL_SPECS[f"{_base.name}-int8"] = replace(
+        _base, name=f"{_base.name}-int8", memory_mb=max(1, _base.memory_mb // 3), base_model=_base.name
+    )
+
+
+def available_models() -> list[str]:
+    """Models requests may choose: every FP32 model, and the INT8 variants listed in ``settings.int8_models``."""
+    return [name for name, spec in MODEL_SPECS.items() if spec.base_model is None or name in settings.int8_models]
+
+
+def get_model_spec(model_name: str) -> ModelSpec:
+    """Look up the spec for a model name. Raises ValueError for unknown models."""
+    spec = MODEL_SPECS.get(model_name)
+    if spec is None:
+        raise ValueError(f"Unsupported model: {model_name}")
+    return spec
+
+
+def _oriented(img: Image.Image) -> Image.Image:
+    """Apply the EXIF orientation and normalize to RGB or RGBA."""
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if img.has_transparency_data else "RGB")
+    return img
+
+
+def decode_image(data: ImageBuffer) -> Image.Image:
+    """Decode an encoded image once, apply the EXIF orientation and normalize to RGB or RGBA."""
+    return _oriented(Image.open(open_buffer(data)))
+
+
+class SourceImage:
+    """An upload decoded for inference and for compositing, each at the size it needs.
+
+    JPEGs, including multi-picture JPEGs (MPO) from phone cameras, are
+    decoded for inference with libjpeg DCT scaling (``draft``) at the
+    smallest 1/2, 1/4 or 1/8 scale that still covers the model input, so
+    the full-resolution decode happens once, when the mask is applied. Pillow
+    has no reduced decode for other formats (including WebP); for those the
+    single full decode is shared by both stages.
+    """
+
+    def __init__(self, data: ImageBuffer) -> None:
+        self.data = data
+        self._full: Image.Image | None = None
+
+    def for_inference(self, spec: ModelSpec) -> Image.Image:
+        """Image at the smallest cheap decode size covering ``spec.input_size``."""
+        if self._full is None:
+            img = Image.open(open_buffer(self.data))
+            if img.format in ("JPEG", "MPO"):
+                full_size = img.size
+                img.draft("RGB", spec.input_size)
+                if img.size != full_size:
+                    return _oriented(img)
+        return self.full()
+
+    def full(self) -> Image.Image:
+        """Full-resolution image, decoded on first use."""
+        if self._full is None:
+            self._full = decode_image(self.data)
+        return self._full
+
+
+def preprocess(img: Image.Image, spec: ModelSpec) -> np.ndarray:
+    """Resize and normalize an image into a (3, H, W) float32 model input.
+
+    ``reducing_gap`` lets PIL box-reduce large images before the Lanczos
+    pass, so a 25 MP input is not filtered at full resolution.
+    """
+    resized = img.resize(spec.input_size, Image.Resampling.LANCZOS, reducing_gap=2.0).convert("RGB")
+    arr = np.asarray(resized, dtype=np.float32)
+    mean = np.asarray(spec.mean, dtype=np.float32)
+    std = np.asarray(spec.std, dtype=np.float32)
+    normalized: np.ndarray = (arr / max(float(arr.max()), 1e-6) - mean) / std
+    return normalized.transpose((2, 0, 1))
+
+
+def _normalize_mask(pred: np.ndarray) -> np.ndarray:
+    """Min-max scale a single prediction to a uint8 mask."""
+    lo, hi = float(pred.min()), float(pred.max())
+    scaled = (pred - lo) / max(hi - lo, 1e-6)
+    return (np.clip(scaled, 0.0, 1.0) * 255).astype(np.uint8)
+
+
+def supports_batching(session: Any) -> bool:
+    """True if the session's input accepts more than one image per call.
+
+    Exported models either declare a symbolic batch dimension or a fixed 1.
+    """
+    batch_dim = session.inner_session.get_inputs()[0].shape[0]
+    return not isinstance(batch_dim, int) or batch_dim != 1
+
+
+def predict_masks(
+    session: Any,
+    images: Sequence[Image.Image | np.ndarray],
+    spec: ModelSpec,
+    chunk_size: int,
+    normalize: bool = True,
+) -> list[np.ndarray]:
+    """Run inference on a list of images, ``chunk_size`` images per session call.
+
+    Returns one uint8 mask per image at model resolution. Each mask is
+    normalized on its own so results match single-image inference. With
+    ``normalize=False`` the model's probabilities are used as-is, which keeps
+    crops of one image comparable with each other. Arrays are taken as
+    ``preprocess`` output, so callers can resize ahead of the session call.
+    """
+    if not images:
+        return []
+
+    step = max(1, chunk_size) if supports_batching(session) else 1
+    input_name = session.inner_session.get_inputs()[0].name
+
+    masks: list[np.ndarray] = []
+    for start in range(0, len(images), step):
+        batch = np.stack(
+            [img if isinstance(img, np.ndarray) else preprocess(img, spec) for img in images[start : start + step]]
+        )
+        preds = session.inner_session.run(None, {input_name: batch})[0][:, 0, :, :]
+        if spec.sigmoid:
+            preds = 1 / (1 + np.exp(-preds))
+        if normalize:
+            masks.extend(_normalize_mask(pred) for pred in preds)
+        else:
+            masks.extend((np.clip(pred, 0.0, 1.0) * 255).astype(np.uint8) for pred in preds)
+
+    return masks
+
+
+def upsample_mask(mask: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+    """Scale a model-resolution uint8 mask to ``size`` (width, height)."""
+    return np.asarray(Image.fromarray(mask).resize(size, Image.Resampling.BILINEAR))
+
+
+def _combined_alpha(img: Image.Image, alpha: np.ndarray) -> np.ndarray:
+    """Multiply an image's existing alpha channel, if any, into a full-resolution mask."""
+    if img.mode == "RGBA":
+        combined: np.ndarray = (alpha.astype(np.uint16) * np.asarray(img.getchannel("A")) // 255).astype(np.uint8)
+        return combined
+    return alpha
+
+
+def apply_mask(img: Image.Image, alpha: np.ndarray) -> np.ndarray:
+    """Build an RGBA array from full-resolution pixels and a full-resolution alpha mask.
+
+    An existing alpha channel is multiplied in. Fully transparent pixels are
+    zeroed so they compress well.
+    """
+    pixels = np.asarray(img)
+    alpha = _combined_alpha(img, alpha)
+
+    height, width = alpha.shape
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[..., :3] = pixels[..., :3]
+    rgba[..., 3] = alpha
+    # Zero whole pixels through a 32-bit view; boolean indexing over RGBA rows is ~20x slower.
+    rgba.view(np.uint32).reshape(height, width)[alpha == 0] = 0
+    return rgba
+
+
+def encode_cutout(
+    img: Image.Image, mask: np.ndarray, output_format: str = OutputFormat.PNG, refine_edges: bool = False
+) -> bytes:
+    """Upsample a model-resolution mask, apply it to the image and encode in ``output_format``.
+
+    ``mask`` may also already be at full resolution (see ``tiling``). With
+    ``refine_edges`` the full-resolution mask is refined around hair and
+    other fine edges first (see ``edges``). The mask-only format skips
+    building the RGBA cutout altogether.
+    """
+    alpha = mask if mask.shape == (img.height, img.width) else upsample_mask(mask, img.size)
+    if refine_edges:
+        alpha = refine_alpha(img, alpha)
+    if output_format == OutputFormat.MASK:
+        return encode_mask(_combined_alpha(img, alpha))
+    return encode_rgba(apply_mask(img, alpha), output_format)
+
+
+def remove_background(
+    session: Any, data: ImageBuffer, output_format: str = OutputFormat.PNG, refine_edges: bool = False
+) -> bytes:
+    """Remove the background from a single image (or every frame of an animation)."""
+    from .animation import is_animated, remove_background_animated
+    from .tiling import refine_if_large
+
+    if is_animated(data):
+        return remove_background_animated(session, data, get_model_spec(session.model_name), refine_edges)
+    source = SourceImage(data)
+    spec = get_model_spec(session.model_name)
+    mask = predict_masks(session, [source.for_inference(spec)], spec, 1)[0]
+    img = source.full()
+    return encode_cutout(img, refine_if_large(session, img, spec, mask), output_format, refine_edges)
+
+
+def remove_background_batch(
+    session: Any,
+    images: list[bytes],
+    chunk_size: int,
+    output_format: str = OutputFormat.PNG,
+    refine_edges: bool = False,
+) -> list[bytes]:
+    """Remove the background from several images with batched inference."""
+    from .tiling import refine_if_large
+
+    spec = get_model_spec(session.model_name)
+    sources = [SourceImage(data) for data in images]
+    masks = predict_masks(session, [source.for_inference(spec) for source in sources], spec, chunk_size)
+
+    results = []
+    for source, mask in zip(sources, masks, strict=True):
+        img = source.full()
+        results.append(encode_cutout(img, refine_if_large(session, img, spec, mask), output_format, refine_edges))
+    return results
@@ -0,0 +1,108 @@
+"""Push job progress to clients as images change status.
+
+Workers run in other processes, so they cannot call into the API directly.
+``JobManager.update_image_status`` appends every image status change to the
+``job_events`` table, in the transaction that makes the change, as a
+``JobEvent`` with the job's progress after it. In each API process one
+thread reads the rows added since its last read, every
+``settings.job_events_poll_interval`` seconds, and hands each event to the
+streams open for that job. The thread runs only while at least one stream
+is open. Reads of ``job_events`` therefore cost one indexed query per
+interval, however many clients are waiting, where each polling client used
+to load a whole job once a second.
+
+Events are deleted with their job by ``JobManager.cleanup_old_jobs``.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+
+from ..config import settings
+from ..db.database import get_connection
+from ..models.schemas import JobEvent
+
+logger = logging.getLogger(__name__)
+
+_Subscriber = tuple[asyncio.AbstractEventLoop, "asyncio.Queue[JobEvent]"]
+
+
+class JobEventHub:
+    """Fans ``job_events`` rows out to the asyncio queues of a process's open streams."""
+
+    def __init__(self, poll_interval: float) -> None:
+        self.poll_interval = poll_interval
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget subscribers and the reader (also run in forked children, which do not inherit its thread)."""
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, list[_Subscriber]] = {}
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, job_id: str) -> "asyncio.Queue[JobEvent]":
+        """A queue that receives the job's events committed from now on; call from the event loop."""
+        queue: asyncio.Queue[JobEvent] = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append((asyncio.get_running_loop(), queue))
+            if self._thread is None:
+                # Read the starting point before returning, so no event committed after subscribing is skipped.
+                self._thread = threading.Thread(target=self._run, args=(_last_seq(),), name="job-events", daemon=True)
+                self._thread.start()
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: "asyncio.Queue[JobEvent]") -> None:
+        """Stop delivering to ``queue``; the reader stops once no stream is open."""
+        with self._lock:
+            subscribers = [s for s in self._subscribers.get(job_id, []) if s[1] is not queue]
+            if subscribers:
+                self._subscribers[job_id] = subscribers
+            else:
+                self._subscribers.pop(job_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def _run(self, last_seq: int) -> None:
+        with get_connection() as conn:
+            while True:
+                try:
+                    rows = conn.execute(
+                        "SELECT seq, job_id, payload FROM job_events WHERE seq > ? ORDER BY seq", (last_seq,)
+                    ).fetchall()
+                except Exception:
+                    logger.exception("Reading job events failed")
+                    rows = []
+                for row in rows:
+                    last_seq = row["seq"]
+                    self._deliver(row["job_id"], row["payload"])
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                time.sleep(self.poll_interval)
+
+    def _deliver(self, job_id: str, payload: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, []))
+        if not subscribers:
+            return
+        event = JobEvent.model_validate_json(payload)
+        for loop, queue in subscribers:
+            with contextlib.suppress(RuntimeError):  # the loop has closed, and its stream with it
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+
+
+def _last_seq() -> int:
+    with get_connection() as conn:
+        return int(conn.execute("SELECT COALESCE(MAX(seq), 0) FROM job_events").fetchone()[0])
+
+
+# Singleton instance
+job_event_hub = JobEventHub(settings.job_events_poll_interval)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=job_event_hub._reset)
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime, timedelta
 
 from ..db.database import get_connection
-from ..models.schemas import ImageResult, JobResponse, JobStatus
+from ..models.schemas import ImageResult, JobEvent, JobResponse, JobStatus
 
 
 class Job:
@@ -49,7 +49,8 @@ def _compute_job_status(images: dict[str, ImageResult]) -> str:
 
     if all(s == JobStatus.COMPLETED for s in statuses):
         return JobStatus.COMPLETED
-    if any(s == JobStatus.PROCESSING for s in statuses):
+    # A batch is split into tasks, so some images may be finished while others still wait in the queue.
+    if any(s == JobStatus.PROCESSING for s in statuses) or 0 < completed_or_failed < len(statuses):
         return JobStatus.PROCESSING
     if all(s == JobStatus.FAILED for s in statuses):
         return JobStatus.FAILED
@@ -68,6 +69,8 @@ def _load_job_from_rows(job_row: dict, image_rows: list[dict]) -> Job:
             status=JobStatus(row["status"]),
             download_url=row["download_url"],
             error=row["error"],
+            output_format=row["output_format"],
+            inference_skipped=bool(row["inference_skipped"]),
         )
     return Job(
         job_id=job_row["job_id"],
@@ -77,30 +80,56 @@ def _load_job_from_rows(job_row: dict, image_rows: list[dict]) -> Job:
     )
 
 
+def _job_event(job_id: str, status: str, images: dict[str, ImageResult], image_id: str) -> JobEvent:
+    """The event for a change to ``image_id``, given the job's images and status after it."""
+    completed = sum(1 for img in images.values() if img.status in (JobStatus.COMPLETED, JobStatus.FAILED))
+    return JobEvent(
+        job_id=job_id,
+        status=JobStatus(status),
+        progress=completed / len(images),
+        completed_count=completed,
+        total_count=len(images),
+        image=images[image_id],
+    )
+
+
 class JobManager:
     """SQLite-backed job tracking manager."""
 
-    def create_job(self, images: list[dict]) -> Job:
-        """Create a new job with the given images."""
+    def create_job(self, images: list[dict], output_format: str = "png", tier: str = "anonymous") -> Job:
+        """Create a new job with the given images, encoded in ``output_format`` unless an image sets its own.
+
+        Each image dict has a ``filename`` and optionally its ``output_format`` and ``pixels`` (see ``admission``).
+        ``tier`` is the uploader's tier, for queue-wait metrics (see ``scheduling``).
+        """
         job_id = str(uuid.uuid4())
         now = datetime.utcnow().isoformat()
 
         with get_connection() as conn:
             conn.execute(
-                "INSERT INTO jobs (job_id, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
-                (job_id, JobStatus.PENDING, now, now),
+                "INSERT INTO jobs (job_id, status, created_at, updated_at, tier) VALUES (?, ?, ?, ?, ?)",
+                (job_id, JobStatus.PENDING, now, now, tier),
             )
             image_results: dict[str, ImageResult] = {}
             for img in images:
                 image_id = str(uuid.uuid4())
                 conn.execute(
-                    "INSERT INTO job_images (image_id, job_id, original_filename, status) VALUES (?, ?, ?, ?)",
-                    (image_id, job_id, img["filename"], JobStatus.PENDING),
+                    "INSERT INTO job_images (image_id, job_id, original_filename, status, output_format, pixels) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        image_id,
+                        job_id,
+                        img["filename"],
+                        JobStatus.PENDING,
+                        img.get("output_format", output_format),
+                        img.get("pixels", 0),
+                    ),
                 )
                 image_results[image_id] = ImageResult(
                     image_id=image_id,
                     original_filename=img["filename"],
                     status=JobStatus.PENDING,
+                    output_format=img.get("output_format", output_format),
                 )
             conn.commit()
 
@@ -121,14 +150,37 @@ class JobManager:
         return _load_job_from_rows(dict(job_row), [dict(r) for r in image_rows])
 
     def update_image_status(
-        self, job_id: str, image_id: str, status: JobStatus, download_url: str | None = None, error: str | None = None
+        self,
+        job_id: str,
+        image_id: str,
+        status: JobStatus,
+        download_url: str | None = None,
+        error: str | None = None,
+        inference_skipped: bool | None = None,
     ) -> None:
-        """Update the status of a specific image in a job."""
+        """Update the status of a specific image in a job.
+
+        Every switch to processing counts as an attempt at the image, and the
+        first one also records when a worker started it. The change is also
+        appended to ``job_events`` for progress streams (see ``job_events``).
+        """
         now = datetime.utcnow().isoformat()
+        starting = status == JobStatus.PROCESSING
         with get_connection() as conn:
             conn.execute(
-                "UPDATE job_images SET status = ?, download_url = COALESCE(?, download_url), error = COALESCE(?, error) WHERE image_id = ? AND job_id = ?",
-                (status, download_url, error, image_id, job_id),
+                "UPDATE job_images SET status = ?, download_url = COALESCE(?, download_url), error = COALESCE(?, error), "
+                "inference_skipped = COALESCE(?, inference_skipped), started_at = COALESCE(started_at, ?), "
+                "attempts = attempts + ? WHERE image_id = ? AND job_id = ?",
+                (
+                    status,
+                    download_url,
+                    error,
+                    inference_skipped,
+                    now if starting else None,
+                    int(starting),
+                    image_id,
+                    job_id,
+                ),
             )
             # Recompute job status from all images
             image_rows = conn.execute("SELECT * FROM job_images WHERE job_id = ?", (job_id,)).fetchall()
@@ -140,11 +192,38 @@ class JobManager:
                     status=JobStatus(row["status"]),
                     download_url=row["download_url"],
                     error=row["error"],
+                    output_format=row["output_format"],
+                    inference_skipped=bool(row["inference_skipped"]),
                 )
             new_status = _compute_job_status(images)
             conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?", (new_status, now, job_id))
+            if image_id in images:
+                event = _job_event(job_id, new_status, images, image_id)
+                conn.execute(
+                    "INSERT INTO job_events (job_id, payload) VALUES (?, ?)", (job_id, event.model_dump_json())
+                )
             conn.commit()
 
+    def get_attempts(self, image_id: str) -> int:
+        """How many times a worker has started processing an image."""
+        with get_connection() as conn:
+            row = conn.execute("SELECT attempts FROM job_images WHERE image_id = ?", (image_id,)).fetchone()
+        return int(row["attempts"]) if row else 0
+
+    def refund_attempt(self, image_id: str, limit: int) -> bool:
+        """Take back the latest attempt at an image that never got as far as inference.
+
+        At most ``limit`` attempts are taken back per image; returns False once they have been.
+        """
+        with get_connection() as conn:
+            cursor = conn.execute(
+                "UPDATE job_images SET attempts = MAX(0, attempts - 1), busy_retries = busy_retries + 1 "
+                "WHERE image_id = ? AND busy_retries < ?",
+                (image_id, limit),
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
     def delete_job(self, job_id: str) -> bool:
         """Delete a job by ID."""
         with get_connection() as conn:
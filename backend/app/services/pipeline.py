@@ -0,0 +1,166 @@
+"""Staged processing pipeline with bounded queues between stages.
+
+Run back to back on one thread, an image's storage read, decode,
+inference, compositing, encode and storage write leave the session idle
+while the image is encoded and the encoder idle while the model runs. A
+``StagedPipeline`` gives each stage its own threads and a bounded queue in
+front of it, so while one image is in the model the next is being decoded
+and the previous one encoded and written. A full queue blocks the stage
+feeding it, so a slow stage holds back the ones before it instead of
+letting decoded images pile up.
+
+A stage with ``batch_size`` > 1 is called with a list: after its first
+item it waits up to ``max_wait`` seconds for more, like the micro-batcher.
+It returns one result per item, and an exception in place of a result fails
+only that item.
+
+Each stage records how long its threads were busy. ``stats()`` reports that
+as a share of the stage's thread time since the pipeline started. The stage
+closest to 1.0 is the bottleneck.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Log stage utilization after this many items have left the pipeline.
+_LOG_EVERY_ITEMS = 100
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Any], Any]  # item -> result, or list -> list of results when batch_size > 1
+    threads: int = 1
+    batch_size: int = 1
+    max_wait: float = 0.0
+
+
+@dataclass
+class _Item:
+    value: Any
+    future: Future = field(default_factory=Future)
+
+
+class StagedPipeline:
+    """Runs items through a fixed sequence of stages, each on its own threads."""
+
+    def __init__(self, stages: list[Stage], queue_size: int) -> None:
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def submit(self, value: Any, timeout: float | None = None) -> Future:
+        """Queue an item for the first stage; blocks while that stage is backed up.
+
+        Raises ``queue.Full`` if the stage is still backed up after ``timeout`` seconds.
+        """
+        self._start()
+        item = _Item(value)
+        self._queues[0].put(item, timeout=timeout)
+        return item.future
+
+    def run(self, value: Any) -> Any:
+        """Run one item through every stage and return the last stage's result."""
+        return self.submit(value).result()
+
+    def stats(self) -> dict:
+        """Per-stage throughput and utilization since the pipeline started."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+            stages: list[dict[str, Any]] = []
+            for index, stage in enumerate(self.stages):
+                threads = max(1, stage.threads)
+                capacity = elapsed * threads
+                stages.append(
+                    {
+                        "name": stage.name,
+                        "threads": threads,
+                        "items": self._items[index],
+                        "busy_seconds": round(self._busy[index], 2),
+                        "utilization": round(self._busy[index] / capacity, 3) if capacity else 0.0,
+                        "queued": self._queues[index].qsize(),
+                    }
+                )
+        busiest = max(stages, key=lambda s: float(s["utilization"])) if elapsed else None
+        return {
+            "completed": self._completed,
+            "stages": stages,
+            "bottleneck": busiest["name"] if busiest else None,
+        }
+
+    def _reset(self) -> None:
+        """Forget threads and metrics (also run in forked children, which do not inherit the threads)."""
+        self._queues: list[queue.Queue[_Item]] = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self._started_at: float | None = None
+        self._busy = [0.0] * len(self.stages)
+        self._items = [0] * len(self.stages)
+        self._completed = 0
+
+    def _start(self) -> None:
+        """Start every stage's threads on first use."""
+        with self._lock:
+            if self._started_at is not None:
+                return
+            self._started_at = time.monotonic()
+            for index, stage in enumerate(self.stages):
+                for n in range(max(1, stage.threads)):
+                    threading.Thread(
+                        target=self._run_stage, args=(index,), name=f"pipeline-{stage.name}-{n}", daemon=True
+                    ).start()
+
+    def _take(self, index: int) -> list[_Item]:
+        """Block for one item, then gather more for a batching stage until it is full or the window closes."""
+        stage, items = self.stages[index], self._queues[index]
+        batch = [items.get()]
+        deadline = time.monotonic() + stage.max_wait
+        while len(batch) < stage.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(items.get(timeout=remaining) if remaining > 0 else items.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_stage(self, index: int) -> None:
+        stage = self.stages[index]
+        last = index == len(self.stages) - 1
+        while True:
+            batch = self._take(index)
+            started = time.monotonic()
+            results: list[Any]
+            try:
+                results = (
+                    stage.fn([item.value for item in batch]) if stage.batch_size > 1 else [stage.fn(batch[0].value)]
+                )
+            except Exception as e:
+                results = [e] * len(batch)
+            with self._lock:
+                self._busy[index] += time.monotonic() - started
+                self._items[index] += len(batch)
+
+            for item, result in zip(batch, results, strict=True):
+                if isinstance(result, Exception):
+                    item.future.set_exception(result)
+                    self._finished()
+                elif last:
+                    item.future.set_result(result)
+                    self._finished()
+                else:
+                    item.value = result
+                    self._queues[index + 1].put(item)
+
+    def _finished(self) -> None:
+        with self._lock:
+            self._completed += 1
+            completed = self._completed
+        if completed % _LOG_EVERY_ITEMS == 0:
+            logger.info("Pipeline stats: %s", self.stats())
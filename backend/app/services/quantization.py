@@ -0,0 +1,118 @@
+"""INT8-quantized model variants.
+
+Quantized models are built offline with ``python -m app.commands.quantize build``
+and stored next to rembg's FP32 download as ``<model>-int8.onnx``. Each one is
+served as its own model name (``birefnet-general-int8`` and so on) with the
+same pre/post-processing as its FP32 base.
+
+Building needs the optional ``onnx`` package; loading only needs onnxruntime.
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .inference import ModelSpec, decode_image, get_model_spec, preprocess
+
+
+def _rembg_session_class(model_name: str) -> Any:
+    from rembg.sessions import sessions_class
+
+    for cls in sessions_class:
+        if cls.name() == model_name:
+            return cls
+    raise ValueError(f"No rembg session class for model: {model_name}")
+
+
+def fp32_model_path(model_name: str) -> Path:
+    """Path of rembg's FP32 ONNX file for a model, downloading it if needed."""
+    return Path(_rembg_session_class(model_name).download_models())
+
+
+def quantized_model_path(model_name: str) -> Path:
+    """Where the INT8 variant of an FP32 model lives."""
+    return Path(_rembg_session_class(model_name).model_dir()) / f"{model_name}-int8.onnx"
+
+
+class QuantizedSession:
+    """Session for an INT8 model file, shaped like rembg's sessions (``model_name``, ``inner_session``)."""
+
+    def __init__(self, spec: ModelSpec, sess_opts: Any) -> None:
+        import onnxruntime as ort
+
+        assert spec.base_model is not None
+        path = quantized_model_path(spec.base_model)
+        if not path.exists():
+            raise FileNotFoundError(
+                f"Quantized model {spec.name} has not been built. "
+                f"Run: python -m app.commands.quantize build {spec.base_model}"
+            )
+        self.model_name = spec.name
+        self.inner_session = ort.InferenceSession(str(path), sess_options=sess_opts, providers=["CPUExecutionProvider"])
+
+
+def _calibration_batches(model_name: str, images: list[Path]) -> Iterator[np.ndarray]:
+    spec = get_model_spec(model_name)
+    for path in images:
+        yield preprocess(decode_image(path.read_bytes()), spec)[np.newaxis]
+
+
+def quantize_model(model_name: str, static: bool = False, calibration_images: list[Path] | None = None) -> Path:
+    """Write an INT8 variant of ``model_name`` and return its path.
+
+    Dynamic quantization needs no data. Static quantization calibrates
+    activation ranges on ``calibration_images`` and is usually faster, at a
+    larger accuracy risk.
+    """
+    try:
+        from onnxruntime.quantization import (
+            CalibrationDataReader,
+            QuantFormat,
+            QuantType,
+            quantize_dynamic,
+            quantize_static,
+        )
+    except ImportError as e:
+        raise RuntimeError("Building quantized models requires the 'onnx' package: pip install onnx") from e
+
+    src = fp32_model_path(model_name)
+    dst = quantized_model_path(model_name)
+
+    if not static:
+        quantize_dynamic(str(src), str(dst), weight_type=QuantType.QUInt8)
+        return dst
+
+    if not calibration_images:
+        raise ValueError("Static quantization needs calibration images")
+
+    import onnxruntime as ort
+
+    input_name = ort.InferenceSession(str(src), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    batches = _calibration_batches(model_name, calibration_images)
+
+    class _Reader(CalibrationDataReader):  # type: ignore[misc]
+        def get_next(self) -> dict | None:
+            batch = next(batches, None)
+            return None if batch is None else {input_name: batch}
+
+    quantize_static(
+        str(src),
+        str(dst),
+        _Reader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    return dst
+
+
+def mask_iou(a: np.ndarray, b: np.ndarray, threshold: int = 128) -> float:
+    """Intersection over union of two uint8 masks binarized at ``threshold``."""
+    fg_a = a >= threshold
+    fg_b = b >= threshold
+    union = np.logical_or(fg_a, fg_b).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(fg_a, fg_b).sum() / union)
@@ -0,0 +1,101 @@
+"""Retries with backoff for images that fail transiently, and quarantine for those that keep failing.
+
+Some failures are worth another attempt: a storage read or write that
+failed, a locked database, an engine process that died, or an image that
+ran past ``settings.processing_timeout``. Others are not: an upload that
+cannot be decoded fails the same way every time. ``is_transient`` separates
+the two. Non-transient failures fail the image at once.
+
+A transient failure is retried after ``backoff_delay``:
+``retry_backoff_seconds``, doubled for each attempt already made and capped
+at ``retry_backoff_max_seconds``. If the image is still failing after
+``task_max_attempts`` attempts, the image itself is the likely cause, for
+example an input that crashes the decoder or keeps the model busy far
+longer than its size warrants. It is then failed for good and recorded in
+the ``quarantine`` table, with the error, its traceback and the worker it
+last ran on, and is not retried again. With the engine's hard deadline, a
+bad input can hold a worker for at most ``task_max_attempts`` times
+``processing_timeout``.
+
+An image that times out waiting behind others to reach inference
+(``PipelineBusyError``) is retried the same way, but the attempt is not
+counted against it, so it is not quarantined for another image's delay.
+Only ``task_max_busy_retries`` attempts are given back: if inference is
+stuck for good, the images waiting on it still end up quarantined.
+"""
+
+import sqlite3
+import traceback
+from datetime import datetime
+
+from ..config import settings
+from ..db.database import get_connection
+from .engine import EngineDiedError, EngineTimeoutError
+from .worker_health import worker_registry
+
+
+class ProcessingTimeoutError(TimeoutError):
+    """Raised when an image is not processed within ``settings.processing_timeout``."""
+
+
+class PipelineBusyError(TimeoutError):
+    """Raised when an image waits longer than ``settings.pipeline_queue_timeout`` to reach inference."""
+
+
+class StorageUnavailableError(RuntimeError):
+    """Raised when reading an original or writing a result fails."""
+
+
+_TRANSIENT_ERRORS = (
+    ProcessingTimeoutError,
+    PipelineBusyError,
+    StorageUnavailableError,
+    EngineDiedError,
+    EngineTimeoutError,
+    sqlite3.OperationalError,
+)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for failures another attempt at the same image may not repeat."""
+    return isinstance(exc, _TRANSIENT_ERRORS)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt at an image that has been attempted ``attempts`` times."""
+    return float(min(settings.retry_backoff_max_seconds, settings.retry_backoff_seconds * 2 ** max(0, attempts - 1)))
+
+
+def quarantine_image(job_id: str, image: dict, model_name: str, attempts: int, exc: BaseException) -> None:
+    """Record an image that will not be retried again, with what it last failed with."""
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO quarantine (image_id, job_id, original_filename, original_path, model, pixels, "
+            "attempts, error, traceback, worker_id, quarantined_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                image["image_id"],
+                job_id,
+                image["filename"],
+                image["original_path"],
+                model_name,
+                image.get("pixels", 0),
+                attempts,
+                f"{type(exc).__name__}: {exc}",
+                "".join(traceback.format_exception(exc)),
+                worker_registry.worker_id,
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        conn.commit()
+
+
+def quarantined_images(limit: int = 100) -> list[dict]:
+    """The most recently quarantined images, newest first."""
+    with get_connection() as conn:
+        rows = conn.execute("SELECT * FROM quarantine ORDER BY quarantined_at DESC LIMIT ?", (limit,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def quarantine_count() -> int:
+    with get_connection() as conn:
+        return int(conn.execute("SELECT COUNT(*) FROM quarantine").fetchone()[0])
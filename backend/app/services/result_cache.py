@@ -0,0 +1,153 @@
+"""Content-addressed cache of processed results.
+
+Results are stored on disk under a key derived from the original bytes, the
+model, any output parameters and the encoder settings, so re-uploading the same image with the
+same options is answered at upload time without queueing a task. Workers
+write entries after processing; the API reads them.
+
+Each process keeps an in-memory LRU index of the entries it knows about,
+seeded from the cache directory (ordered by mtime) on first use. Reads touch
+the file's mtime so that recency is shared across processes, and writes
+evict the least recently used entries once the size cap is exceeded.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from ..config import settings
+from .buffers import ImageBuffer
+from .encoding import encoder_settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when a pipeline change makes previously cached results stale.
+CACHE_VERSION = 1
+
+
+def cache_key(data: ImageBuffer, model_name: str, **params: object) -> str:
+    """SHA-256 of the input bytes, model name, output parameters and encoder settings."""
+    digest = hashlib.sha256(data)
+    digest.update(json.dumps([CACHE_VERSION, model_name, params, encoder_settings()], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Size-capped LRU of processed results on disk, with hit/miss counters."""
+
+    def __init__(self, directory: Path, max_mb: int) -> None:
+        self._lock = threading.Lock()
+        self.configure(directory, max_mb)
+
+    def configure(self, directory: Path, max_mb: int | None = None) -> None:
+        """Point the cache at a directory and reset the index and counters."""
+        with self._lock:
+            self.directory = directory
+            if max_mb is not None:
+                self.max_bytes = max_mb * 1024 * 1024
+            self._index: OrderedDict[str, int] | None = None
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> bytes | None:
+        """Cached result for ``key``, or None. Counts a hit or a miss."""
+        if not self.enabled:
+            return None
+        path = self.directory / key
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                index[key] = len(data)
+                self._size += len(data)
+            index.move_to_end(key)
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a result, evicting least recently used entries over the cap.
+
+        Failures are logged rather than raised: the cache must never fail a job.
+        """
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = self.directory / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp.write_bytes(data)
+            os.replace(tmp, self.directory / key)
+        except OSError as e:
+            logger.warning("Could not write result cache entry %s: %s", key, e)
+            return
+
+        with self._lock:
+            index = self._load_index()
+            self._forget(key)
+            index[key] = len(data)
+            self._size += len(data)
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._index or ()),
+                "size_mb": round(self._size / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            }
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        """Index of on-disk entries, least recently used first (built once per process)."""
+        if self._index is None:
+            entries = []
+            if self.directory.exists():
+                for path in self.directory.iterdir():
+                    if path.name.startswith("."):
+                        continue
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, path.name, stat.st_size))
+            entries.sort()
+            self._index = OrderedDict((name, size) for _, name, size in entries)
+            self._size = sum(self._index.values())
+        return self._index
+
+    def _forget(self, key: str) -> None:
+        if self._index is not None and key in self._index:
+            self._size -= self._index.pop(key)
+
+    def _evict(self) -> None:
+        index = self._load_index()
+        while self._size > self.max_bytes and index:
+            key, size = index.popitem(last=False)
+            self._size -= size
+            with contextlib.suppress(FileNotFoundError):
+                (self.directory / key).unlink()
+
+
+# Singleton instance; the index is read from disk on first use.
+result_cache = ResultCache(settings.result_cache_dir, settings.result_cache_max_mb)
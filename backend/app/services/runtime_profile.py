@@ -0,0 +1,175 @@
+"""ONNX Runtime tuning profiles.
+
+A profile fixes the thread counts, execution mode, graph optimization level
+and memory arena behaviour of every session a worker creates. Defaults are
+derived from the container's CPU quota and how many sessions run at once,
+so concurrent sessions do not each try to use every core.
+
+Resolution order: ``settings.runtime_profile_path`` (written by
+``python -m app.commands.autotune``) if it exists, then the ``ORT_*``
+settings, with ``0`` thread counts filled in from the CPU budget.
+"""
+
+import json
+import logging
+import math
+import os
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("sequential", "parallel")
+GRAPH_OPTIMIZATION_LEVELS = ("disable", "basic", "extended", "all")
+
+
+@dataclass(frozen=True)
+class RuntimeProfile:
+    """ONNX Runtime session options for one worker process."""
+
+    intra_op_threads: int
+    inter_op_threads: int = 1
+    execution_mode: str = "sequential"
+    graph_optimization: str = "all"
+    enable_cpu_mem_arena: bool = True
+
+    def __post_init__(self) -> None:
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Invalid execution mode: {self.execution_mode}")
+        if self.graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(f"Invalid graph optimization level: {self.graph_optimization}")
+
+    @property
+    def threads_per_session(self) -> int:
+        """Threads one session can keep busy at once."""
+        if self.execution_mode == "parallel":
+            return self.intra_op_threads * max(1, self.inter_op_threads)
+        return self.intra_op_threads
+
+    def session_options(self) -> Any:
+        """Build ``onnxruntime.SessionOptions`` for this profile."""
+        import onnxruntime as ort
+
+        levels = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = self.intra_op_threads
+        opts.inter_op_num_threads = self.inter_op_threads
+        opts.execution_mode = (
+            ort.ExecutionMode.ORT_PARALLEL if self.execution_mode == "parallel" else ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        opts.graph_optimization_level = levels[self.graph_optimization]
+        opts.enable_cpu_mem_arena = self.enable_cpu_mem_arena
+        return opts
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RuntimeProfile":
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+def _read_cgroup_quota(root: Path) -> float | None:
+    """CPU quota from cgroup v2 ``cpu.max`` or v1 ``cpu.cfs_quota_us``, in cores."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota_us = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period_us = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+        return quota_us / period_us if quota_us > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus(cgroup_root: Path = Path("/sys/fs/cgroup")) -> int:
+    """Cores this process may use: the CPU affinity mask, capped by any cgroup quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS
+        cpus = os.cpu_count() or 1
+
+    quota = _read_cgroup_quota(cgroup_root)
+    if quota is not None:
+        cpus = min(cpus, max(1, math.floor(quota)))
+    return max(1, cpus)
+
+
+def concurrent_sessions() -> int:
+    """Sessions that may run at the same time on this machine.
+
+    The engine runs one per process. Without it, the pipeline's infer stage
+    runs one per thread whatever the worker count, and with the pipeline off
+    every worker thread runs its own.
+    """
+    if settings.engine_processes:
+        return max(1, settings.engine_processes)
+    if settings.pipeline_enabled:
+        return max(1, settings.pipeline_infer_threads)
+    return max(1, settings.worker_count)
+
+
+def default_profile(cpus: int | None = None, concurrency: int | None = None) -> RuntimeProfile:
+    """Split the CPU budget evenly across concurrently running sessions."""
+    cpus = cpus or available_cpus()
+    concurrency = concurrency or concurrent_sessions()
+    return RuntimeProfile(intra_op_threads=max(1, cpus // concurrency), inter_op_threads=1)
+
+
+def load_profile() -> RuntimeProfile:
+    """Resolve the active profile from the tuned profile file or settings."""
+    path = settings.runtime_profile_path
+    if path.exists():
+        try:
+            return RuntimeProfile.from_dict(json.loads(path.read_text()))
+        except (ValueError, TypeError) as e:
+            logger.warning("Ignoring invalid runtime profile %s: %s", path, e)
+
+    base = default_profile()
+    return RuntimeProfile(
+        intra_op_threads=settings.ort_intra_op_threads or base.intra_op_threads,
+        inter_op_threads=settings.ort_inter_op_threads or base.inter_op_threads,
+        execution_mode=settings.ort_execution_mode,
+        graph_optimization=settings.ort_graph_optimization,
+        enable_cpu_mem_arena=settings.ort_enable_cpu_mem_arena,
+    )
+
+
+def save_profile(profile: RuntimeProfile, path: Path | None = None) -> Path:
+    """Write a profile as JSON (defaults to ``settings.runtime_profile_path``)."""
+    path = path or settings.runtime_profile_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(profile.to_dict(), indent=2) + "\n")
+    return path
+
+
+def check_oversubscription(profile: RuntimeProfile, concurrency: int | None = None, cpus: int | None = None) -> bool:
+    """Log a warning and return True if concurrent sessions would use more threads than cores."""
+    cpus = cpus or available_cpus()
+    concurrency = concurrency or concurrent_sessions()
+    total = profile.threads_per_session * concurrency
+    if total > cpus:
+        logger.warning(
+            "ONNX Runtime oversubscription: %d concurrent sessions x %d threads = %d threads on %d available cores",
+            concurrency,
+            profile.threads_per_session,
+            total,
+            cpus,
+        )
+        return True
+    return False
+
+
+def with_threads(profile: RuntimeProfile, intra_op_threads: int) -> RuntimeProfile:
+    """Copy of ``profile`` with a different intra-op thread count."""
+    return replace(profile, intra_op_threads=max(1, intra_op_threads))
@@ -0,0 +1,73 @@
+"""Queue priority by tier, and queue-wait metrics per tier.
+
+Uploads are enqueued with the ``queue_priority`` of the caller's tier, so
+the worker picks paid tasks before queued free-tier ones (anonymous web
+uploads count as free). ``FairSqliteStorage`` in ``tasks.queue`` keeps the
+free tier moving under load.
+
+The job row records the tier and each image row the time a worker started
+it. The wait between upload and start, per tier over a recent window, is
+what the latency targets are checked against; ``/stats`` reports it.
+"""
+
+from datetime import datetime, timedelta
+
+from ..db.database import get_connection
+from ..models.api_key import TIER_LIMITS, ApiKey, Tier
+
+ANONYMOUS = "anonymous"
+# Queue waits are reported over this many recent minutes.
+WAIT_WINDOW_MINUTES = 60
+
+
+def tier_of(api_key: ApiKey | None) -> str:
+    return api_key.tier if api_key is not None else ANONYMOUS
+
+
+def queue_priority(api_key: ApiKey | None) -> int:
+    """Huey priority for a caller's tasks; higher runs first."""
+    return _tier_priority(tier_of(api_key))
+
+
+def job_priority(job_id: str) -> int:
+    """Huey priority for more tasks of an existing job, from the tier recorded on it."""
+    with get_connection() as conn:
+        row = conn.execute("SELECT tier FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    return _tier_priority(row["tier"] if row else ANONYMOUS)
+
+
+def _tier_priority(tier: str) -> int:
+    limits = TIER_LIMITS.get(tier, TIER_LIMITS[Tier.FREE])
+    return int(limits["queue_priority"])
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def queue_wait_stats(window_minutes: int = WAIT_WINDOW_MINUTES) -> dict:
+    """Seconds from upload to a worker starting the image, per tier, for images started in the window."""
+    since = (datetime.utcnow() - timedelta(minutes=window_minutes)).isoformat()
+    with get_connection() as conn:
+        rows = conn.execute(
+            """SELECT j.tier AS tier, (julianday(i.started_at) - julianday(j.created_at)) * 86400 AS wait
+               FROM job_images i JOIN jobs j ON j.job_id = i.job_id
+               WHERE i.started_at IS NOT NULL AND i.started_at >= ?""",
+            (since,),
+        ).fetchall()
+
+    waits: dict[str, list[float]] = {}
+    for row in rows:
+        waits.setdefault(row["tier"], []).append(max(0.0, row["wait"]))
+    tiers = {}
+    for tier, values in sorted(waits.items()):
+        values.sort()
+        tiers[tier] = {
+            "images": len(values),
+            "mean_seconds": round(sum(values) / len(values), 3),
+            "p50_seconds": round(_percentile(values, 0.5), 3),
+            "p95_seconds": round(_percentile(values, 0.95), 3),
+            "max_seconds": round(values[-1], 3),
+        }
+    return {"window_minutes": window_minutes, "tiers": tiers}
@@ -0,0 +1,162 @@
+"""Bounded LRU cache of loaded model sessions for worker processes.
+
+``session_cache`` is the only place a worker process loads models. The API
+process never calls it, so importing it there costs nothing.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from ..config import settings
+from .inference import get_model_spec
+
+logger = logging.getLogger(__name__)
+
+
+def load_session(model_name: str, profile: Any = None) -> Any:
+    """Load a model session with the runtime profile's options (the active profile by default).
+
+    INT8 variants load their quantized file directly; everything else goes through rembg.
+    """
+    from .runtime_profile import load_profile
+
+    spec = get_model_spec(model_name)
+    sess_opts = (profile or load_profile()).session_options()
+    if spec.base_model is not None:
+        from .quantization import QuantizedSession
+
+        return QuantizedSession(spec, sess_opts)
+
+    from rembg import new_session
+
+    return new_session(model_name, sess_opts=sess_opts)
+
+
+def _new_session(model_name: str) -> Any:
+    from .runtime_profile import check_oversubscription, load_profile
+
+    profile = load_profile()
+    check_oversubscription(profile)
+    return load_session(model_name, profile)
+
+
+def resident_mb() -> float:
+    """Current resident set size of this process in MB (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+class SessionCache:
+    """Keeps the most recently used sessions loaded, within a count and memory budget.
+
+    Memory is accounted with each model's ``ModelSpec.memory_mb`` estimate.
+    The most recently requested session is always kept, even if it alone
+    exceeds the budget.
+
+    Loads are single-flight: when several threads (or greenlets, under
+    gevent's patched locks) ask for a model that is not loaded, one of them
+    loads it and the others wait for that result, so a model is never loaded
+    twice in one process. A forked child (Huey process workers) starts with
+    an empty cache, since ONNX sessions do not survive a fork.
+    """
+
+    def __init__(self, max_sessions: int, memory_budget_mb: int, loader: Callable[[str], Any] = _new_session) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.memory_budget_mb = memory_budget_mb
+        self._loader = loader
+        self._reset()
+
+    def _reset(self) -> None:
+        """Start empty, e.g. in a forked child whose inherited sessions and lock are unusable."""
+        self._sessions: OrderedDict[str, Any] = OrderedDict()
+        self._loading: dict[str, Future] = {}
+        self._rss_mb: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str) -> Any:
+        """Return a loaded session for ``model_name``, loading and evicting as needed."""
+        spec = get_model_spec(model_name)
+        with self._lock:
+            session = self._sessions.get(model_name)
+            if session is not None:
+                self._sessions.move_to_end(model_name)
+                return session
+            pending = self._loading.get(model_name)
+            if pending is None:
+                pending = self._loading[model_name] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return pending.result()
+
+        try:
+            before = resident_mb()
+            session = self._loader(spec.name)
+            loaded_mb = max(0.0, resident_mb() - before)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[model_name]
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[model_name]
+            self._sessions[model_name] = session
+            self._sessions.move_to_end(model_name)
+            self._rss_mb[model_name] = loaded_mb
+            self._evict()
+        logger.info("Loaded model session %s (+%.0f MB resident)", model_name, loaded_mb)
+        pending.set_result(session)
+        return session
+
+    def loaded(self) -> list[str]:
+        """Loaded model names, least recently used first."""
+        with self._lock:
+            return list(self._sessions)
+
+    @property
+    def memory_mb(self) -> int:
+        with self._lock:
+            return sum(get_model_spec(name).memory_mb for name in self._sessions)
+
+    def stats(self) -> dict:
+        """This process's RSS and each loaded model's estimated and measured footprint.
+
+        ``rss_mb`` per model is the growth in resident memory while it loaded;
+        loads running in parallel in one process share that growth.
+        """
+        with self._lock:
+            models = [
+                {
+                    "name": name,
+                    "estimated_mb": get_model_spec(name).memory_mb,
+                    "rss_mb": round(self._rss_mb.get(name, 0.0), 1),
+                }
+                for name in self._sessions
+            ]
+        return {"pid": os.getpid(), "rss_mb": round(resident_mb(), 1), "models": models}
+
+    def _evict(self) -> None:
+        def used() -> int:
+            return sum(get_model_spec(name).memory_mb for name in self._sessions)
+
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or used() > self.memory_budget_mb):
+            evicted, _ = self._sessions.popitem(last=False)
+            self._rss_mb.pop(evicted, None)
+            logger.info("Evicted model session %s", evicted)
+
+
+# Singleton instance; sessions load on first use, so importing this in the API is free.
+session_cache = SessionCache(settings.session_cache_size, settings.session_memory_budget_mb)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=session_cache._reset)
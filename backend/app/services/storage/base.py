@@ -1,5 +1,10 @@
+import io
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import BinaryIO
+
+from ...utils.event_loop import run_sync
+from ..buffers import ImageBuffer
 
 
 class StorageBackend(ABC):
@@ -11,8 +16,8 @@ class StorageBackend(ABC):
         pass
 
     @abstractmethod
-    async def save_processed(self, file_content: bytes, filename: str, job_id: str) -> str:
-        """Save processed file. Returns the storage path/key."""
+    async def save_processed(self, file_content: bytes, filename: str, job_id: str, output_format: str = "png") -> str:
+        """Save processed file under the output format's name. Returns the storage path/key."""
         pass
 
     @abstractmethod
@@ -34,3 +39,30 @@ class StorageBackend(ABC):
     async def get_file_path(self, path: str) -> Path | None:
         """Get the actual file path for streaming. Returns None for non-local storage."""
         pass
+
+    # Synchronous counterparts, for worker threads and the API's thread pool.
+    # Backends override them with blocking I/O; these defaults run the async
+    # methods on the process's background event loop.
+
+    def read_file(self, path: str) -> bytes | None:
+        """Read a file's content by path/key, or None if it does not exist."""
+        return run_sync(self.get_file(path))
+
+    def map_file(self, path: str) -> ImageBuffer | None:
+        """A file's content for decoding, memory-mapped where the backend can; None if it does not exist."""
+        return self.read_file(path)
+
+    def open_file(self, path: str) -> BinaryIO | None:
+        """Open a file for streaming reads, or None if it does not exist. The caller closes it."""
+        content = self.read_file(path)
+        return io.BytesIO(content) if content is not None else None
+
+    def write_original(self, content: bytes | BinaryIO, filename: str, job_id: str) -> str:
+        """Write an original from bytes or a file object (such as a spooled upload), like ``save_original``."""
+        data = content if isinstance(content, bytes) else content.read()
+        return run_sync(self.save_original(data, filename, job_id))
+
+    def write_processed(self, content: bytes | BinaryIO, filename: str, job_id: str, output_format: str = "png") -> str:
+        """Write a processed file from bytes or a file object, like ``save_processed``. Returns the storage path/key."""
+        data = content if isinstance(content, bytes) else content.read()
+        return run_sync(self.save_processed(data, filename, job_id, output_format))
@@ -1,9 +1,14 @@
+import io
 import os
+import shutil
 from pathlib import Path
+from typing import BinaryIO
 
 import aiofiles
 
 from ...config import settings
+from ..buffers import ImageBuffer, map_file_object
+from ..encoding import output_filename
 from .base import StorageBackend
 
 
@@ -31,15 +36,12 @@ class LocalStorage(StorageBackend):
 
         return str(file_path)
 
-    async def save_processed(self, file_content: bytes, filename: str, job_id: str) -> str:
+    async def save_processed(self, file_content: bytes, filename: str, job_id: str, output_format: str = "png") -> str:
         """Save processed file."""
         job_dir = self.processed_dir / job_id
         job_dir.mkdir(parents=True, exist_ok=True)
 
-        # Always save as PNG for transparency
-        base_name = Path(filename).stem
-        output_filename = f"{base_name}.png"
-        file_path = job_dir / output_filename
+        file_path = job_dir / output_filename(filename, output_format)
 
         async with aiofiles.open(file_path, "wb") as f:
             await f.write(file_content)
@@ -86,6 +88,80 @@ class LocalStorage(StorageBackend):
             return file_path
         return None
 
+    def read_file(self, path: str) -> bytes | None:
+        try:
+            return Path(path).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def map_file(self, path: str) -> ImageBuffer | None:
+        """The file mapped read-only into memory; its pages are shared with the page cache, not copied."""
+        try:
+            with open(path, "rb") as f:
+                return map_file_object(f)
+        except FileNotFoundError:
+            return None
+
+    def open_file(self, path: str) -> BinaryIO | None:
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+    def write_original(self, content: bytes | BinaryIO, filename: str, job_id: str) -> str:
+        job_dir = self.original_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        file_path = job_dir / filename
+        with open(file_path, "wb") as f:
+            if isinstance(content, bytes):
+                f.write(content)
+            else:
+                _copy_file(content, f)
+        return str(file_path)
+
+    def write_processed(self, content: bytes | BinaryIO, filename: str, job_id: str, output_format: str = "png") -> str:
+        job_dir = self.processed_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        file_path = job_dir / output_filename(filename, output_format)
+        with open(file_path, "wb") as f:
+            if isinstance(content, bytes):
+                f.write(content)
+            else:
+                _copy_file(content, f)
+        return str(file_path)
+
+
+def _copy_file(src: BinaryIO, dest: BinaryIO) -> None:
+    """Copy a file object from its start into an open file.
+
+    A source backed by a file on disk, such as an upload spooled past its
+    in-memory limit, is copied by the kernel with ``copy_file_range``: the
+    data never passes through Python, and filesystems with reflinks (btrfs,
+    XFS) share the blocks instead of copying them. Anything else, including
+    a spool still in memory, is copied in chunks.
+    """
+    src.seek(0)
+    # fileno() would force a SpooledTemporaryFile still in memory onto disk.
+    if getattr(src, "_rolled", True) and hasattr(os, "copy_file_range"):
+        try:
+            fd_in, fd_out = src.fileno(), dest.fileno()
+            size = os.fstat(fd_in).st_size
+            copied = 0
+            while copied < size:
+                n = os.copy_file_range(fd_in, fd_out, size - copied, copied, copied)
+                if n == 0:
+                    break
+                copied += n
+            if copied == size:
+                return
+        except (OSError, io.UnsupportedOperation, AttributeError):
+            pass
+        # Start over with a plain copy.
+        src.seek(0)
+        dest.seek(0)
+        dest.truncate()
+    shutil.copyfileobj(src, dest)
+
 
 # Singleton instance
 storage = LocalStorage()
@@ -1,11 +1,13 @@
 """Cloudflare R2 storage backend (S3-compatible)."""
 
 from pathlib import Path
+from typing import BinaryIO
 
 import boto3
 from botocore.exceptions import ClientError
 
 from ...config import settings
+from ..encoding import OutputFormat, output_filename
 from .base import StorageBackend
 
 
@@ -27,26 +29,15 @@ class R2Storage(StorageBackend):
 
     async def save_original(self, file_content: bytes, filename: str, job_id: str) -> str:
         """Upload original file to R2."""
-        key = self._key("original", job_id, filename)
-        self.client.put_object(Bucket=self.bucket_name, Key=key, Body=file_content)
-        return key
+        return self.write_original(file_content, filename, job_id)
 
-    async def save_processed(self, file_content: bytes, filename: str, job_id: str) -> str:
-        """Upload processed file to R2 (always PNG)."""
-        base_name = Path(filename).stem
-        output_filename = f"{base_name}.png"
-        key = self._key("processed", job_id, output_filename)
-        self.client.put_object(Bucket=self.bucket_name, Key=key, Body=file_content, ContentType="image/png")
-        return key
+    async def save_processed(self, file_content: bytes, filename: str, job_id: str, output_format: str = "png") -> str:
+        """Upload processed file to R2 with the output format's content type."""
+        return self.write_processed(file_content, filename, job_id, output_format)
 
     async def get_file(self, path: str) -> bytes | None:
         """Download file from R2 by key."""
-        try:
-            response = self.client.get_object(Bucket=self.bucket_name, Key=path)
-            content: bytes = response["Body"].read()
-            return content
-        except ClientError:
-            return None
+        return self.read_file(path)
 
     async def delete_file(self, path: str) -> bool:
         """Delete file from R2."""
@@ -67,3 +58,35 @@ class R2Storage(StorageBackend):
     async def get_file_path(self, path: str) -> Path | None:
         """R2 storage has no local file path — always returns None."""
         return None
+
+    def read_file(self, path: str) -> bytes | None:
+        body = self.open_file(path)
+        if body is None:
+            return None
+        try:
+            content: bytes = body.read()
+            return content
+        finally:
+            body.close()
+
+    def open_file(self, path: str) -> BinaryIO | None:
+        """The object's streaming body; it is read from the connection as the caller reads it."""
+        try:
+            response = self.client.get_object(Bucket=self.bucket_name, Key=path)
+        except ClientError:
+            return None
+        body: BinaryIO = response["Body"]
+        return body
+
+    def write_original(self, content: bytes | BinaryIO, filename: str, job_id: str) -> str:
+        """Upload an original from bytes or a file object."""
+        key = self._key("original", job_id, filename)
+        self.client.put_object(Bucket=self.bucket_name, Key=key, Body=content)
+        return key
+
+    def write_processed(self, content: bytes | BinaryIO, filename: str, job_id: str, output_format: str = "png") -> str:
+        """Upload a processed file from bytes or a file object, with the output format's content type."""
+        key = self._key("processed", job_id, output_filename(filename, output_format))
+        content_type = OutputFormat(output_format).media_type
+        self.client.put_object(Bucket=self.bucket_name, Key=key, Body=content, ContentType=content_type)
+        return key
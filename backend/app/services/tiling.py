@@ -0,0 +1,180 @@
+"""Tiled edge refinement for very large images.
+
+For very large images a single 1024x1024 inference pass loses fine edges,
+and the full-resolution mask is a blown-up model-resolution guess. For
+images of at least ``settings.tiled_min_pixels`` the coarse mask is
+refined instead: the image is covered with overlapping tiles of
+``settings.tile_size`` source pixels, and only tiles whose coarse mask has
+uncertain (edge) values are run through the model at their own
+resolution. Each tile is blended into the full-resolution mask with a
+linear ramp over ``settings.tile_overlap`` pixels on its interior sides.
+
+Tiling is on by default above 16 MP, where a single pass at model
+resolution is coarsest. It improves edge quality; it does not bound memory. The full-size
+decode, mask and encoded output still grow with the pixel count, as they
+do without tiling, so it is no reason to raise ``max_resolution``. What
+tiling adds on top is kept small: tiles are inferred
+``inference_batch_size`` at a time, only the predictions of about two tile
+rows are held, and the coarse mask is upsampled tile by tile rather than
+kept at full resolution next to the refined one.
+"""
+
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from ..config import settings
+from .inference import ModelSpec, predict_masks, upsample_mask
+
+# Coarse mask values strictly between these are treated as object edges.
+EDGE_LOW = 8
+EDGE_HIGH = 247
+
+
+def needs_tiling(img: Image.Image) -> bool:
+    """True if tiled refinement is enabled and the image is large enough to use it."""
+    return 0 < settings.tiled_min_pixels <= img.width * img.height
+
+
+def tile_starts(length: int, tile: int, overlap: int) -> list[int]:
+    """Tile offsets covering ``length`` pixels with at least ``overlap`` pixels shared."""
+    if length <= tile:
+        return [0]
+    stride = max(1, tile - overlap)
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+def edge_tiles(coarse: np.ndarray, size: tuple[int, int], tile: int, overlap: int) -> list[tuple[int, int, int, int]]:
+    """Boxes ``(left, top, right, bottom)`` in source pixels whose coarse mask has edge values."""
+    width, height = size
+    coarse_h, coarse_w = coarse.shape
+    sy, sx = coarse_h / height, coarse_w / width
+    edges = (coarse > EDGE_LOW) & (coarse < EDGE_HIGH)
+
+    boxes = []
+    for top in tile_starts(height, tile, overlap):
+        for left in tile_starts(width, tile, overlap):
+            right, bottom = min(left + tile, width), min(top + tile, height)
+            region = edges[
+                int(top * sy) : max(int(top * sy) + 1, int(np.ceil(bottom * sy))),
+                int(left * sx) : max(int(left * sx) + 1, int(np.ceil(right * sx))),
+            ]
+            if region.any():
+                boxes.append((left, top, right, bottom))
+    return boxes
+
+
+def blend_window(box: tuple[int, int, int, int], size: tuple[int, int], overlap: int) -> np.ndarray:
+    """Float32 weights for a tile: 1 inside, ramping to 0 on sides that do not touch the image border."""
+    left, top, right, bottom = box
+    width, height = size
+
+    def ramp(length: int, fade_start: bool, fade_end: bool) -> np.ndarray:
+        weights = np.ones(length, dtype=np.float32)
+        n = min(overlap, length // 2)
+        if n:
+            edge = np.linspace(0.0, 1.0, n + 2, dtype=np.float32)[1:-1]
+            if fade_start:
+                weights[:n] = edge
+            if fade_end:
+                weights[-n:] = edge[::-1]
+        return weights
+
+    wy = ramp(bottom - top, top > 0, bottom < height)
+    wx = ramp(right - left, left > 0, right < width)
+    return np.outer(wy, wx)
+
+
+def _coarse_region(coarse: np.ndarray, box: tuple[int, int, int, int], size: tuple[int, int]) -> np.ndarray:
+    """The coarse mask upsampled to full resolution over ``box`` only (within 1 of the same crop of a full upsample)."""
+    left, top, right, bottom = box
+    sx, sy = coarse.shape[1] / size[0], coarse.shape[0] / size[1]
+    region = Image.fromarray(coarse).resize(
+        (right - left, bottom - top), Image.Resampling.BILINEAR, box=(left * sx, top * sy, right * sx, bottom * sy)
+    )
+    return np.asarray(region)
+
+
+def _compose(
+    box: tuple[int, int, int, int],
+    preds: dict[tuple[int, int, int, int], np.ndarray],
+    coarse: np.ndarray,
+    size: tuple[int, int],
+    overlap: int,
+) -> np.ndarray:
+    """Final mask for one tile box: tile predictions weighted by their windows, topped up with the coarse mask.
+
+    Where tile windows sum to less than 1 (towards unrefined neighbours) the
+    coarse mask fills the remainder, so refined areas fade into it smoothly.
+    """
+    left, top, right, bottom = box
+    weight = np.zeros((bottom - top, right - left), dtype=np.float32)
+    acc = np.zeros_like(weight)
+    for other, pred in preds.items():
+        o_left, o_top, o_right, o_bottom = other
+        il, it, ir, ib = max(left, o_left), max(top, o_top), min(right, o_right), min(bottom, o_bottom)
+        if il >= ir or it >= ib:
+            continue
+        w = blend_window(other, size, overlap)[it - o_top : ib - o_top, il - o_left : ir - o_left]
+        weight[it - top : ib - top, il - left : ir - left] += w
+        acc[it - top : ib - top, il - left : ir - left] += w * pred[it - o_top : ib - o_top, il - o_left : ir - o_left]
+
+    base = _coarse_region(coarse, box, size)
+    blended: np.ndarray = (acc + np.maximum(0.0, 1.0 - weight) * base) / np.maximum(weight, 1.0)
+    return (blended + 0.5).astype(np.uint8)
+
+
+def refine_tiled(session: Any, img: Image.Image, spec: ModelSpec, coarse: np.ndarray) -> np.ndarray:
+    """Full-resolution uint8 mask: the upsampled coarse mask with edge tiles re-inferred and blended in.
+
+    Tiles are handled one row at a time. A row is composed as soon as no
+    later row can overlap it, and predictions are dropped once every tile
+    overlapping them is composed, so only a couple of tile rows are held.
+    """
+    tile = settings.tile_size
+    overlap = min(settings.tile_overlap, tile // 2)
+    chunk = max(1, settings.inference_batch_size)
+    size = img.size
+
+    # Written in place, so it must own its (writable) buffer; np.asarray over a PIL image is read-only.
+    alpha = np.array(Image.fromarray(coarse).resize(size, Image.Resampling.BILINEAR))
+
+    rows: dict[int, list[tuple[int, int, int, int]]] = {}
+    for box in edge_tiles(coarse, size, tile, overlap):
+        rows.setdefault(box[1], []).append(box)
+    tops = sorted(rows)
+
+    preds: dict[tuple[int, int, int, int], np.ndarray] = {}
+    pending: list[int] = []
+    for i, top in enumerate(tops):
+        row = rows[top]
+        for start in range(0, len(row), chunk):
+            boxes = row[start : start + chunk]
+            crops = [img.crop(box) for box in boxes]
+            masks = predict_masks(session, crops, spec, chunk, normalize=False)
+            for box, crop, mask in zip(boxes, crops, masks, strict=True):
+                preds[box] = upsample_mask(mask, crop.size)
+        pending.append(top)
+
+        # Rows not yet predicted start at or below next_top and cannot overlap rows ending above it.
+        next_top = tops[i + 1] if i + 1 < len(tops) else size[1]
+        while pending and rows[pending[0]][0][3] <= next_top:
+            for box in rows[pending.pop(0)]:
+                left, t, right, bottom = box
+                alpha[t:bottom, left:right] = _compose(box, preds, coarse, size, overlap)
+
+        cutoff = min(pending[0] if pending else next_top, next_top)
+        for box in [box for box in preds if box[3] <= cutoff]:
+            del preds[box]
+
+    return alpha
+
+
+def refine_if_large(session: Any, img: Image.Image, spec: ModelSpec, mask: np.ndarray) -> np.ndarray:
+    """Return a tiled full-resolution mask for large images, or ``mask`` unchanged."""
+    if not needs_tiling(img):
+        return mask
+    return refine_tiled(session, img, spec, mask)
@@ -0,0 +1,79 @@
+"""Detection of uploads that are already cut out.
+
+Many PNG and WebP uploads are earlier cutouts: a subject on a fully
+transparent background. Running them through the model again costs a full
+inference and can only nibble at their edges, so they are re-encoded in
+the requested format instead. An alpha channel, box-reduced to about
+``SAMPLE_PIXELS`` first, counts as a cutout when:
+
+1. at least ``MIN_COVERAGE`` of the pixels are fully transparent and at
+   least as many fully opaque, so there is both a background and a subject;
+2. at most ``MAX_PARTIAL`` are in between, which rules out translucent
+   overlays, glows and watermarks over the whole image;
+3. at least ``MIN_BORDER`` of the pixels along the middle half of each
+   image edge are transparent, which rules out photos with rounded or
+   clipped corners, whose transparency stays in the corners.
+
+The header is read first, so JPEGs and other inputs without alpha never get
+decoded here. For the rest the check is a histogram and a pass over the
+edges of the reduced alpha, under 20 ms at 12 MP; the decode it needs is
+shared with inference through ``SourceImage``.
+"""
+
+import numpy as np
+from PIL import Image
+
+from ..config import settings
+from .buffers import ImageBuffer, open_buffer
+from .inference import SourceImage, encode_cutout
+
+# Alpha at or below / at or above which a pixel counts as transparent / opaque.
+TRANSPARENT_MAX = 8
+OPAQUE_MIN = 247
+MIN_COVERAGE = 0.05
+MAX_PARTIAL = 0.2
+MIN_BORDER = 0.5
+# The alpha channel is box-reduced to about this many pixels before it is measured.
+SAMPLE_PIXELS = 1_000_000
+
+
+def has_alpha(data: ImageBuffer) -> bool:
+    """True for still images with an alpha channel or a transparent palette entry (reads the header only)."""
+    try:
+        with Image.open(open_buffer(data)) as img:
+            if getattr(img, "is_animated", False):
+                return False
+            return img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    except Exception:
+        return False
+
+
+def is_cutout(img: Image.Image) -> bool:
+    """True if a decoded image's alpha channel already separates a subject from the background."""
+    if img.mode != "RGBA":
+        return False
+    factor = max(1, int((img.width * img.height / SAMPLE_PIXELS) ** 0.5))
+    alpha = img.getchannel("A").reduce(factor)
+    counts = np.asarray(alpha.histogram(), dtype=np.int64)
+    total = alpha.width * alpha.height
+    transparent = counts[: TRANSPARENT_MAX + 1].sum() / total
+    opaque = counts[OPAQUE_MIN:].sum() / total
+    if transparent < MIN_COVERAGE or opaque < MIN_COVERAGE or 1.0 - transparent - opaque > MAX_PARTIAL:
+        return False
+
+    a = np.asarray(alpha)
+    h, w = a.shape
+    rows, cols = slice(h // 4, h - h // 4), slice(w // 4, w - w // 4)
+    border = np.concatenate((a[0, cols], a[-1, cols], a[rows, 0], a[rows, -1]))
+    return bool((border <= TRANSPARENT_MAX).mean() >= MIN_BORDER)
+
+
+def reuse_existing_cutout(source: SourceImage, output_format: str) -> bytes | None:
+    """The upload re-encoded in ``output_format`` if it is already a cutout, otherwise None."""
+    if not settings.skip_existing_cutouts or not has_alpha(source.data):
+        return None
+    img = source.full()
+    if not is_cutout(img):
+        return None
+    # The image's own alpha is multiplied into the mask, so an opaque mask keeps it as it is.
+    return encode_cutout(img, np.full((img.height, img.width), 255, dtype=np.uint8), output_format)
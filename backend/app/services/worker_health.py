@@ -0,0 +1,151 @@
+"""Worker readiness heartbeats.
+
+Each Huey consumer process keeps a row in ``worker_heartbeats``: it is
+written as ``warming`` when the consumer starts, switched to ``ready`` once
+the configured sessions are loaded and warmed, and refreshed every
+``settings.worker_heartbeat_seconds`` by a daemon thread, together with
+the process's resident memory, loaded sessions and pipeline stage
+utilization. The API reads the
+table for ``/health/workers``; a row that has not been refreshed for three
+intervals belongs to a worker that is gone or wedged and is not counted.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from enum import StrEnum
+
+from ..config import settings
+from ..db.database import get_connection
+from .sessions import session_cache
+
+logger = logging.getLogger(__name__)
+
+# Heartbeats older than this many intervals are reported as stale.
+STALE_AFTER_INTERVALS = 3
+
+
+class WorkerState(StrEnum):
+    WARMING = "warming"
+    READY = "ready"
+    DEGRADED = "degraded"  # warm-up failed; models load on the first task instead
+
+
+class WorkerRegistry:
+    """Heartbeat writer for this process and reader for all workers."""
+
+    def __init__(self, interval_seconds: int) -> None:
+        self.interval_seconds = max(1, interval_seconds)
+        self._state = WorkerState.WARMING
+        self._models: list[str] = []
+        self._started_at = ""
+        self._pipeline_stats: Callable[[], dict] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def worker_id(self) -> str:
+        # Read the pid on every call: Huey process workers fork after this module is imported.
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self, models: list[str], pipeline_stats: Callable[[], dict] | None = None) -> None:
+        """Record this worker as warming up and start the heartbeat thread."""
+        self._state = WorkerState.WARMING
+        self._models = list(models)
+        self._pipeline_stats = pipeline_stats
+        self._started_at = datetime.utcnow().isoformat()
+        self._forget_stale()
+        self.beat()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="worker-heartbeat", daemon=True)
+            self._thread.start()
+
+    def set_state(self, state: WorkerState) -> None:
+        self._state = state
+        self.beat()
+
+    def stop(self) -> None:
+        """Stop the heartbeat thread and remove this worker's row."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds)
+            self._thread = None
+        with get_connection() as conn:
+            conn.execute("DELETE FROM worker_heartbeats WHERE worker_id = ?", (self.worker_id,))
+            conn.commit()
+
+    def beat(self) -> None:
+        """Write this worker's current state with a fresh timestamp."""
+        with get_connection() as conn:
+            conn.execute(
+                """INSERT INTO worker_heartbeats
+                       (worker_id, hostname, pid, status, models, sessions, pipeline, started_at, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(worker_id) DO UPDATE SET
+                       status = excluded.status, models = excluded.models, sessions = excluded.sessions,
+                       pipeline = excluded.pipeline, last_seen = excluded.last_seen""",
+                (
+                    self.worker_id,
+                    socket.gethostname(),
+                    os.getpid(),
+                    self._state.value,
+                    json.dumps(self._models),
+                    json.dumps(session_cache.stats()),
+                    json.dumps(self._pipeline_stats() if self._pipeline_stats else {}),
+                    self._started_at or datetime.utcnow().isoformat(),
+                    datetime.utcnow().isoformat(),
+                ),
+            )
+            conn.commit()
+
+    def workers(self, hostname: str | None = None) -> list[dict]:
+        """All recorded workers (optionally on one host), with a ``ready`` flag for fresh ready rows."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.interval_seconds * STALE_AFTER_INTERVALS)
+        query = "SELECT * FROM worker_heartbeats"
+        params: tuple = ()
+        if hostname is not None:
+            query += " WHERE hostname = ?"
+            params = (hostname,)
+        with get_connection() as conn:
+            rows = conn.execute(query + " ORDER BY started_at", params).fetchall()
+
+        workers = []
+        for row in rows:
+            stale = datetime.fromisoformat(row["last_seen"]) < cutoff
+            workers.append(
+                {
+                    "worker_id": row["worker_id"],
+                    "status": row["status"],
+                    "models": json.loads(row["models"]),
+                    "sessions": json.loads(row["sessions"]),
+                    "pipeline": json.loads(row["pipeline"]),
+                    "started_at": row["started_at"],
+                    "last_seen": row["last_seen"],
+                    "stale": stale,
+                    "ready": row["status"] == WorkerState.READY and not stale,
+                }
+            )
+        return workers
+
+    def _forget_stale(self) -> None:
+        """Drop stale rows left on this host by workers that exited without stopping (e.g. a container restart)."""
+        stale_ids = [w["worker_id"] for w in self.workers(socket.gethostname()) if w["stale"]]
+        with get_connection() as conn:
+            conn.executemany("DELETE FROM worker_heartbeats WHERE worker_id = ?", [(i,) for i in stale_ids])
+            conn.commit()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.beat()
+            except Exception as e:  # a locked database must not kill the heartbeat
+                logger.warning("Worker heartbeat failed: %s", e)
+
+
+# Singleton instance; only Huey consumer processes call start().
+worker_registry = WorkerRegistry(settings.worker_heartbeat_seconds)
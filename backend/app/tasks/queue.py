@@ -1,9 +1,50 @@
 """Huey task queue backed by SQLite."""
 
+import threading
+
 from huey import SqliteHuey
+from huey.storage import SqliteStorage
 
 from ..config import settings
 
+
+class FairSqliteStorage(SqliteStorage):
+    """SQLite task storage that serves by priority but never starves low-priority tasks.
+
+    Tasks are enqueued with the priority of the uploader's tier (see
+    ``services.scheduling``) and normally dequeued highest priority first.
+    Every ``fifo_every``-th task handed out is the oldest one instead,
+    whatever its priority, so free-tier work keeps at least that share of
+    the workers while paid traffic is queued. 0 serves by priority only.
+    """
+
+    def __init__(self, *args: object, fifo_every: int = 0, **kwargs: object) -> None:
+        self.fifo_every = fifo_every
+        self._served = 0
+        self._served_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def dequeue(self) -> bytes | None:
+        with self._served_lock:
+            oldest_turn = self.fifo_every > 0 and self._served % self.fifo_every == self.fifo_every - 1
+        data = self._dequeue_oldest() if oldest_turn else super().dequeue()
+        if data is not None:
+            with self._served_lock:
+                self._served += 1
+        return data
+
+    def _dequeue_oldest(self) -> bytes | None:
+        with self.db(commit=True) as curs:
+            curs.execute("select id, data from task where queue = ? order by id limit 1", (self.name,))
+            result = curs.fetchone()
+            if result is not None:
+                tid, data = result
+                curs.execute("delete from task where id = ?", (tid,))
+                if curs.rowcount == 1:
+                    return data  # type: ignore[no-any-return]
+        return None
+
+
 _db_path = settings.upload_dir / "huey.db"
 _db_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -11,6 +52,8 @@ huey = SqliteHuey(
     "clearcut",
     filename=str(_db_path),
     immediate=False,  # Set True in tests to run tasks synchronously
+    storage_class=FairSqliteStorage,
+    fifo_every=settings.queue_fifo_every,
 )
 
 # Import worker module so tasks are registered when the consumer loads this module.
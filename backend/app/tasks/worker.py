@@ -1,72 +1,643 @@
 """Background task definitions for Huey worker."""
 
-import asyncio
+import io
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from dataclasses import dataclass, field
 from typing import Any
 
+import numpy as np
+from huey.exceptions import RetryTask
+from PIL import Image, ImageDraw
+
+from ..config import settings
+from ..db.database import init_db
+from ..models.api_key import tier_default_models
 from ..models.schemas import JobStatus
+from ..services.admission import pixel_budget
+from ..services.animation import is_animated, output_format_for, remove_background_animated
+from ..services.batcher import MicroBatcher
+from ..services.buffers import ImageBuffer
+from ..services.encoding import OutputFormat
+from ..services.engine import inference_engine
+from ..services.inference import SourceImage, encode_cutout, get_model_spec, predict_masks, preprocess
 from ..services.job_manager import job_manager
+from ..services.pipeline import Stage, StagedPipeline
+from ..services.quarantine import (
+    PipelineBusyError,
+    ProcessingTimeoutError,
+    StorageUnavailableError,
+    backoff_delay,
+    is_transient,
+    quarantine_image,
+)
+from ..services.result_cache import cache_key, result_cache
+from ..services.scheduling import job_priority
+from ..services.sessions import session_cache
 from ..services.storage.local import storage
+from ..services.tiling import needs_tiling, refine_if_large, refine_tiled
+from ..services.transparency import reuse_existing_cutout
+from ..services.worker_health import WorkerState, worker_registry
 from .queue import huey
 
-# Lazy-loaded rembg session (heavy import, only load in worker process)
-_rembg_session: Any = None
+logger = logging.getLogger(__name__)
+
+
+def _get_session(model_name: str) -> Any:
+    """Loaded session for a model (heavy import, only loaded in the worker process)."""
+    return session_cache.get(model_name)
+
 
+# Shared across worker threads; scheduler threads start on first use.
+micro_batcher = MicroBatcher(
+    lambda model_name: _get_session(model_name), settings.microbatch_max_size, settings.microbatch_max_wait_ms
+)
 
-def _get_session() -> Any:
-    global _rembg_session
-    if _rembg_session is None:
-        from rembg import new_session
 
-        _rembg_session = new_session("birefnet-general")
-    return _rembg_session
+def _remove_background(source: SourceImage, model_name: str, output_format: str, refine_edges: bool = False) -> bytes:
+    """Remove the background from one image.
+
+    Uses the process-pool engine when configured, otherwise the in-thread
+    micro-batcher or a direct session call. Animations batch their own
+    frames and bypass the micro-batcher.
+    """
+    if inference_engine.enabled:
+        return inference_engine.process(source.data, model_name, output_format, refine_edges)
+
+    spec = get_model_spec(model_name)
+    if is_animated(source.data):
+        return remove_background_animated(_get_session(model_name), source.data, spec, refine_edges)
 
+    small = source.for_inference(spec)
+    if settings.microbatch_enabled:
+        mask = micro_batcher.predict(small, model_name)
+    else:
+        mask = predict_masks(_get_session(model_name), [small], spec, 1)[0]
+    del small
 
-def _run_async(coro: Any) -> Any:
-    """Run an async coroutine from sync Huey worker context."""
-    loop = asyncio.new_event_loop()
+    img = source.full()
+    if needs_tiling(img):
+        mask = refine_tiled(_get_session(model_name), img, spec, mask)
+    return encode_cutout(img, mask, output_format, refine_edges)
+
+
+def _warmup_image() -> bytes:
+    """A synthetic JPEG with a foreground shape, so warm-up runs the real decode and encode paths."""
+    img = Image.new("RGB", (1280, 960), color=(230, 230, 230))
+    ImageDraw.Draw(img).ellipse((240, 180, 1040, 780), fill=(50, 100, 160))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def warm_up(model_names: list[str]) -> None:
+    """Load each model's session and run synthetic images through it.
+
+    The first run of a fresh ONNX session allocates its buffers and takes
+    several times longer than the next, so this runs a single image the way
+    single uploads do and, without the engine, a full inference batch the
+    way batch jobs do.
+    """
+    data = _warmup_image()
+    for model_name in model_names:
+        started = time.perf_counter()
+        if inference_engine.enabled:
+            inference_engine.warm_up(data, model_name, settings.output_format)
+        else:
+            _remove_background(SourceImage(data), model_name, settings.output_format)
+            if settings.inference_batch_size > 1:
+                spec = get_model_spec(model_name)
+                small = SourceImage(data).for_inference(spec)
+                batch = [small] * settings.inference_batch_size
+                predict_masks(_get_session(model_name), batch, spec, settings.inference_batch_size)
+        logger.info("Warmed up %s in %.1fs", model_name, time.perf_counter() - started)
+
+
+_startup_lock = threading.Lock()
+_active_threads = 0
+_warmed = False
+
+
+@huey.on_startup()
+def start_worker() -> None:
+    """Consumer start-up hook: register the heartbeat and warm up before taking tasks.
+
+    Huey calls this in every worker thread before its first task. The first
+    thread warms up while the others wait on the lock, so no thread picks
+    up a task until the sessions are loaded.
+    """
+    global _active_threads, _warmed
+    with _startup_lock:
+        _active_threads += 1
+        if _warmed:
+            return
+        models = settings.warmup_models or tier_default_models()
+        init_db()
+        worker_registry.start(models, _pipeline_stats)
+        try:
+            warm_up(models)
+            worker_registry.set_state(WorkerState.READY)
+        except Exception:
+            logger.exception("Worker warm-up failed; models will load on first use")
+            worker_registry.set_state(WorkerState.DEGRADED)
+        _warmed = True
+
+
+@huey.on_shutdown()
+def stop_worker() -> None:
+    """Consumer shutdown hook: remove the heartbeat once the last worker thread stops."""
+    global _active_threads, _warmed
+    with _startup_lock:
+        _active_threads = max(0, _active_threads - 1)
+        if _active_threads == 0 and _warmed:
+            worker_registry.stop()
+            _warmed = False
+
+
+def _read_original(path: str) -> ImageBuffer:
+    """An upload's content, memory-mapped on local storage. A failed read may be retried; a missing file will not."""
     try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
+        data = storage.map_file(path)
+    except Exception as e:
+        raise StorageUnavailableError(f"Could not read the original: {e}") from e
+    if not data:
+        raise ValueError("Original image not found")
+    return data
 
 
-@huey.task()
-def process_image_task(job_id: str, image_id: str, original_path: str, original_filename: str) -> str:
-    """Process a single image: remove background and save result.
+def _save_result(data: bytes, filename: str, job_id: str, output_format: str) -> str:
+    try:
+        return storage.write_processed(data, filename, job_id, output_format)
+    except Exception as e:
+        raise StorageUnavailableError(f"Could not save the result: {e}") from e
+
+
+@dataclass
+class _ImageWork:
+    """One image on its way through the pipeline; each stage fills in the next fields."""
+
+    job_id: str
+    image: dict  # image_id, original_path, filename
+    model_name: str
+    output_format: str
+    refine_edges: bool
+    data: ImageBuffer = b""
+    source: SourceImage | None = None  # None for animations and existing cutouts
+    model_input: np.ndarray | None = None
+    mask: np.ndarray | None = None
+    result: bytes | None = None
+    inference_skipped: bool = False
+    processed_path: str = ""
+    # Set when the image reaches the infer stage, or leaves the pipeline without doing so.
+    reached_infer: threading.Event = field(default_factory=threading.Event)
+    infer_started: float = 0.0
+    cancelled: bool = False  # the task gave up on the image; stages skip it
+
+
+def _check_cancelled(work: _ImageWork) -> None:
+    """Fail an image its task gave up on before a stage spends work on it (the retry processes it again)."""
+    if work.cancelled:
+        raise CancelledError(f"Gave up on image {work.image['image_id']}")
+
+
+def _read_and_decode(work: _ImageWork) -> _ImageWork:
+    """Pipeline stage: read the original, decode it at inference size and build the model input."""
+    _check_cancelled(work)
+    data = _read_original(work.image["original_path"])
+    work.data = data
+    if is_animated(data):
+        return work  # the encode stage batches the frames itself
+    source = SourceImage(data)
+    work.result = reuse_existing_cutout(source, work.output_format)
+    if work.result is not None:
+        work.inference_skipped = True
+        return work
+    work.source = source
+    spec = get_model_spec(work.model_name)
+    work.model_input = preprocess(source.for_inference(spec), spec)
+    return work
+
+
+def _infer(batch: list[_ImageWork]) -> list[_ImageWork | Exception]:
+    """Pipeline stage: one session call per model for the images that need a mask."""
+    started = time.monotonic()
+    for work in batch:
+        work.infer_started = started
+        work.reached_infer.set()
+    results: list[_ImageWork | Exception] = list(batch)
+    by_model: dict[str, list[int]] = {}
+    for i, work in enumerate(batch):
+        if work.cancelled:
+            work.model_input = None
+            results[i] = CancelledError(f"Gave up on image {work.image['image_id']}")
+        elif work.model_input is not None:
+            by_model.setdefault(work.model_name, []).append(i)
+    for model_name, indices in by_model.items():
+        try:
+            spec = get_model_spec(model_name)
+            inputs = [batch[i].model_input for i in indices]
+            masks = predict_masks(_get_session(model_name), inputs, spec, len(inputs))  # type: ignore[arg-type]
+        except Exception as e:
+            for i in indices:
+                results[i] = e
+            continue
+        for i, mask in zip(indices, masks, strict=True):
+            batch[i].mask, batch[i].model_input = mask, None
+    return results
+
+
+def _encode_and_save(work: _ImageWork) -> _ImageWork:
+    """Pipeline stage: apply the mask at full size, encode, cache and write the result."""
+    _check_cancelled(work)
+    if work.result is None:
+        spec = get_model_spec(work.model_name)
+        # The session is only needed for animations and tiling; loading it otherwise could evict the infer stage's.
+        if work.source is None:
+            work.result = remove_background_animated(_get_session(work.model_name), work.data, spec, work.refine_edges)
+        else:
+            full = work.source.full()
+            alpha = work.mask
+            if needs_tiling(full):
+                alpha = refine_tiled(_get_session(work.model_name), full, spec, alpha)  # type: ignore[arg-type]
+            work.result = encode_cutout(full, alpha, work.output_format, work.refine_edges)  # type: ignore[arg-type]
+            work.source = work.mask = None
+    key = cache_key(work.data, work.model_name, format=work.output_format, refine_edges=work.refine_edges)
+    result_cache.put(key, work.result)
+    work.processed_path = _save_result(
+        work.result, work.image["filename"], work.job_id, output_format_for(work.data, work.output_format)
+    )
+    work.data = work.result = b""
+    return work
+
+
+# Shared by all worker threads; stage threads start on first use.
+image_pipeline = StagedPipeline(
+    [
+        Stage("decode", _read_and_decode, threads=settings.pipeline_decode_threads),
+        Stage(
+            "infer",
+            _infer,
+            threads=settings.pipeline_infer_threads,
+            batch_size=settings.inference_batch_size,
+            max_wait=settings.microbatch_max_wait_ms / 1000,
+        ),
+        Stage("encode", _encode_and_save, threads=settings.pipeline_encode_threads),
+    ],
+    settings.pipeline_queue_size,
+)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=image_pipeline._reset)
+
+
+def _pipeline_stats() -> dict:
+    """Stage utilization, pixel-budget admission and micro-batching, reported with the worker heartbeat."""
+    return {**image_pipeline.stats(), "admission": pixel_budget.stats(), "microbatch": micro_batcher.stats()}
+
+
+def _use_pipeline() -> bool:
+    return settings.pipeline_enabled and not inference_engine.enabled
+
+
+def _declared_pixels(pixels: int) -> int:
+    """Pixel count a task reserves; tasks queued without one are assumed to be as large as allowed."""
+    return pixels if pixels > 0 else settings.max_resolution
+
+
+def _queue_deadline() -> float | None:
+    """Monotonic time by which an image queued now must reach the infer stage, or None for no limit."""
+    return time.monotonic() + settings.pipeline_queue_timeout if settings.pipeline_queue_timeout > 0 else None
 
-    Runs synchronously inside the Huey worker process.
+
+def _remaining(deadline: float | None) -> float | None:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _submit_to_pipeline(work: _ImageWork, pixels: int, deadline: float | None) -> Future:
+    """Hand an image to the pipeline once its pixels fit the budget; they are released when it finishes.
+
+    Raises ``PipelineBusyError`` if the budget or the first stage has no room before ``deadline``.
     """
-    from rembg import remove
+    pixels = _declared_pixels(pixels)
+    if not pixel_budget.acquire(pixels, timeout=_remaining(deadline)):
+        raise PipelineBusyError(f"No room in the pixel budget within {settings.pipeline_queue_timeout}s")
+    try:
+        future = image_pipeline.submit(work, timeout=_remaining(deadline))
+    except queue.Full as e:
+        pixel_budget.release(pixels)
+        raise PipelineBusyError(f"Pipeline still full after {settings.pipeline_queue_timeout}s") from e
+    future.add_done_callback(lambda _: work.reached_infer.set())
+    future.add_done_callback(lambda _: pixel_budget.release(pixels))
+    return future
+
+
+def _pipeline_result(work: _ImageWork, future: Future, deadline: float | None) -> _ImageWork:
+    """Wait for an image to leave the pipeline.
 
+    The image has until ``deadline`` to reach the infer stage, or
+    ``PipelineBusyError`` is raised; the time it spends queued behind other
+    images does not count towards ``settings.processing_timeout``, which
+    runs from there. An image given up on is marked ``cancelled``, so the
+    stages it has not reached skip it instead of processing it alongside the
+    retry. A stage thread cannot be interrupted, so an inference already
+    running finishes in the background; only the engine can stop a runaway
+    one.
+    """
+    if not work.reached_infer.wait(_remaining(deadline)):
+        work.cancelled = True
+        raise PipelineBusyError(f"Image did not reach inference within {settings.pipeline_queue_timeout}s")
+    if settings.processing_timeout <= 0 or future.done():
+        return future.result()  # type: ignore[no-any-return]
+    remaining = work.infer_started + settings.processing_timeout - time.monotonic()
     try:
-        job_manager.update_image_status(job_id, image_id, JobStatus.PROCESSING)
+        return future.result(timeout=max(0.0, remaining))  # type: ignore[no-any-return]
+    except TimeoutError as e:
+        work.cancelled = True
+        raise ProcessingTimeoutError(f"Image not processed within {settings.processing_timeout}s") from e
+
 
-        image_data = _run_async(storage.get_file(original_path))
-        if not image_data:
-            raise ValueError("Original image not found")
+def _record_failure(job_id: str, img: dict, model_name: str, e: Exception) -> float | None:
+    """Record a failed attempt at an image. Returns the delay before it is retried, or None if it has failed for good.
 
-        session = _get_session()
-        processed_data: bytes = remove(image_data, session=session)
+    Transient failures are retried until the image has been attempted
+    ``settings.task_max_attempts`` times; it is then quarantined (see
+    ``services.quarantine``). An image that timed out before reaching
+    inference gets its attempt back, up to ``settings.task_max_busy_retries``
+    times. Other failures fail the image at once.
+    """
+    image_id = img["image_id"]
+    if isinstance(e, PipelineBusyError) and job_manager.refund_attempt(image_id, settings.task_max_busy_retries):
+        delay = backoff_delay(job_manager.get_attempts(image_id))
+        logger.warning("Image %s waited too long for the pipeline; retrying in %.0fs", image_id, delay)
+        job_manager.update_image_status(job_id, image_id, JobStatus.PENDING)
+        return delay
+    # 0 for failures that are not transient, and for images whose job has been deleted.
+    attempts = job_manager.get_attempts(image_id) if is_transient(e) else 0
+    error = str(e)
+    if 0 < attempts < settings.task_max_attempts:
+        delay = backoff_delay(attempts)
+        logger.warning("Attempt %d at image %s failed (%s); retrying in %.0fs", attempts, image_id, e, delay)
+        job_manager.update_image_status(job_id, image_id, JobStatus.PENDING)
+        return delay
+    if attempts:
+        quarantine_image(job_id, img, model_name, attempts, e)
+        logger.error("Quarantined image %s after %d attempts: %s", image_id, attempts, e)
+        error = f"Failed {attempts} times, last with: {e}"
+    job_manager.update_image_status(job_id, image_id, JobStatus.FAILED, error=error)
+    return None
 
-        processed_path: str = _run_async(storage.save_processed(processed_data, original_filename, job_id))
+
+@huey.task()
+def process_image_task(
+    job_id: str,
+    image_id: str,
+    original_path: str,
+    original_filename: str,
+    model: str | None = None,
+    output_format: str = "png",
+    refine_edges: bool = False,
+    pixels: int = 0,
+) -> str:
+    """Process a single image: remove background and save result.
+
+    Runs synchronously inside the Huey worker process, through the staged
+    pipeline unless it is disabled or the engine is in use, once the
+    image's ``pixels`` fit in the process's pixel budget. An image that
+    times out or hits a transient error is retried with backoff (see
+    ``_record_failure``).
+    """
+    model_name = model or settings.default_model
+    image = {"image_id": image_id, "original_path": original_path, "filename": original_filename, "pixels": pixels}
+    try:
+        job_manager.update_image_status(job_id, image_id, JobStatus.PROCESSING)
+
+        processed_path: str
+        if _use_pipeline():
+            deadline = _queue_deadline()
+            work = _ImageWork(job_id, image, model_name, output_format, refine_edges)
+            work = _pipeline_result(work, _submit_to_pipeline(work, pixels, deadline), deadline)
+            processed_path, inference_skipped = work.processed_path, work.inference_skipped
+        else:
+            with pixel_budget.reserve(_declared_pixels(pixels)):
+                processed_path, inference_skipped = _process_in_thread(
+                    job_id, original_path, original_filename, model_name, output_format, refine_edges
+                )
 
         download_url = f"/api/v1/download/{job_id}/{image_id}"
-        job_manager.update_image_status(job_id, image_id, JobStatus.COMPLETED, download_url=download_url)
+        job_manager.update_image_status(
+            job_id, image_id, JobStatus.COMPLETED, download_url=download_url, inference_skipped=inference_skipped
+        )
 
         return processed_path
 
     except Exception as e:
-        job_manager.update_image_status(job_id, image_id, JobStatus.FAILED, error=str(e))
+        delay = _record_failure(job_id, image, model_name, e)
+        if delay is not None:
+            raise RetryTask(str(e), delay=delay) from e
         raise
 
 
+def _process_in_thread(
+    job_id: str, original_path: str, original_filename: str, model_name: str, output_format: str, refine_edges: bool
+) -> tuple[str, bool]:
+    """Read, process and save one image on the calling thread. Returns the saved path and whether inference was skipped."""
+    image_data = _read_original(original_path)
+
+    source = SourceImage(image_data)
+    processed_data = reuse_existing_cutout(source, output_format)
+    inference_skipped = processed_data is not None
+    if processed_data is None:
+        processed_data = _remove_background(source, model_name, output_format, refine_edges)
+    del source
+    key = cache_key(image_data, model_name, format=output_format, refine_edges=refine_edges)
+    result_cache.put(key, processed_data)
+
+    processed_path = _save_result(
+        processed_data, original_filename, job_id, output_format_for(image_data, output_format)
+    )
+    return processed_path, inference_skipped
+
+
 @huey.task()
-def process_batch_task(job_id: str, images: list[dict]) -> None:
-    """Process all images in a batch sequentially inside the worker."""
+def process_batch_task(
+    job_id: str, images: list[dict], model: str | None = None, output_format: str = "png", refine_edges: bool = False
+) -> None:
+    """Process all images in a batch with batched inference inside the worker.
+
+    With the pipeline enabled the images are handed to it and overlap with
+    each other and with other tasks. Otherwise images are decoded up front
+    at inference size, run through the session in chunks of
+    ``settings.inference_batch_size``, then decoded at full size, cut out and
+    saved one by one. Uploads that are already cutouts are re-encoded as they
+    are loaded and never reach the session. Animations are processed after
+    them, each batching its own frames. Either way an image's full-size work
+    starts only once its pixels fit the pixel budget. A decode or save
+    failure only fails that image, and an image that times out or hits a
+    transient error is retried on its own as a single-image task.
+    """
+    model_name = model or settings.default_model
+    if inference_engine.enabled:
+        _process_batch_with_engine(job_id, images, model_name, output_format, refine_edges)
+        return
+    if settings.pipeline_enabled:
+        _process_batch_with_pipeline(job_id, images, model_name, output_format, refine_edges)
+        return
+
+    spec = get_model_spec(model_name)
+    loaded: list[tuple[dict, str, SourceImage]] = []
+    animations: list[tuple[dict, str, ImageBuffer]] = []
+    small: list[Image.Image] = []
     for img in images:
-        process_image_task.call_local(
-            job_id=job_id,
-            image_id=img["image_id"],
-            original_path=img["original_path"],
-            original_filename=img["filename"],
-        )
+        job_manager.update_image_status(job_id, img["image_id"], JobStatus.PROCESSING)
+        try:
+            image_data = _read_original(img["original_path"])
+            key = cache_key(image_data, model_name, format=output_format, refine_edges=refine_edges)
+            if is_animated(image_data):
+                animations.append((img, key, image_data))
+                continue
+            source = SourceImage(image_data)
+            existing = reuse_existing_cutout(source, output_format)
+            if existing is not None:
+                _complete_image(job_id, img, key, existing, output_format, inference_skipped=True)
+                continue
+            small.append(source.for_inference(spec))
+            loaded.append((img, key, source))
+        except Exception as e:
+            _fail_batch_image(job_id, img, model_name, output_format, refine_edges, e)
+
+    if not loaded and not animations:
+        return
+
+    session = _get_session(model_name)
+    try:
+        masks = predict_masks(session, small, spec, settings.inference_batch_size)
+    except Exception as e:
+        # Nothing else in this chunk will run; no image may be left in processing.
+        for img, _, _ in [*loaded, *animations]:
+            _fail_batch_image(job_id, img, model_name, output_format, refine_edges, e)
+        raise
+    del small
+
+    # Popped one by one so each full-size decode is freed once its image is saved.
+    pending = deque(zip(loaded, masks, strict=True))
+    del loaded, masks
+    while pending:
+        (img, key, source), mask = pending.popleft()
+        try:
+            with pixel_budget.reserve(_declared_pixels(img.get("pixels", 0))):
+                full = source.full()
+                alpha = refine_if_large(session, full, spec, mask)
+                processed_data = encode_cutout(full, alpha, output_format, refine_edges)
+                del full, source, mask
+            _complete_image(job_id, img, key, processed_data, output_format)
+        except Exception as e:
+            _fail_batch_image(job_id, img, model_name, output_format, refine_edges, e)
+
+    for img, key, image_data in animations:
+        try:
+            with pixel_budget.reserve(_declared_pixels(img.get("pixels", 0))):
+                processed_data = remove_background_animated(session, image_data, spec, refine_edges)
+            _complete_image(job_id, img, key, processed_data, OutputFormat.WEBP)
+        except Exception as e:
+            _fail_batch_image(job_id, img, model_name, output_format, refine_edges, e)
+
+
+def _complete_image(
+    job_id: str, img: dict, key: str, processed_data: bytes, output_format: str, inference_skipped: bool = False
+) -> None:
+    """Cache and save one batch result and mark the image completed."""
+    result_cache.put(key, processed_data)
+    _save_result(processed_data, img["filename"], job_id, output_format)
+    download_url = f"/api/v1/download/{job_id}/{img['image_id']}"
+    job_manager.update_image_status(
+        job_id, img["image_id"], JobStatus.COMPLETED, download_url=download_url, inference_skipped=inference_skipped
+    )
+
+
+def _fail_batch_image(
+    job_id: str, img: dict, model_name: str, output_format: str, refine_edges: bool, e: Exception
+) -> None:
+    """Fail one image of a batch, or queue a single-image task to retry it after the backoff."""
+    delay = _record_failure(job_id, img, model_name, e)
+    if delay is None:
+        return
+    process_image_task.schedule(
+        args=(
+            job_id,
+            img["image_id"],
+            img["original_path"],
+            img["filename"],
+            model_name,
+            output_format,
+            refine_edges,
+            img.get("pixels", 0),
+        ),
+        delay=delay,
+        priority=job_priority(job_id),
+    )
+
+
+def _process_batch_with_pipeline(
+    job_id: str, images: list[dict], model_name: str, output_format: str, refine_edges: bool
+) -> None:
+    """Submit every image to the pipeline as its pixels fit the budget, then record each result."""
+    submitted = []
+    for img in images:
+        job_manager.update_image_status(job_id, img["image_id"], JobStatus.PROCESSING)
+        work = _ImageWork(job_id, img, model_name, output_format, refine_edges)
+        deadline = _queue_deadline()
+        try:
+            submitted.append((img, work, _submit_to_pipeline(work, img.get("pixels", 0), deadline), deadline))
+        except PipelineBusyError as e:
+            _fail_batch_image(job_id, img, model_name, output_format, refine_edges, e)
+
+    for img, work, future, deadline in submitted:
+        try:
+            work = _pipeline_result(work, future, deadline)
+            download_url = f"/api/v1/download/{job_id}/{img['image_id']}"
+            job_manager.update_image_status(
+                job_id,
+                img["image_id"],
+                JobStatus.COMPLETED,
+                download_url=download_url,
+                inference_skipped=work.inference_skipped,
+            )
+        except Exception as e:
+            _fail_batch_image(job_id, img, model_name, output_format, refine_edges, e)
+
+
+def _process_batch_with_engine(
+    job_id: str, images: list[dict], model_name: str, output_format: str, refine_edges: bool
+) -> None:
+    """Fan a batch out across the engine processes, one image per process at a time.
+
+    Uploads that are already cutouts are re-encoded here instead.
+    """
+    pending: list[tuple[dict, ImageBuffer]] = []
+    for img in images:
+        job_manager.update_image_status(job_id, img["image_id"], JobStatus.PROCESSING)
+        try:
+            image_data = _read_original(img["original_path"])
+            existing = reuse_existing_cutout(SourceImage(image_data), output_format)
+            if existing is not None:
+                key = cache_key(image_data, model_name, format=output_format, refine_edges=refine_edges)
+                _complete_image(job_id, img, key, existing, output_format, inference_skipped=True)
+                continue
+        except Exception as e:
+            _fail_batch_image(job_id, img, model_name, output_format, refine_edges, e)
+            continue
+        pending.append((img, image_data))
+
+    results = inference_engine.process_many([data for _, data in pending], model_name, output_format, refine_edges)
+    for (img, image_data), result in zip(pending, results, strict=True):
+        try:
+            if isinstance(result, Exception):
+                raise result
+            key = cache_key(image_data, model_name, format=output_format, refine_edges=refine_edges)
+            _complete_image(job_id, img, key, result, output_format_for(image_data, output_format))
+        except Exception as e:
+            _fail_batch_image(job_id, img, model_name, output_format, refine_edges, e)
@@ -0,0 +1,56 @@
+"""A long-lived event loop for running coroutines from synchronous worker code.
+
+Huey tasks run on plain threads. A coroutine called from one used to get
+an event loop of its own, created and closed around every call, which costs
+more than the file I/O behind the storage calls it was used for. The worker
+now uses the storage backends' synchronous methods instead. What must stay
+async runs here: ``run_sync`` submits the coroutine to one loop kept running
+on a daemon thread and blocks until it finishes.
+
+The loop runs coroutines one at a time between their awaits, so a coroutine
+that blocks, such as an ``async def`` wrapped around a blocking client call,
+holds up every other caller. Such work should have a synchronous method.
+"""
+
+import asyncio
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """An event loop on a daemon thread, started on first use."""
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget the loop (also run in forked children, which do not inherit its thread)."""
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the loop and return its result; must not be called from the loop itself."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="background-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+
+# Singleton instance, shared by every thread in a process.
+background_loop = BackgroundLoop()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=background_loop._reset)
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine from synchronous code on the process's background loop."""
+    return background_loop.run(coro)
@@ -1,13 +1,21 @@
-from io import BytesIO
+import os
 
 from fastapi import HTTPException, UploadFile
 from PIL import Image
 
 from ..config import settings
+from ..models.api_key import TIER_LIMITS, ApiKey, Tier
+from ..services.buffers import ImageBuffer, map_file_object, open_buffer
+from ..services.inference import available_models
 
 
-async def validate_image(file: UploadFile) -> bytes:
-    """Validate an uploaded image file."""
+async def validate_image(file: UploadFile) -> ImageBuffer:
+    """Validate an uploaded image file and return its content.
+
+    The content is mapped from the file Starlette spooled the upload to
+    (``map_file_object``), and only the image header is decoded, so the
+    upload is not read into memory.
+    """
 
     # Check content type
     if file.content_type not in settings.allowed_content_types:
@@ -25,19 +33,19 @@ async def validate_image(file: UploadFile) -> bytes:
                 detail=f"Invalid file extension: {ext}. Allowed extensions: {', '.join(settings.allowed_extensions)}",
             )
 
-    # Read file content
-    content = await file.read()
-
     # Check file size
-    if len(content) > settings.max_file_size:
+    size = file.file.seek(0, os.SEEK_END)
+    if size > settings.max_file_size:
         raise HTTPException(
             status_code=400,
-            detail=f"File too large: {len(content)} bytes. Maximum size: {settings.max_file_size} bytes ({settings.max_file_size // (1024 * 1024)}MB)",
+            detail=f"File too large: {size} bytes. Maximum size: {settings.max_file_size} bytes ({settings.max_file_size // (1024 * 1024)}MB)",
         )
 
+    content = map_file_object(file.file)
+
     # Check image dimensions
     try:
-        img = Image.open(BytesIO(content))
+        img = Image.open(open_buffer(content))
         width, height = img.size
         pixels = width * height
 
@@ -46,6 +54,13 @@ async def validate_image(file: UploadFile) -> bytes:
                 status_code=400,
                 detail=f"Image too large: {width}x{height} ({pixels} pixels). Maximum: {settings.max_resolution} pixels",
             )
+
+        frames = getattr(img, "n_frames", 1)
+        if frames > settings.max_animation_frames:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many frames: {frames}. Maximum: {settings.max_animation_frames}",
+            )
     except HTTPException:
         raise
     except Exception as e:
@@ -54,7 +69,7 @@ async def validate_image(file: UploadFile) -> bytes:
     return content
 
 
-async def validate_batch(files: list[UploadFile]) -> list[tuple[UploadFile, bytes]]:
+async def validate_batch(files: list[UploadFile]) -> list[tuple[UploadFile, ImageBuffer]]:
     """Validate a batch of uploaded images."""
 
     if len(files) > settings.max_batch_size:
@@ -71,3 +86,21 @@ async def validate_batch(files: list[UploadFile]) -> list[tuple[UploadFile, byte
         validated.append((file, content))
 
     return validated
+
+
+def validate_model(model: str | None, api_key: ApiKey | None) -> str:
+    """Resolve the model for a request: explicit choice, then tier default, then global default.
+
+    Callers without an API key get the free tier's default.
+    """
+    if model is None:
+        tier = api_key.tier if api_key is not None else Tier.FREE
+        return str(TIER_LIMITS.get(tier, {}).get("default_model", settings.default_model))
+
+    models = available_models()
+    if model not in models:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported model: {model}. Available models: {', '.join(models)}",
+        )
+    return model
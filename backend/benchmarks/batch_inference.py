@@ -0,0 +1,71 @@
+"""
+Per-image latency of batched vs. sequential inference.
+
+Run with:
+    cd backend
+    python -m benchmarks.batch_inference [--model birefnet-general] [--repeats 3]
+
+Compares rembg.remove called once per image (the old process_batch_task path)
+against remove_background_batch with the whole batch passed in one call, for
+batch sizes 1, 4, 8 and 20. Requires the model to be downloaded.
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+BATCH_SIZES = (1, 4, 8, 20)
+
+
+def _make_jpeg(seed: int, width: int = 1200, height: int = 900) -> bytes:
+    """A product-shot-like JPEG: an ellipse on a flat background."""
+    img = Image.new("RGB", (width, height), color=(235, 235, 235))
+    draw = ImageDraw.Draw(img)
+    offset = (seed * 37) % 200
+    draw.ellipse((200 + offset, 150, 900 + offset, 750), fill=(40 + seed % 200, 90, 160))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _time_per_image(fn, images: list[bytes], repeats: int) -> float:
+    """Median wall-clock milliseconds per image over ``repeats`` runs."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(images)
+        samples.append((time.perf_counter() - start) * 1000 / len(images))
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="birefnet-general")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    from rembg import new_session, remove
+
+    from app.services.inference import remove_background_batch
+
+    session = new_session(args.model)
+    # Warm-up so the first measurement does not include graph initialisation.
+    remove_background_batch(session, [_make_jpeg(0)], chunk_size=1)
+
+    print(f"{'batch':>5}  {'sequential ms/img':>18}  {'batched ms/img':>15}  {'speedup':>7}")
+    for size in BATCH_SIZES:
+        images = [_make_jpeg(i) for i in range(size)]
+        sequential = _time_per_image(
+            lambda imgs: [remove(data, session=session) for data in imgs], images, args.repeats
+        )
+        batched = _time_per_image(
+            lambda imgs, n=size: remove_background_batch(session, imgs, chunk_size=n), images, args.repeats
+        )
+        print(f"{size:>5}  {sequential:>18.1f}  {batched:>15.1f}  {sequential / batched:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
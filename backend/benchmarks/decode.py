@@ -0,0 +1,72 @@
+"""
+Time to the model input tensor: full decode vs. reduced-size JPEG decode.
+
+Run with:
+    cd backend
+    python -m benchmarks.decode [--model birefnet-general] [--repeats 5]
+
+For 4:3 JPEGs (quality 90) and lossless WebPs of 4, 12 and 25 MP, compares
+decoding at full resolution then preprocessing (the previous path) with
+``SourceImage.for_inference`` then preprocessing (libjpeg DCT scaling via
+``draft``). The full decode, which still happens once for compositing, is
+listed for reference.
+"""
+
+import argparse
+import io
+import statistics
+import time
+from collections.abc import Callable
+
+import numpy as np
+from PIL import Image
+
+from app.services.inference import SourceImage, decode_image, get_model_spec, preprocess
+
+MEGAPIXELS = (4, 12, 25)
+
+
+def _make_image(megapixels: int, fmt: str) -> bytes:
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = megapixels * 1_000_000 // width
+    rng = np.random.default_rng(0)
+    coarse = (rng.normal(0, 1, (height // 16, width // 16, 3)) * 50 + 128).clip(0, 255).astype(np.uint8)
+    img = Image.fromarray(coarse).resize((width, height), Image.Resampling.BICUBIC)
+    buf = io.BytesIO()
+    if fmt == "JPEG":
+        img.save(buf, format="JPEG", quality=90)
+    else:
+        img.save(buf, format="WEBP", lossless=True, method=0)
+    return buf.getvalue()
+
+
+def _median_ms(fn: Callable[[], object], repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="birefnet-general")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    spec = get_model_spec(args.model)
+    print(f"{'input':<10}  {'full+prep ms':>12}  {'reduced+prep ms':>15}  {'speedup':>7}  {'full decode ms':>14}")
+    for fmt in ("JPEG", "WEBP"):
+        for mp in MEGAPIXELS:
+            data = _make_image(mp, fmt)
+            full = _median_ms(lambda data=data: preprocess(decode_image(data), spec), args.repeats)
+            reduced = _median_ms(
+                lambda data=data: preprocess(SourceImage(data).for_inference(spec), spec), args.repeats
+            )
+            decode = _median_ms(lambda data=data: decode_image(data), args.repeats)
+            print(f"{fmt + f' {mp}MP':<10}  {full:>12.0f}  {reduced:>15.0f}  {full / reduced:>6.1f}x  {decode:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Encode time and size of each output format for a large cutout.
+
+Run with:
+    cd backend
+    python -m benchmarks.encoding [--megapixels 12] [--repeats 3]
+
+Encodes a synthetic photo-like RGBA cutout with PIL's default PNG settings
+(the previous output path) and with every ``OutputFormat`` at the current
+``PNG_COMPRESS_LEVEL``, ``WEBP_METHOD`` and ``JPEG_QUALITY`` settings.
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.services.encoding import OutputFormat, encode_rgba
+
+
+def _make_cutout(megapixels: int) -> np.ndarray:
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = megapixels * 1_000_000 // width
+    rng = np.random.default_rng(0)
+    coarse = (rng.normal(0, 1, (height // 8, width // 8, 3)) * 40 + 128).clip(0, 255).astype(np.uint8)
+    rgb = np.asarray(Image.fromarray(coarse).resize((width, height), Image.Resampling.BICUBIC)).astype(np.int16)
+    rgb = (rgb + rng.integers(-6, 6, rgb.shape)).clip(0, 255).astype(np.uint8)
+    yy, xx = np.mgrid[:height, :width]
+    inside = ((yy - height / 2) / (height / 2.5)) ** 2 + ((xx - width / 2) / (width / 3)) ** 2 < 1
+    alpha = inside.astype(np.uint8) * 255
+    rgba = np.dstack([rgb, alpha])
+    rgba[alpha == 0] = 0
+    return rgba
+
+
+def _default_png(rgba: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(rgba).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megapixels", type=int, default=12)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rgba = _make_cutout(args.megapixels)
+    cases = {"png (PIL default)": _default_png}
+    cases.update({fmt.value: lambda data, fmt=fmt: encode_rgba(data, fmt) for fmt in OutputFormat})
+
+    print(f"{'format':<18}  {'encode s':>8}  {'size MB':>7}")
+    for label, encode in cases.items():
+        samples = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            out = encode(rgba)
+            samples.append(time.perf_counter() - start)
+        print(f"{label:<18}  {statistics.median(samples):>8.2f}  {len(out) / 1e6:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+CPU time and peak memory of rembg.remove vs. our pipeline for large images.
+
+Run with:
+    cd backend
+    python -m benchmarks.large_images [--model birefnet-general] [--repeats 3] [--tiled]
+
+For 1, 4, 12 and 25 MP JPEGs, compares rembg's generic path (full-size
+decode, convert and composite) with app.services.inference.remove_background
+(model-sized inference copy, mask-only upsampling, NumPy compositing), and
+with the same pipeline plus tiled edge refinement (``--tiled``).
+Each case runs in a fresh process so peak RSS is measured in isolation;
+the reported memory is the RSS growth over a warmed-up baseline.
+"""
+
+import argparse
+import io
+import multiprocessing
+import resource
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+MEGAPIXELS = (1, 4, 12, 25)
+
+
+def _make_jpeg(megapixels: int) -> bytes:
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = megapixels * 1_000_000 // width
+    img = Image.new("RGB", (width, height), color=(235, 235, 235))
+    ImageDraw.Draw(img).ellipse((width // 5, height // 5, width * 4 // 5, height * 4 // 5), fill=(40, 90, 160))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_case(path: str, model: str, megapixels: int, repeats: int, results: "multiprocessing.Queue") -> None:
+    from rembg import new_session, remove
+
+    from app.config import settings
+    from app.services.inference import remove_background
+
+    # Untiled paths are measured without refinement, whatever the default threshold.
+    settings.tiled_min_pixels = 1 if path == "tiled" else 0
+
+    session = new_session(model)
+    fn = {
+        "rembg": lambda data: remove(data, session=session),
+        "pipeline": lambda data: remove_background(session, data),
+        "tiled": lambda data: remove_background(session, data),
+    }[path]
+
+    fn(_make_jpeg(1))
+    data = _make_jpeg(megapixels)
+    baseline = _peak_rss_mb()
+
+    samples = []
+    for _ in range(repeats):
+        start = time.process_time()
+        fn(data)
+        samples.append(time.process_time() - start)
+
+    results.put((statistics.median(samples), _peak_rss_mb() - baseline))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="birefnet-general")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tiled", action="store_true", help="also run the pipeline with tiled edge refinement")
+    args = parser.parse_args()
+
+    paths = ("rembg", "pipeline", "tiled") if args.tiled else ("rembg", "pipeline")
+    ctx = multiprocessing.get_context("spawn")
+    print("  ".join([f"{'MP':>3}"] + [f"{p + ' cpu s':>14}" for p in paths] + [f"{p + ' +MB':>12}" for p in paths]))
+    for mp in MEGAPIXELS:
+        row = {}
+        for path in paths:
+            results = ctx.Queue()
+            proc = ctx.Process(target=_run_case, args=(path, args.model, mp, args.repeats, results))
+            proc.start()
+            row[path] = results.get()
+            proc.join()
+        cpu = [f"{row[p][0]:>14.2f}" for p in paths]
+        mem = [f"{row[p][1]:>12.0f}" for p in paths]
+        print("  ".join([f"{mp:>3}"] + cpu + mem))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Batch job wall time with and without the staged worker pipeline.
+
+Run with:
+    cd backend
+    python -m benchmarks.pipeline [--model birefnet-general] [--images 12] [--megapixels 4] [--simulate-ms 0]
+
+Runs process_batch_task in-process on synthetic JPEGs, first with the
+pipeline disabled (decode everything, infer in chunks, then cut out, encode
+and write one image at a time) and then through the pipeline. Prints the
+wall time of each and the pipeline's per-stage utilization. Files, the
+database and the result cache (disabled) live in a temporary directory.
+``--simulate-ms`` swaps the model for a stand-in session that sleeps that
+long per image, for machines without the model downloaded.
+"""
+
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.config import settings
+from app.db.database import init_db, set_db_path
+from app.services.job_manager import job_manager
+from app.services.result_cache import result_cache
+from app.services.storage.local import storage
+from app.tasks import worker
+
+
+def _make_jpeg(seed: int, megapixels: int) -> bytes:
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = megapixels * 1_000_000 // width
+    img = Image.new("RGB", (width, height), color=(235, 235, 235))
+    offset = (seed * 37) % (width // 5)
+    ImageDraw.Draw(img).ellipse(
+        (width // 6 + offset, height // 6, width * 3 // 4 + offset, height * 5 // 6), fill=(40, 90, 160)
+    )
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _simulated_session(ms: float) -> MagicMock:
+    """Session stand-in that sleeps ``ms`` per image (releasing the GIL, like ONNX Runtime) and returns a disc."""
+    disc = np.zeros((1024, 1024), dtype=np.float32)
+    yy, xx = np.ogrid[:1024, :1024]
+    disc[(yy - 512) ** 2 + (xx - 512) ** 2 < 400**2] = 1.0
+
+    def run(_: object, feeds: dict) -> list[np.ndarray]:
+        n = next(iter(feeds.values())).shape[0]
+        time.sleep(ms * n / 1000)
+        return [np.broadcast_to(disc, (n, 1, 1024, 1024)).copy()]
+
+    session = MagicMock()
+    session.inner_session.get_inputs.return_value = [MagicMock(shape=["batch", 3, 1024, 1024])]
+    session.inner_session.run.side_effect = run
+    return session
+
+
+def _run_batch(originals: list[Path]) -> float:
+    job = job_manager.create_job([{"filename": path.name} for path in originals])
+    images = [
+        {"image_id": image_id, "original_path": str(path), "filename": path.name}
+        for image_id, path in zip(job.images, originals, strict=True)
+    ]
+    started = time.perf_counter()
+    worker.process_batch_task.call_local(job.job_id, images)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="birefnet-general")
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--megapixels", type=int, default=4)
+    parser.add_argument("--simulate-ms", type=float, default=0, help="simulated inference time per image")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        storage.original_dir = settings.original_dir = base / "original"
+        storage.processed_dir = settings.processed_dir = base / "processed"
+        settings.original_dir.mkdir()
+        result_cache.configure(base / "cache", max_mb=0)
+        set_db_path(base / "bench.db")
+        init_db()
+
+        originals = []
+        for i in range(args.images):
+            path = settings.original_dir / f"img{i}.jpg"
+            path.write_bytes(_make_jpeg(i, args.megapixels))
+            originals.append(path)
+
+        session = _simulated_session(args.simulate_ms) if args.simulate_ms else worker.session_cache.get(args.model)
+        with patch.object(worker, "_get_session", return_value=session):
+            worker.warm_up([args.model])
+            with patch.object(settings, "pipeline_enabled", False):
+                sequential = _run_batch(originals)
+            pipelined = _run_batch(originals)
+
+    print(f"{args.images} x {args.megapixels} MP JPEGs, inference batch size {settings.inference_batch_size}")
+    print(f"{'sequential':<12}  {sequential:>6.2f} s")
+    print(f"{'pipelined':<12}  {pipelined:>6.2f} s  ({sequential / pipelined:.2f}x)")
+    stats = worker.image_pipeline.stats()
+    print(f"\n{'stage':<8}  {'threads':>7}  {'busy s':>7}  {'utilization':>11}")
+    for stage in stats["stages"]:
+        print(
+            f"{stage['name']:<8}  {stage['threads']:>7}  {stage['busy_seconds']:>7.2f}  {stage['utilization']:>11.0%}"
+        )
+    print(f"bottleneck: {stats['bottleneck']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Per-image storage overhead of a worker task: reading the original and writing the result.
+
+Run with:
+    cd backend
+    python -m benchmarks.storage_io [--kilobytes 500] [--iterations 500]
+
+Times the three ways a worker thread can reach local storage: the async
+methods, each call in a new event loop (how tasks used to call them), the
+async methods on the long-lived background loop, and the synchronous
+methods tasks now use. Files live in a temporary directory, so the numbers
+are mostly page cache; the differences are per-call overhead.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.services.storage.local import LocalStorage
+from app.utils.event_loop import run_sync
+
+
+def _new_loop(coro: Any) -> Any:
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _time(task: Callable[[], None], iterations: int) -> float:
+    """Median microseconds per call over five rounds."""
+    rounds = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            task()
+        rounds.append((time.perf_counter() - started) / iterations * 1e6)
+    return statistics.median(rounds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kilobytes", type=int, default=500, help="size of the original and the result")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = LocalStorage()
+        storage.original_dir = Path(tmp) / "original"
+        storage.processed_dir = Path(tmp) / "processed"
+        original = storage.original_dir / "photo.jpg"
+        original.parent.mkdir(parents=True)
+        data = os.urandom(args.kilobytes * 1024)
+        original.write_bytes(data)
+        path = str(original)
+
+        def per_call_loop() -> None:
+            content = _new_loop(storage.get_file(path))
+            _new_loop(storage.save_processed(content, "photo.jpg", "job"))
+
+        def background_loop() -> None:
+            content = run_sync(storage.get_file(path))
+            assert content is not None
+            run_sync(storage.save_processed(content, "photo.jpg", "job"))
+
+        def synchronous() -> None:
+            content = storage.read_file(path)
+            assert content is not None
+            storage.write_processed(content, "photo.jpg", "job")
+
+        results = [
+            ("new loop per call", _time(per_call_loop, args.iterations)),
+            ("background loop", _time(background_loop, args.iterations)),
+            ("synchronous", _time(synchronous, args.iterations)),
+        ]
+
+    baseline = results[0][1]
+    print(f"read + write of {args.kilobytes} KB, median of 5 x {args.iterations}")
+    for name, micros in results:
+        print(f"{name:<18}  {micros:>8.1f} us/image  ({baseline / micros:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
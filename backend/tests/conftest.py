@@ -1,7 +1,9 @@
 import io
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from httpx import ASGITransport, AsyncClient
 from PIL import Image
@@ -20,6 +22,14 @@ def create_test_image(width: int = 100, height: int = 100, fmt: str = "JPEG") ->
     return buf.read()
 
 
+def create_test_mpo(width: int = 100, height: int = 100) -> bytes:
+    """Create a multi-picture JPEG like a phone camera's: the photo followed by a smaller preview."""
+    img = Image.new("RGB", (width, height), color=(255, 0, 0))
+    buf = io.BytesIO()
+    img.save(buf, format="MPO", save_all=True, append_images=[img.resize((width // 2, height // 2))])
+    return buf.getvalue()
+
+
 def create_test_png(width: int = 100, height: int = 100) -> bytes:
     """Create a minimal test PNG with alpha channel."""
     img = Image.new("RGBA", (width, height), color=(255, 0, 0, 255))
@@ -29,6 +39,35 @@ def create_test_png(width: int = 100, height: int = 100) -> bytes:
     return buf.read()
 
 
+# ---------------------------------------------------------------------------
+# Fake model sessions
+# ---------------------------------------------------------------------------
+
+
+def fake_session(
+    model_name: str = "birefnet-general",
+    input_size: int = 1024,
+    value: float | np.ndarray = 0.0,
+    batch_dim: int | str = "batch",
+) -> MagicMock:
+    """Stand-in for a rembg session whose ONNX run returns the same prediction for every input image.
+
+    ``value`` is a constant for every pixel, or an ``(input_size, input_size)``
+    array. The model input is named ``input``, and ``batch_dim`` is its first
+    dimension (an int for models that only take one image at a time).
+    """
+    prediction = np.broadcast_to(np.asarray(value, dtype=np.float32), (input_size, input_size))
+    session = MagicMock()
+    session.model_name = model_name
+    session.inner_session.get_inputs.return_value = [
+        SimpleNamespace(name="input", shape=[batch_dim, 3, input_size, input_size])
+    ]
+    session.inner_session.run.side_effect = lambda _, feeds: [
+        np.repeat(prediction[np.newaxis, np.newaxis], feeds["input"].shape[0], axis=0)
+    ]
+    return session
+
+
 # ---------------------------------------------------------------------------
 # Fixtures: images
 # ---------------------------------------------------------------------------
@@ -81,14 +120,20 @@ def _patch_settings(tmp_upload_dir: Path):
     """Patch global settings and database to use temp directories."""
     from app.config import settings
     from app.db.database import init_db, reset_db_path, set_db_path
+    from app.services.result_cache import result_cache
+    from app.services.storage.local import storage
 
     orig_upload = settings.upload_dir
     orig_original = settings.original_dir
     orig_processed = settings.processed_dir
+    orig_cache_dir = result_cache.directory
 
     settings.upload_dir = tmp_upload_dir
     settings.original_dir = tmp_upload_dir / "original"
     settings.processed_dir = tmp_upload_dir / "processed"
+    result_cache.configure(tmp_upload_dir / "cache")
+    storage.original_dir = settings.original_dir
+    storage.processed_dir = settings.processed_dir
 
     # Point DB to temp directory
     set_db_path(tmp_upload_dir / "test.db")
@@ -99,8 +144,18 @@ def _patch_settings(tmp_upload_dir: Path):
     settings.upload_dir = orig_upload
     settings.original_dir = orig_original
     settings.processed_dir = orig_processed
+    storage.original_dir = orig_original
+    storage.processed_dir = orig_processed
+    result_cache.configure(orig_cache_dir)
     reset_db_path()
 
+    # A job events reader still running holds a connection to this test's database.
+    from app.services.job_events import job_event_hub
+
+    reader = job_event_hub._thread
+    if reader is not None:
+        reader.join(timeout=5)
+
 
 # ---------------------------------------------------------------------------
 # Fixtures: services
@@ -137,10 +192,12 @@ async def client(_patch_settings):
     with (
         patch("app.api.v1.endpoints.images.process_image_task", mock_image_task),
         patch("app.api.v1.endpoints.images.process_batch_task", mock_batch_task),
-        patch("app.services.image_processor.ImageProcessor.__init__", lambda self: None),
     ):
         from app.main import app
+        from app.middleware.rate_limit import limiter
 
+        # Each test starts with a fresh per-minute upload allowance.
+        limiter.reset()
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
             ac._mock_image_task = mock_image_task  # type: ignore[attr-defined]
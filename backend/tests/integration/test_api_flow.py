@@ -16,11 +16,32 @@ class TestHealthEndpoints:
         assert resp.status_code == 200
         assert resp.json()["status"] == "healthy"
 
+    async def test_workers_unavailable_without_heartbeat(self, client):
+        resp = await client.get("/health/workers")
+        assert resp.status_code == 503
+        assert resp.json() == {"status": "unavailable", "ready": 0, "workers": []}
+
+    async def test_workers_ready_after_warm_up(self, client):
+        from app.services.worker_health import WorkerState, worker_registry
+
+        worker_registry.start(["birefnet-general"])
+        try:
+            worker_registry.set_state(WorkerState.READY)
+            resp = await client.get("/health/workers")
+        finally:
+            worker_registry.stop()
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["ready"] == 1
+        assert data["workers"][0]["models"] == ["birefnet-general"]
+
     async def test_stats(self, client):
         resp = await client.get("/stats")
         assert resp.status_code == 200
         data = resp.json()
         assert "total_size_mb" in data
+        assert data["queue_wait"]["tiers"] == {}
+        assert data["quarantined"] == 0
 
 
 # ---------------------------------------------------------------------------
@@ -57,6 +78,253 @@ class TestSingleUpload:
         resp = await client.post("/api/v1/remove-bg")
         assert resp.status_code == 422  # FastAPI validation error
 
+    async def test_upload_with_model(self, client, small_jpeg: bytes):
+        resp = await client.post(
+            "/api/v1/remove-bg?model=u2netp",
+            files={"file": ("test.jpg", small_jpeg, "image/jpeg")},
+        )
+        assert resp.status_code == 200
+        assert client._mock_image_task.call_args.args[4] == "u2netp"
+
+    async def test_upload_with_format(self, client, small_jpeg: bytes):
+        resp = await client.post(
+            "/api/v1/remove-bg?format=webp",
+            files={"file": ("test.jpg", small_jpeg, "image/jpeg")},
+        )
+        assert resp.status_code == 200
+        assert client._mock_image_task.call_args.args[5] == "webp"
+
+    async def test_upload_unknown_format(self, client, small_jpeg: bytes):
+        resp = await client.post(
+            "/api/v1/remove-bg?format=gif",
+            files={"file": ("test.jpg", small_jpeg, "image/jpeg")},
+        )
+        assert resp.status_code == 422
+
+    async def test_refine_edges_reaches_task_and_cache_key(self, client, small_jpeg: bytes, small_png: bytes):
+        from app.services.result_cache import cache_key, result_cache
+
+        result_cache.put(cache_key(small_jpeg, "birefnet-general-lite", format="png", refine_edges=False), small_png)
+        resp = await client.post(
+            "/api/v1/remove-bg?refine_edges=true",
+            files={"file": ("test.jpg", small_jpeg, "image/jpeg")},
+        )
+        assert resp.status_code == 200
+        # The unrefined cached result does not answer a refined request.
+        assert client._mock_image_task.call_args.args[6] is True
+
+    async def test_pixel_count_stored_and_declared_to_task(self, client):
+        from app.db.database import get_connection
+        from tests.conftest import create_test_image
+
+        resp = await client.post(
+            "/api/v1/remove-bg",
+            files={"file": ("wide.jpg", create_test_image(300, 200), "image/jpeg")},
+        )
+        assert resp.status_code == 200
+
+        with get_connection() as conn:
+            row = conn.execute("SELECT pixels FROM job_images WHERE job_id = ?", (resp.json()["job_id"],)).fetchone()
+        assert row["pixels"] == 300 * 200
+        assert client._mock_image_task.call_args.args[7] == 300 * 200
+
+    async def test_original_written_from_spooled_upload(self, client, small_jpeg: bytes):
+        """Uploads past Starlette's 1 MB in-memory spool and under it are stored byte for byte."""
+        import io
+        from pathlib import Path
+
+        import numpy as np
+        from PIL import Image
+
+        noise = np.random.default_rng(0).integers(0, 255, (700, 700, 3), dtype=np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(noise).save(buf, format="PNG")
+        large = buf.getvalue()
+        assert len(large) > 1024 * 1024
+
+        for name, content, content_type in (("large.png", large, "image/png"), ("small.jpg", small_jpeg, "image/jpeg")):
+            resp = await client.post("/api/v1/remove-bg", files={"file": (name, content, content_type)})
+            assert resp.status_code == 200
+            assert Path(client._mock_image_task.call_args.args[2]).read_bytes() == content
+
+    async def test_task_priority_follows_tier(self, client, small_jpeg: bytes):
+        from app.models.api_key import Tier
+        from app.services.api_key_service import api_key_service
+
+        resp = await client.post("/api/v1/remove-bg", files={"file": ("a.jpg", small_jpeg, "image/jpeg")})
+        assert resp.status_code == 200
+        assert client._mock_image_task.call_args.kwargs["priority"] == 0
+
+        key = api_key_service.generate_key("ent@example.com", Tier.ENTERPRISE)
+        resp = await client.post(
+            "/api/v1/remove-bg",
+            files={"file": ("b.jpg", small_jpeg, "image/jpeg")},
+            headers={"X-API-Key": key.key},
+        )
+        assert resp.status_code == 200
+        assert client._mock_image_task.call_args.kwargs["priority"] == 100
+
+    async def test_animated_upload_is_stored_as_webp(self, client):
+        from tests.unit.test_animation import _animated_webp
+
+        resp = await client.post(
+            "/api/v1/remove-bg?format=png",
+            files={"file": ("anim.webp", _animated_webp([0, 30]), "image/webp")},
+        )
+        assert resp.status_code == 200
+        status = (await client.get(f"/api/v1/status/{resp.json()['job_id']}")).json()
+        assert status["images"][0]["output_format"] == "webp"
+
+    async def test_upload_too_many_frames(self, client, monkeypatch):
+        from app.config import settings
+        from tests.unit.test_animation import _animated_webp
+
+        monkeypatch.setattr(settings, "max_animation_frames", 2)
+        resp = await client.post(
+            "/api/v1/remove-bg",
+            files={"file": ("anim.webp", _animated_webp([0, 10, 20]), "image/webp")},
+        )
+        assert resp.status_code == 400
+        assert "Too many frames" in resp.json()["detail"]
+
+    async def test_upload_unknown_model(self, client, small_jpeg: bytes):
+        resp = await client.post(
+            "/api/v1/remove-bg?model=nope",
+            files={"file": ("test.jpg", small_jpeg, "image/jpeg")},
+        )
+        assert resp.status_code == 400
+
+    async def test_cached_result_completes_at_upload(self, client, small_jpeg: bytes, small_png: bytes):
+        from app.services.result_cache import cache_key, result_cache
+
+        result_cache.put(cache_key(small_jpeg, "birefnet-general-lite", format="png", refine_edges=False), small_png)
+        resp = await client.post(
+            "/api/v1/remove-bg",
+            files={"file": ("test.jpg", small_jpeg, "image/jpeg")},
+        )
+        assert resp.status_code == 200
+        client._mock_image_task.assert_not_called()
+
+        job_id = resp.json()["job_id"]
+        status = (await client.get(f"/api/v1/status/{job_id}")).json()
+        assert status["status"] == "completed"
+
+        download = await client.get(status["images"][0]["download_url"])
+        assert download.status_code == 200
+        assert download.content == small_png
+        assert download.headers["content-type"] == "image/png"
+
+        stats = (await client.get("/stats")).json()
+        assert stats["result_cache"]["hits"] == 1
+
+
+# ---------------------------------------------------------------------------
+# Synchronous upload
+# ---------------------------------------------------------------------------
+
+
+class TestSyncUpload:
+    """``sync=true`` returns the cutout once a worker finishes it, or the job when that is not quick."""
+
+    @staticmethod
+    def _finish_when_waited_on(client, small_png: bytes, status: str = "completed"):
+        """Stand in for the worker: finish the enqueued image once the request waits for it."""
+        import asyncio
+
+        from app.config import settings
+        from app.models.schemas import JobStatus
+        from app.services.job_events import job_event_hub
+        from app.services.job_manager import job_manager
+
+        async def work() -> None:
+            while job_event_hub.subscriber_count() == 0:
+                await asyncio.sleep(0.01)
+            job_id, image_id = client._mock_image_task.call_args.args[:2]
+            if status == JobStatus.COMPLETED:
+                (settings.processed_dir / job_id).mkdir(parents=True)
+                (settings.processed_dir / job_id / "test.png").write_bytes(small_png)
+                job_manager.update_image_status(job_id, image_id, JobStatus.COMPLETED, download_url="/d")
+            else:
+                job_manager.update_image_status(job_id, image_id, JobStatus.FAILED, error="cannot identify image")
+
+        return asyncio.create_task(work())
+
+    async def test_returns_cutout(self, client, small_jpeg: bytes, small_png: bytes):
+        from unittest.mock import patch
+
+        from app.services.job_events import job_event_hub
+
+        with patch.object(job_event_hub, "poll_interval", 0.01):
+            worker = self._finish_when_waited_on(client, small_png)
+            resp = await client.post(
+                "/api/v1/remove-bg?sync=true", files={"file": ("test.jpg", small_jpeg, "image/jpeg")}
+            )
+            await worker
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "image/png"
+        assert resp.content == small_png
+        status = (await client.get(f"/api/v1/status/{resp.headers['x-job-id']}")).json()
+        assert status["status"] == "completed"
+        assert status["images"][0]["image_id"] == resp.headers["x-image-id"]
+        assert job_event_hub.subscriber_count() == 0
+
+    async def test_failed_image_is_an_error(self, client, small_jpeg: bytes, small_png: bytes):
+        from unittest.mock import patch
+
+        from app.services.job_events import job_event_hub
+
+        with patch.object(job_event_hub, "poll_interval", 0.01):
+            worker = self._finish_when_waited_on(client, small_png, status="failed")
+            resp = await client.post(
+                "/api/v1/remove-bg?sync=true", files={"file": ("test.jpg", small_jpeg, "image/jpeg")}
+            )
+            await worker
+
+        assert resp.status_code == 422
+        assert "cannot identify image" in resp.json()["detail"]
+
+    async def test_returns_job_after_deadline(self, client, small_jpeg: bytes):
+        from unittest.mock import patch
+
+        from app.config import settings
+        from app.services.job_events import job_event_hub
+
+        with patch.object(settings, "sync_timeout", 0.05):
+            resp = await client.post(
+                "/api/v1/remove-bg?sync=true", files={"file": ("test.jpg", small_jpeg, "image/jpeg")}
+            )
+
+        assert resp.status_code == 200
+        assert resp.json()["job_id"]
+        client._mock_image_task.assert_called_once()
+        assert job_event_hub.subscriber_count() == 0
+
+    async def test_busy_queue_returns_job_without_waiting(self, client, small_jpeg: bytes):
+        from unittest.mock import patch
+
+        from app.services.job_events import job_event_hub
+        from app.tasks.queue import huey
+
+        with patch.object(huey, "pending_count", return_value=2), patch.object(job_event_hub, "subscribe") as waited:
+            resp = await client.post(
+                "/api/v1/remove-bg?sync=true", files={"file": ("test.jpg", small_jpeg, "image/jpeg")}
+            )
+
+        assert resp.json()["job_id"]
+        client._mock_image_task.assert_called_once()
+        waited.assert_not_called()
+
+    async def test_cached_result_is_returned_at_once(self, client, small_jpeg: bytes, small_png: bytes):
+        from app.services.result_cache import cache_key, result_cache
+
+        result_cache.put(cache_key(small_jpeg, "birefnet-general-lite", format="png", refine_edges=False), small_png)
+        resp = await client.post("/api/v1/remove-bg?sync=true", files={"file": ("test.jpg", small_jpeg, "image/jpeg")})
+
+        assert resp.content == small_png
+        assert resp.headers["x-job-id"]
+        client._mock_image_task.assert_not_called()
+
 
 # ---------------------------------------------------------------------------
 # Batch upload
@@ -71,6 +339,59 @@ class TestBatchUpload:
         data = resp.json()
         assert data["total_images"] == 3
 
+    async def test_batch_enqueues_only_cache_misses(self, client, small_jpeg: bytes, small_png: bytes):
+        from app.services.result_cache import cache_key, result_cache
+
+        result_cache.put(cache_key(small_jpeg, "birefnet-general-lite", format="png", refine_edges=False), small_png)
+        files = [
+            ("files", ("cached.jpg", small_jpeg, "image/jpeg")),
+            ("files", ("new.png", small_png, "image/png")),
+        ]
+        resp = await client.post("/api/v1/remove-bg/batch", files=files)
+        assert resp.status_code == 200
+
+        batch = client._mock_batch_task.call_args.args[1]
+        assert [img["filename"] for img in batch] == ["new.png"]
+        assert batch[0]["pixels"] == 100 * 100
+
+    async def test_batch_of_cache_hits_with_chunking_disabled(self, client, small_jpeg: bytes, small_png: bytes):
+        from unittest.mock import patch
+
+        from app.config import settings
+        from app.services.result_cache import cache_key, result_cache
+
+        result_cache.put(cache_key(small_jpeg, "birefnet-general-lite", format="png", refine_edges=False), small_png)
+        files = [("files", (f"img{i}.jpg", small_jpeg, "image/jpeg")) for i in range(2)]
+        with patch.object(settings, "batch_chunk_size", 0):
+            resp = await client.post("/api/v1/remove-bg/batch", files=files)
+        assert resp.status_code == 200
+        client._mock_batch_task.assert_not_called()
+
+    async def test_batch_enqueued_in_chunks(self, client, small_jpeg: bytes):
+        from unittest.mock import patch
+
+        from app.config import settings
+
+        files = [("files", (f"img{i}.jpg", small_jpeg, "image/jpeg")) for i in range(10)]
+        with patch.object(settings, "batch_chunk_size", 4):
+            resp = await client.post("/api/v1/remove-bg/batch", files=files)
+        assert resp.status_code == 200
+
+        chunks = [c.args[1] for c in client._mock_batch_task.call_args_list]
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert {c.args[0] for c in client._mock_batch_task.call_args_list} == {resp.json()["job_id"]}
+
+    async def test_batch_in_one_task_when_chunking_disabled(self, client, small_jpeg: bytes):
+        from unittest.mock import patch
+
+        from app.config import settings
+
+        files = [("files", (f"img{i}.jpg", small_jpeg, "image/jpeg")) for i in range(6)]
+        with patch.object(settings, "batch_chunk_size", 0):
+            resp = await client.post("/api/v1/remove-bg/batch", files=files)
+        assert resp.status_code == 200
+        assert client._mock_batch_task.call_count == 1
+
     async def test_batch_too_many(self, client, small_jpeg: bytes):
         files = [("files", (f"img{i}.jpg", small_jpeg, "image/jpeg")) for i in range(21)]
         resp = await client.post("/api/v1/remove-bg/batch", files=files)
@@ -107,6 +428,63 @@ class TestJobStatus:
         resp = await client.get("/api/v1/status/nonexistent-id")
         assert resp.status_code == 404
 
+    async def test_stream_pushes_image_changes_until_the_job_finishes(self, client, small_jpeg: bytes):
+        import asyncio
+        import json
+        from unittest.mock import patch
+
+        from app.models.schemas import JobStatus
+        from app.services.job_events import job_event_hub
+        from app.services.job_manager import job_manager
+
+        resp = await client.post("/api/v1/remove-bg", files={"file": ("test.jpg", small_jpeg, "image/jpeg")})
+        job_id = resp.json()["job_id"]
+        image_id = client._mock_image_task.call_args.args[1]
+
+        async def work() -> None:
+            # Wait for the stream to subscribe before the worker's updates land.
+            while job_event_hub.subscriber_count() == 0:
+                await asyncio.sleep(0.01)
+            job_manager.update_image_status(job_id, image_id, JobStatus.PROCESSING)
+            job_manager.update_image_status(job_id, image_id, JobStatus.COMPLETED, download_url="/d/test.png")
+
+        with patch.object(job_event_hub, "poll_interval", 0.01):
+            worker = asyncio.create_task(work())
+            stream = await asyncio.wait_for(client.get(f"/api/v1/status/{job_id}/stream"), 5)
+            await worker
+
+        assert stream.status_code == 200
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        messages = [m.split("\n", 1) for m in stream.text.strip().split("\n\n")]
+        names = [name for name, _ in messages]
+        data = [json.loads(d.removeprefix("data: ")) for _, d in messages]
+        assert names == ["event: status", "event: image", "event: image"]
+        assert data[0]["status"] == "pending"
+        assert data[1]["image"]["status"] == "processing"
+        assert data[2]["status"] == "completed"
+        assert data[2]["image"]["download_url"] == "/d/test.png"
+        assert job_event_hub.subscriber_count() == 0
+
+    async def test_stream_of_finished_job_sends_status_and_ends(self, client, small_jpeg: bytes):
+        from app.models.schemas import JobStatus
+        from app.services.job_manager import job_manager
+
+        resp = await client.post("/api/v1/remove-bg", files={"file": ("test.jpg", small_jpeg, "image/jpeg")})
+        job_id = resp.json()["job_id"]
+        job_manager.update_image_status(job_id, client._mock_image_task.call_args.args[1], JobStatus.FAILED, error="x")
+
+        stream = await client.get(f"/api/v1/status/{job_id}/stream")
+        assert stream.text.startswith("event: status\n")
+        assert stream.text.count("event:") == 1
+        assert '"status":"failed"' in stream.text
+
+    async def test_stream_nonexistent_job(self, client):
+        from app.services.job_events import job_event_hub
+
+        resp = await client.get("/api/v1/status/nonexistent-id/stream")
+        assert resp.status_code == 404
+        assert job_event_hub.subscriber_count() == 0
+
 
 # ---------------------------------------------------------------------------
 # Download
@@ -130,6 +508,24 @@ class TestDownload:
         dl_resp = await client.get(f"/api/v1/download/{job_id}/{image_id}")
         assert dl_resp.status_code == 400
 
+    async def test_download_serves_format_media_type(self, client, small_jpeg: bytes):
+        from app.services.result_cache import cache_key, result_cache
+
+        result_cache.put(
+            cache_key(small_jpeg, "birefnet-general-lite", format="webp", refine_edges=False), b"RIFF-webp"
+        )
+        resp = await client.post(
+            "/api/v1/remove-bg?format=webp",
+            files={"file": ("photo.jpg", small_jpeg, "image/jpeg")},
+        )
+        status = (await client.get(f"/api/v1/status/{resp.json()['job_id']}")).json()
+        assert status["images"][0]["output_format"] == "webp"
+
+        download = await client.get(status["images"][0]["download_url"])
+        assert download.status_code == 200
+        assert download.headers["content-type"] == "image/webp"
+        assert "photo.webp" in download.headers["content-disposition"]
+
     async def test_download_nonexistent_job(self, client):
         resp = await client.get("/api/v1/download/fake-job/fake-image")
         assert resp.status_code == 404
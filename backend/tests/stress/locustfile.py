@@ -9,6 +9,7 @@ Then open http://localhost:8089 to configure and start tests.
 """
 
 import io
+import json
 
 from locust import HttpUser, between, tag, task
 from PIL import Image
@@ -41,7 +42,7 @@ class ClearCutUser(HttpUser):
     @tag("single")
     @task(5)
     def single_upload(self) -> None:
-        """Upload a single image and poll until done or timeout."""
+        """Upload a single image and wait for its progress stream to finish."""
         resp = self.client.post(
             "/api/v1/remove-bg",
             files={"file": ("test.jpg", SMALL_JPEG, "image/jpeg")},
@@ -50,7 +51,7 @@ class ClearCutUser(HttpUser):
         if resp.status_code == 200:
             job_id = resp.json().get("job_id")
             if job_id:
-                self._poll_status(job_id, max_polls=10)
+                self._await_completion(job_id, timeout=10)
 
     @tag("batch")
     @task(2)
@@ -65,7 +66,7 @@ class ClearCutUser(HttpUser):
         if resp.status_code == 200:
             job_id = resp.json().get("job_id")
             if job_id:
-                self._poll_status(job_id, max_polls=30)
+                self._await_completion(job_id, timeout=30)
 
     @tag("status")
     @task(3)
@@ -79,17 +80,24 @@ class ClearCutUser(HttpUser):
             if resp.status_code == 404:
                 resp.success()
 
-    def _poll_status(self, job_id: str, max_polls: int = 10) -> None:
-        """Poll job status until completed or max polls reached."""
-        import time
-
-        for _ in range(max_polls):
-            resp = self.client.get(
-                f"/api/v1/status/{job_id}",
-                name="/api/v1/status/{job_id} [poll]",
-            )
-            if resp.status_code == 200:
-                status = resp.json().get("status")
-                if status in ("completed", "failed"):
-                    return
-            time.sleep(1)
+    def _await_completion(self, job_id: str, timeout: float = 10) -> None:
+        """Follow the job's progress stream until it completes or fails, or the read times out."""
+        with self.client.get(
+            f"/api/v1/status/{job_id}/stream",
+            name="/api/v1/status/{job_id}/stream",
+            stream=True,
+            timeout=timeout,
+            catch_response=True,
+        ) as resp:
+            if resp.status_code != 200:
+                resp.failure(f"stream returned {resp.status_code}")
+                return
+            try:
+                for line in resp.iter_lines(decode_unicode=True):
+                    if line.startswith("data: ") and json.loads(line[6:])["status"] in ("completed", "failed"):
+                        resp.success()
+                        return
+            except Exception as e:
+                resp.failure(f"stream ended early: {e}")
+                return
+            resp.failure("stream closed before the job finished")
@@ -0,0 +1,112 @@
+"""Tests for pixel-budget admission control."""
+
+import threading
+import time
+
+from app.services.admission import PixelBudget, pixel_cost
+from tests.conftest import create_test_image, create_test_mpo
+from tests.unit.test_animation import _animated_webp
+
+
+def _acquire_in_thread(budget: PixelBudget, pixels: int, admitted: list[int]) -> threading.Thread:
+    def run() -> None:
+        budget.acquire(pixels)
+        admitted.append(pixels)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestPixelCost:
+    def test_still_image(self):
+        assert pixel_cost(create_test_image(300, 200)) == 300 * 200
+
+    def test_animation_counts_every_frame(self):
+        data = _animated_webp([0, 30, 60])
+        assert pixel_cost(data) == 80 * 60 * 3
+
+    def test_multi_picture_jpeg_counts_the_photo_only(self):
+        assert pixel_cost(create_test_mpo(300, 200)) == 300 * 200
+
+
+class TestPixelBudget:
+    def test_small_images_run_together(self):
+        budget = PixelBudget(100)
+        budget.acquire(30)
+        budget.acquire(30)
+        budget.acquire(40)
+        assert budget.stats()["in_flight_images"] == 3
+        assert budget.stats()["in_flight_pixels"] == 100
+
+    def test_large_image_waits_for_room(self):
+        budget = PixelBudget(100)
+        budget.acquire(60)
+        admitted: list[int] = []
+        thread = _acquire_in_thread(budget, 60, admitted)
+        thread.join(0.1)
+        assert admitted == []
+        assert budget.stats()["waiting"] == 1
+
+        budget.release(60)
+        thread.join(5)
+        assert admitted == [60]
+
+    def test_image_over_budget_runs_alone(self):
+        budget = PixelBudget(100)
+        budget.acquire(500)
+        assert budget.stats()["in_flight_pixels"] == 500
+
+        admitted: list[int] = []
+        thread = _acquire_in_thread(budget, 1, admitted)
+        thread.join(0.1)
+        assert admitted == []
+        budget.release(500)
+        thread.join(5)
+        assert admitted == [1]
+
+    def test_waiters_admitted_in_arrival_order(self):
+        budget = PixelBudget(100)
+        budget.acquire(60)
+        admitted: list[int] = []
+        large = _acquire_in_thread(budget, 80, admitted)
+        time.sleep(0.05)
+        small = _acquire_in_thread(budget, 10, admitted)
+        small.join(0.1)
+        # The small image would fit, but the large one arrived first.
+        assert admitted == []
+
+        budget.release(60)
+        large.join(5)
+        small.join(5)
+        assert admitted == [80, 10]
+
+    def test_acquire_gives_up_after_timeout(self):
+        budget = PixelBudget(100)
+        budget.acquire(60)
+        admitted: list[int] = []
+        assert not budget.acquire(80, timeout=0.05)
+        assert budget.stats()["waiting"] == 0
+
+        # A waiter that gave up does not hold back the ones behind it.
+        small = _acquire_in_thread(budget, 10, admitted)
+        small.join(5)
+        assert admitted == [10]
+
+    def test_zero_budget_is_unlimited(self):
+        budget = PixelBudget(0)
+        for _ in range(5):
+            budget.acquire(10**9)
+        assert budget.stats()["in_flight_images"] == 5
+
+    def test_reserve_releases_on_error(self):
+        budget = PixelBudget(100)
+        try:
+            with budget.reserve(70):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        stats = budget.stats()
+        assert stats["in_flight_pixels"] == 0
+        assert stats["peak_pixels"] == 70
+        assert stats["admitted"] == 1
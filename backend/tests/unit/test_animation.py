@@ -0,0 +1,102 @@
+"""Tests for animated input processing."""
+
+import io
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services.animation import is_animated, keyframe_indices, output_format_for, remove_background_animated
+from app.services.inference import get_model_spec
+from tests.conftest import create_test_image, create_test_mpo, fake_session
+
+
+def _frame(offset: int) -> Image.Image:
+    img = Image.new("RGB", (80, 60), color=(230, 230, 230))
+    ImageDraw.Draw(img).ellipse((10 + offset, 10, 40 + offset, 40), fill=(30, 60, 120))
+    return img
+
+
+def _animated_webp(offsets: list[int]) -> bytes:
+    frames = [_frame(offset) for offset in offsets]
+    buf = io.BytesIO()
+    frames[0].save(
+        buf,
+        format="WEBP",
+        save_all=True,
+        append_images=frames[1:],
+        duration=[40 + 10 * i for i in range(len(frames))],
+        loop=2,
+        lossless=True,
+    )
+    return buf.getvalue()
+
+
+# u2netp prediction that keeps everything except the top-left corner.
+CORNER_CUT = np.ones((320, 320), dtype=np.float32)
+CORNER_CUT[:40, :40] = 0.0
+
+
+class TestDetection:
+    def test_animated_webp(self):
+        data = _animated_webp([0, 20])
+        assert is_animated(data)
+        assert output_format_for(data, "png") == "webp"
+
+    def test_still_image(self):
+        data = create_test_image()
+        assert not is_animated(data)
+        assert output_format_for(data, "jpeg") == "jpeg"
+
+    def test_multi_picture_jpeg_is_a_still(self):
+        data = create_test_mpo()
+        assert not is_animated(data)
+        assert output_format_for(data, "png") == "png"
+
+    def test_garbage_is_not_animated(self):
+        assert not is_animated(b"not an image")
+
+
+class TestKeyframes:
+    def test_identical_frames_reuse_mask(self):
+        frames = [_frame(0), _frame(0), _frame(30), _frame(30), _frame(0)]
+        assert keyframe_indices(frames, 0.01) == [0, 0, 2, 2, 4]
+
+    def test_compares_against_keyframe_not_previous_frame(self):
+        """Small steps that add up to a large change still trigger a new keyframe."""
+        frames = [_frame(offset) for offset in range(0, 30, 2)]
+        keys = keyframe_indices(frames, 0.02)
+        assert keys[0] == 0
+        assert 1 < len(set(keys)) < len(frames)
+
+
+class TestRemoveBackgroundAnimated:
+    def test_batches_changed_frames_and_keeps_timing(self, monkeypatch):
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "inference_batch_size", 4)
+        session = fake_session("u2netp", 320, CORNER_CUT)
+        data = _animated_webp([0, 0, 0, 30, 30, 0])
+
+        out = Image.open(io.BytesIO(remove_background_animated(session, data, get_model_spec("u2netp"))))
+
+        # Three keyframes, one session call.
+        assert session.inner_session.run.call_count == 1
+        assert next(iter(session.inner_session.run.call_args.args[1].values())).shape[0] == 3
+        assert out.format == "WEBP"
+        # libwebp merges identical consecutive frames, adding up their durations.
+        assert 3 <= out.n_frames <= 6
+        assert out.info["loop"] == 2
+        durations = []
+        for i in range(out.n_frames):
+            out.seek(i)
+            out.load()
+            durations.append(out.info["duration"])
+            alpha = np.asarray(out.convert("RGBA").getchannel("A"))
+            assert alpha[0, 0] == 0 and alpha[-1, -1] == 255
+        assert sum(durations) == 40 + 50 + 60 + 70 + 80 + 90
+
+    def test_remove_background_dispatches_animations(self):
+        from app.services.inference import remove_background
+
+        out = remove_background(fake_session("u2netp", 320, CORNER_CUT), _animated_webp([0, 30]))
+        assert Image.open(io.BytesIO(out)).n_frames == 2
@@ -0,0 +1,90 @@
+"""Tests for the micro-batching inference scheduler."""
+
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import inference
+from app.services.batcher import MicroBatcher
+from app.services.inference import ModelSpec
+from tests.conftest import fake_session
+
+
+@pytest.fixture(autouse=True)
+def _tiny_model(monkeypatch):
+    monkeypatch.setitem(inference.MODEL_SPECS, "tiny", ModelSpec("tiny", (8, 8)))
+
+
+def _submit_concurrently(batcher: MicroBatcher, count: int) -> list:
+    results: list = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i: int) -> None:
+        barrier.wait()
+        results[i] = batcher.predict(Image.new("RGB", (10, 10)), "tiny")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    return results
+
+
+class TestMicroBatcher:
+    def test_single_request_returns_mask(self):
+        batcher = MicroBatcher(lambda name: fake_session(name, 8, 1.0), max_batch_size=4, max_wait_ms=1)
+        mask = batcher.predict(Image.new("RGB", (10, 10)), "tiny")
+        assert mask.shape == (8, 8)
+        assert mask.dtype == np.uint8
+
+    def test_concurrent_requests_share_a_batch(self):
+        session = fake_session("tiny", 8, 1.0)
+        batcher = MicroBatcher(lambda _model: session, max_batch_size=4, max_wait_ms=500)
+
+        results = _submit_concurrently(batcher, 4)
+
+        assert all(r is not None for r in results)
+        assert session.inner_session.run.call_count == 1
+        assert batcher.stats()["batch_size_histogram"] == {4: 1}
+
+    def test_batch_size_is_capped(self):
+        session = fake_session("tiny", 8, 1.0)
+        batcher = MicroBatcher(lambda _model: session, max_batch_size=2, max_wait_ms=500)
+
+        _submit_concurrently(batcher, 4)
+
+        sizes = [call.args[1]["input"].shape[0] for call in session.inner_session.run.call_args_list]
+        assert max(sizes) <= 2
+        assert sum(sizes) == 4
+
+    def test_errors_propagate_to_callers(self):
+        session = fake_session("tiny", 8, 1.0)
+        session.inner_session.run.side_effect = RuntimeError("onnx blew up")
+        batcher = MicroBatcher(lambda _model: session, max_batch_size=4, max_wait_ms=1)
+
+        with pytest.raises(RuntimeError, match="onnx blew up"):
+            batcher.predict(Image.new("RGB", (10, 10)), "tiny")
+
+    def test_stats(self):
+        batcher = MicroBatcher(lambda name: fake_session(name, 8, 1.0), max_batch_size=4, max_wait_ms=1)
+        batcher.predict(Image.new("RGB", (10, 10)), "tiny")
+        batcher.predict(Image.new("RGB", (10, 10)), "tiny")
+
+        stats = batcher.stats()
+        assert stats["batches"] == 2
+        assert stats["images"] == 2
+        assert stats["mean_batch_size"] == 1.0
+
+    def test_models_are_batched_separately(self, monkeypatch):
+        monkeypatch.setitem(inference.MODEL_SPECS, "other", ModelSpec("other", (8, 8)))
+        sessions = {name: fake_session(name, 8, 1.0) for name in ("tiny", "other")}
+        batcher = MicroBatcher(sessions.__getitem__, max_batch_size=4, max_wait_ms=1)
+
+        batcher.predict(Image.new("RGB", (10, 10)), "tiny")
+        batcher.predict(Image.new("RGB", (10, 10)), "other")
+
+        assert sessions["tiny"].inner_session.run.call_count == 1
+        assert sessions["other"].inner_session.run.call_count == 1
@@ -0,0 +1,67 @@
+"""Tests for reading encoded images from bytes or memory-mapped files."""
+
+import io
+import mmap
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from app.services.buffers import map_file_object, open_buffer
+from app.services.inference import decode_image
+from tests.conftest import create_test_image
+
+
+def _mapped(tmp_path, data: bytes) -> mmap.mmap:
+    path = tmp_path / "image"
+    path.write_bytes(data)
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class TestOpenBuffer:
+    def test_bytes_open_as_bytesio(self):
+        assert isinstance(open_buffer(b"abc"), io.BytesIO)
+
+    def test_readers_of_a_mapping_have_their_own_position(self, tmp_path):
+        mapped = _mapped(tmp_path, b"0123456789")
+        first, second = open_buffer(mapped), open_buffer(mapped)
+        assert first.read(4) == b"0123"
+        assert second.read(2) == b"01"
+        first.seek(-2, io.SEEK_END)
+        assert first.read() == b"89"
+        assert second.read() == b"23456789"
+
+    def test_mapped_image_decodes_like_bytes(self, tmp_path):
+        for fmt in ("JPEG", "PNG", "WEBP"):
+            data = create_test_image(64, 48, fmt)
+            from_bytes = np.asarray(decode_image(data))
+            from_mapping = np.asarray(decode_image(_mapped(tmp_path, data)))
+            assert np.array_equal(from_bytes, from_mapping), fmt
+
+    def test_pil_reads_header_only(self, tmp_path):
+        with Image.open(open_buffer(_mapped(tmp_path, create_test_image(64, 48, "PNG")))) as img:
+            assert img.size == (64, 48)
+
+
+class TestMapFileObject:
+    def test_spool_on_disk_is_mapped(self):
+        data = create_test_image(64, 48)
+        with tempfile.SpooledTemporaryFile(max_size=10) as spool:
+            spool.write(data)
+            mapped = map_file_object(spool)
+            assert isinstance(mapped, mmap.mmap)
+            assert mapped[:] == data
+
+    def test_spool_in_memory_is_read_without_rolling_over(self):
+        data = create_test_image(64, 48)
+        with tempfile.SpooledTemporaryFile(max_size=len(data) + 1) as spool:
+            spool.write(data)
+            assert map_file_object(spool) == data
+            assert not spool._rolled
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty"
+        path.write_bytes(b"")
+        with open(path, "rb") as f:
+            assert map_file_object(f) == b""
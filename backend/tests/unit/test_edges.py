@@ -0,0 +1,81 @@
+"""Tests for trimap-limited edge refinement."""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.services.edges import box_filter, refine_alpha, trimap
+
+
+def _scene() -> tuple[Image.Image, np.ndarray, np.ndarray]:
+    """Dark disc with thin strands on a light background, its true alpha, and a blurred model mask."""
+    truth_img = Image.new("L", (256, 256), 0)
+    draw = ImageDraw.Draw(truth_img)
+    draw.ellipse((64, 96, 192, 224), fill=255)
+    for x in range(80, 180, 12):
+        draw.line([(x, 110), (x - 10, 60)], fill=255, width=2)
+    truth = np.asarray(truth_img)
+    img = Image.composite(
+        Image.new("RGB", (256, 256), (40, 30, 20)), Image.new("RGB", (256, 256), (220, 225, 230)), truth_img
+    )
+    model_mask = np.asarray(truth_img.filter(ImageFilter.GaussianBlur(4)))
+    return img, truth, model_mask
+
+
+class TestBoxFilter:
+    def test_matches_windowed_mean(self):
+        rng = np.random.default_rng(0)
+        a = rng.random((20, 30)).astype(np.float32)
+        out = box_filter(a, 2)
+        assert out[10, 10] == pytest.approx(a[8:13, 8:13].mean(), rel=1e-5)
+        # Windows shrink at the borders.
+        assert out[0, 0] == pytest.approx(a[:3, :3].mean(), rel=1e-5)
+        assert out[-1, -1] == pytest.approx(a[-3:, -3:].mean(), rel=1e-5)
+
+    def test_radius_larger_than_image(self):
+        a = np.ones((3, 3), dtype=np.float32)
+        assert np.allclose(box_filter(a, 10), 1.0)
+
+
+class TestTrimap:
+    def test_unknown_band_between_definite_regions(self):
+        alpha = np.zeros((10, 10), dtype=np.uint8)
+        alpha[:, 5:] = 255
+        alpha[:, 4:6] = 128
+        fg, bg = trimap(alpha, 1)
+        assert fg[:, 7:].all() and not fg[:, :7].any()
+        assert bg[:, :3].all() and not bg[:, 3:].any()
+
+
+class TestRefineAlpha:
+    def test_recovers_fine_edges(self):
+        img, truth, model_mask = _scene()
+        refined = refine_alpha(img, model_mask, radius=128, erode=4)
+
+        def error(alpha: np.ndarray) -> float:
+            return float(np.abs(alpha.astype(np.int16) - truth.astype(np.int16)).mean())
+
+        assert error(refined) < error(model_mask) / 2
+
+    def test_definite_regions_unchanged(self):
+        img, _, model_mask = _scene()
+        refined = refine_alpha(img, model_mask, radius=128, erode=4)
+        definite = (model_mask > 240) | (model_mask < 10)
+        # Erosion only shrinks the definite regions, so their cores are never rewritten.
+        fg, bg = trimap(model_mask, 4)
+        assert np.array_equal(refined[fg | bg], model_mask[fg | bg])
+        assert definite.any()
+
+    def test_hard_mask_without_edges_is_returned(self):
+        img = Image.new("RGB", (32, 32), (10, 20, 30))
+        alpha = np.full((32, 32), 255, dtype=np.uint8)
+        assert refine_alpha(img, alpha) is alpha
+
+    def test_same_colors_keep_model_alpha(self):
+        """Where foreground and background look alike there is nothing to separate on."""
+        img = Image.new("RGB", (64, 64), (128, 128, 128))
+        alpha = np.zeros((64, 64), dtype=np.uint8)
+        alpha[:, 32:] = 255
+        alpha[:, 28:36] = 100
+        refined = refine_alpha(img, alpha, radius=16, erode=1)
+        assert np.array_equal(refined, alpha)
@@ -0,0 +1,78 @@
+"""Tests for output encodings."""
+
+import io
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.config import settings
+from app.services.encoding import OutputFormat, encode_rgba, flatten, output_filename
+from app.services.inference import encode_cutout
+
+
+def _cutout() -> np.ndarray:
+    rgba = np.zeros((20, 30, 4), dtype=np.uint8)
+    rgba[5:15, 5:25] = (200, 40, 10, 255)
+    return rgba
+
+
+class TestOutputFormat:
+    @pytest.mark.parametrize(
+        ("fmt", "name", "media_type"),
+        [
+            ("png", "photo.png", "image/png"),
+            ("webp", "photo.webp", "image/webp"),
+            ("mask", "photo.png", "image/png"),
+            ("jpeg", "photo.jpg", "image/jpeg"),
+        ],
+    )
+    def test_filename_and_media_type(self, fmt, name, media_type):
+        assert output_filename("photo.jpeg", fmt) == name
+        assert OutputFormat(fmt).media_type == media_type
+
+    def test_unknown_format_rejected(self):
+        with pytest.raises(ValueError):
+            output_filename("photo.jpg", "gif")
+
+
+class TestEncodeRgba:
+    def test_png_is_lossless_rgba(self):
+        rgba = _cutout()
+        out = Image.open(io.BytesIO(encode_rgba(rgba, "png")))
+        assert out.format == "PNG"
+        assert np.array_equal(np.asarray(out), rgba)
+
+    def test_webp_is_lossless_rgba(self):
+        rgba = _cutout()
+        out = Image.open(io.BytesIO(encode_rgba(rgba, "webp")))
+        assert out.format == "WEBP"
+        assert np.array_equal(np.asarray(out.convert("RGBA")), rgba)
+
+    def test_mask_is_grayscale_alpha(self):
+        rgba = _cutout()
+        out = Image.open(io.BytesIO(encode_rgba(rgba, "mask")))
+        assert out.mode == "L"
+        assert np.array_equal(np.asarray(out), rgba[..., 3])
+
+    def test_jpeg_uses_flat_background(self):
+        with patch.object(settings, "jpeg_background", "#00ff00"):
+            out = Image.open(io.BytesIO(encode_rgba(_cutout(), "jpeg")))
+        assert out.format == "JPEG"
+        r, g, b = out.getpixel((0, 0))
+        assert g > 240 and r < 15 and b < 15
+
+    def test_flatten_blends_partial_alpha(self):
+        rgba = np.array([[[255, 0, 0, 128]]], dtype=np.uint8)
+        assert flatten(rgba, (0, 0, 255)).getpixel((0, 0)) == (128, 0, 127)
+
+
+class TestEncodeCutout:
+    def test_mask_format_multiplies_existing_alpha(self):
+        img = Image.new("RGBA", (8, 8), (10, 20, 30, 128))
+        mask = np.full((4, 4), 255, dtype=np.uint8)
+        out = Image.open(io.BytesIO(encode_cutout(img, mask, "mask")))
+        assert out.mode == "L"
+        assert out.size == (8, 8)
+        assert np.asarray(out).max() == 128
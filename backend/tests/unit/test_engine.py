@@ -0,0 +1,128 @@
+"""Tests for the process-pool inference engine (stub handler, no model)."""
+
+import os
+import threading
+import time
+from multiprocessing import Pipe
+from multiprocessing.connection import Connection
+
+import pytest
+
+from app.services.engine import (
+    EngineDiedError,
+    EngineError,
+    EngineTimeoutError,
+    InferenceEngine,
+    _from_shm,
+    _serve,
+    _to_shm,
+)
+
+
+def _reverse_main(conn: Connection, model_name: str, threads: int) -> None:
+    """Engine entry point that reverses bytes instead of running a model."""
+
+    def handler(data: bytes, model: str, output_format: str, refine_edges: bool) -> bytes:
+        if data == b"boom":
+            raise ValueError("bad image")
+        if data == b"crash":
+            os._exit(1)
+        if data == b"hang":
+            time.sleep(60)
+        return data[::-1]
+
+    conn.send(("ready", os.getpid()))
+    _serve(conn, handler)
+
+
+@pytest.fixture
+def engine():
+    eng = InferenceEngine(processes=2, model_name="stub", threads_per_process=1, timeout=2)
+    eng._target = _reverse_main
+    yield eng
+    eng.shutdown()
+
+
+class TestSharedMemory:
+    def test_round_trip(self):
+        shm = _to_shm(b"hello")
+        try:
+            assert _from_shm(shm.name, 5) == b"hello"
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class TestServeLoop:
+    def test_serve_replies_through_shared_memory(self):
+        parent, child = Pipe()
+        thread = threading.Thread(target=_serve, args=(child, lambda data, model: data.upper() + model.encode()))
+        thread.start()
+
+        shm = _to_shm(b"abc")
+        parent.send((shm.name, 3, "-m"))
+        status, name, size = parent.recv()
+        shm.close()
+        shm.unlink()
+
+        assert status == "ok"
+        assert _from_shm(name, size, unlink=True) == b"ABC-m"
+
+        parent.send(None)
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+
+class TestInferenceEngine:
+    def test_disabled_with_zero_processes(self):
+        assert InferenceEngine(processes=0, model_name="stub").enabled is False
+
+    def test_process_round_trip(self, engine):
+        assert engine.process(b"image-bytes", "stub") == b"setyb-egami"
+
+    def test_handler_error_raises_engine_error(self, engine):
+        with pytest.raises(EngineError, match="bad image"):
+            engine.process(b"boom", "stub")
+        # The process survives handler errors.
+        assert engine.process(b"ok", "stub") == b"ko"
+
+    def test_dead_process_is_replaced(self, engine):
+        with pytest.raises(EngineDiedError, match="died"):
+            engine.process(b"crash", "stub")
+        assert engine.process(b"again", "stub") == b"niaga"
+        assert all(slot.process.is_alive() for slot in engine._slots)
+
+    def test_failed_replacement_does_not_hand_out_the_dead_process(self, engine, monkeypatch):
+        engine.process(b"warm", "stub")
+        spawn = engine._spawn
+
+        def out_of_memory():
+            raise OSError("out of memory")
+
+        monkeypatch.setattr(engine, "_spawn", out_of_memory)
+        with pytest.raises(EngineDiedError):
+            engine.process(b"crash", "stub")
+        assert len(engine._slots) == 1
+        assert engine._idle.qsize() == 1
+
+        # The next request tops the pool back up.
+        monkeypatch.setattr(engine, "_spawn", spawn)
+        assert engine.process(b"again", "stub") == b"niaga"
+        assert len(engine._slots) == 2
+        assert all(slot.process.is_alive() for slot in engine._slots)
+
+    def test_runaway_request_is_killed_at_the_timeout(self, engine):
+        engine.process(b"warm", "stub")
+        before = {slot.process.pid for slot in engine._slots}
+        with pytest.raises(EngineTimeoutError, match="longer than 2s"):
+            engine.process(b"hang", "stub")
+        after = {slot.process.pid for slot in engine._slots}
+        assert len(before - after) == 1
+        assert all(slot.process.is_alive() for slot in engine._slots)
+        assert engine.process(b"again", "stub") == b"niaga"
+
+    def test_process_many_isolates_failures(self, engine):
+        results = engine.process_many([b"ab", b"boom", b"cd"], "stub")
+        assert results[0] == b"ba"
+        assert isinstance(results[1], EngineError)
+        assert results[2] == b"dc"
@@ -0,0 +1,39 @@
+"""Tests for the background event loop used from synchronous worker code."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.event_loop import BackgroundLoop
+
+
+async def _loop_thread() -> str:
+    await asyncio.sleep(0)
+    return threading.current_thread().name
+
+
+class TestBackgroundLoop:
+    def test_runs_coroutines_on_one_long_lived_loop(self):
+        loop = BackgroundLoop()
+        assert loop.run(_loop_thread()) == "background-loop"
+        first = loop._loop
+        loop.run(_loop_thread())
+        assert loop._loop is first
+
+    def test_shared_by_threads(self):
+        loop = BackgroundLoop()
+        results: list[str] = []
+        threads = [threading.Thread(target=lambda: results.append(loop.run(_loop_thread()))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ["background-loop"] * 4
+
+    def test_exceptions_propagate(self):
+        async def fail() -> None:
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            BackgroundLoop().run(fail())
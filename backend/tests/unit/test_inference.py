@@ -0,0 +1,155 @@
+"""Tests for batched inference helpers (no real model required)."""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.services import inference
+from app.services.inference import (
+    ModelSpec,
+    SourceImage,
+    apply_mask,
+    decode_image,
+    predict_masks,
+    remove_background,
+    remove_background_batch,
+    supports_batching,
+    upsample_mask,
+)
+from tests.conftest import create_test_image, create_test_mpo, create_test_png, fake_session
+
+TINY_SPEC = ModelSpec("tiny", (16, 16), sigmoid=True)
+
+
+# Per-pixel logits from -4 to 4, so every normalized mask spans the full 0-255 range.
+RAMP = np.linspace(-4, 4, 16 * 16, dtype=np.float32).reshape(16, 16)
+
+
+def _images(count: int) -> list[Image.Image]:
+    return [Image.new("RGB", (40, 30), color=(i * 10, 0, 0)) for i in range(count)]
+
+
+class TestSupportsBatching:
+    def test_symbolic_batch_dim(self):
+        assert supports_batching(fake_session("tiny", 16, RAMP, batch_dim="batch_size")) is True
+
+    def test_fixed_batch_of_one(self):
+        assert supports_batching(fake_session("tiny", 16, RAMP, batch_dim=1)) is False
+
+
+class TestPredictMasks:
+    def test_chunks_session_calls(self):
+        session = fake_session("tiny", 16, RAMP)
+        masks = predict_masks(session, _images(5), TINY_SPEC, chunk_size=2)
+
+        assert len(masks) == 5
+        batch_sizes = [call.args[1]["input"].shape[0] for call in session.inner_session.run.call_args_list]
+        assert batch_sizes == [2, 2, 1]
+
+    def test_fixed_batch_model_runs_one_at_a_time(self):
+        session = fake_session("tiny", 16, RAMP, batch_dim=1)
+        predict_masks(session, _images(3), TINY_SPEC, chunk_size=8)
+        assert session.inner_session.run.call_count == 3
+
+    def test_masks_are_normalized_per_image(self):
+        masks = predict_masks(fake_session("tiny", 16, RAMP), _images(2), TINY_SPEC, chunk_size=2)
+        for mask in masks:
+            assert mask.dtype == np.uint8
+            assert mask.shape == (16, 16)
+            assert mask.min() == 0
+            assert mask.max() == 255
+
+    def test_empty_input(self):
+        session = fake_session("tiny", 16, RAMP)
+        assert predict_masks(session, [], TINY_SPEC, chunk_size=4) == []
+        session.inner_session.run.assert_not_called()
+
+
+class TestRemoveBackgroundBatch:
+    def test_returns_rgba_png_per_image(self, monkeypatch):
+        monkeypatch.setitem(inference.MODEL_SPECS, "tiny", TINY_SPEC)
+        session = fake_session("tiny", 16, RAMP)
+
+        results = remove_background_batch(session, [create_test_image(40, 30) for _ in range(3)], chunk_size=4)
+
+        assert len(results) == 3
+        assert session.inner_session.run.call_count == 1
+        for data in results:
+            out = Image.open(io.BytesIO(data))
+            assert out.format == "PNG"
+            assert out.mode == "RGBA"
+            assert out.size == (40, 30)
+
+
+class TestDecodeImage:
+    def test_palette_image_becomes_rgb(self):
+        buf = io.BytesIO()
+        Image.new("P", (10, 10)).save(buf, format="PNG")
+        assert decode_image(buf.getvalue()).mode == "RGB"
+
+    def test_rgba_is_kept(self):
+        assert decode_image(create_test_png(10, 10)).mode == "RGBA"
+
+
+class TestSourceImage:
+    def test_jpeg_decoded_at_reduced_scale_for_inference(self):
+        source = SourceImage(create_test_image(640, 480))
+        small = source.for_inference(TINY_SPEC)
+        assert small.size == (80, 60)  # 1/8 scale still covers 16x16
+        assert small.mode == "RGB"
+        assert source.full().size == (640, 480)
+
+    def test_jpeg_orientation_applied_to_reduced_decode(self):
+        buf = io.BytesIO()
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise
+        Image.new("RGB", (640, 480)).save(buf, format="JPEG", exif=exif)
+        source = SourceImage(buf.getvalue())
+        assert source.for_inference(TINY_SPEC).size == (60, 80)
+        assert source.full().size == (480, 640)
+
+    def test_multi_picture_jpeg_decoded_at_reduced_scale(self):
+        source = SourceImage(create_test_mpo(640, 480))
+        assert source.for_inference(TINY_SPEC).size == (80, 60)
+        assert source.full().size == (640, 480)
+
+    def test_png_decoded_once_and_shared(self):
+        source = SourceImage(create_test_png(64, 64))
+        assert source.for_inference(TINY_SPEC) is source.full()
+
+
+class TestMaskApplication:
+    def test_upsample_mask_to_image_size(self):
+        mask = np.full((16, 16), 200, dtype=np.uint8)
+        assert upsample_mask(mask, (300, 200)).shape == (200, 300)
+
+    def test_apply_mask_sets_alpha_and_keeps_colour(self):
+        img = Image.new("RGB", (4, 2), color=(10, 20, 30))
+        alpha = np.array([[255, 128, 0, 255], [0, 0, 255, 64]], dtype=np.uint8)
+
+        rgba = apply_mask(img, alpha)
+
+        assert rgba.shape == (2, 4, 4)
+        assert rgba[0, 0].tolist() == [10, 20, 30, 255]
+        assert rgba[0, 1].tolist() == [10, 20, 30, 128]
+        assert rgba[0, 2].tolist() == [0, 0, 0, 0]
+
+    def test_apply_mask_multiplies_existing_alpha(self):
+        img = Image.new("RGBA", (2, 1), color=(10, 20, 30, 128))
+        rgba = apply_mask(img, np.array([[255, 128]], dtype=np.uint8))
+        assert rgba[0, 0, 3] == 128
+        assert rgba[0, 1, 3] == 64
+
+
+class TestRemoveBackground:
+    def test_full_resolution_output(self, monkeypatch):
+        monkeypatch.setitem(inference.MODEL_SPECS, "tiny", TINY_SPEC)
+        session = fake_session("tiny", 16, RAMP)
+
+        out = Image.open(io.BytesIO(remove_background(session, create_test_image(640, 480))))
+
+        assert out.size == (640, 480)
+        assert out.mode == "RGBA"
+        fed = session.inner_session.run.call_args.args[1]["input"]
+        assert fed.shape == (1, 3, 16, 16)
@@ -0,0 +1,74 @@
+"""Tests for job events and their delivery to progress streams."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.db.database import get_connection
+from app.models.schemas import JobStatus
+from app.services.job_events import job_event_hub
+
+
+@pytest.fixture
+def fast_hub():
+    with patch.object(job_event_hub, "poll_interval", 0.01):
+        yield job_event_hub
+
+
+def _events(job_id: str) -> list[dict]:
+    with get_connection() as conn:
+        rows = conn.execute("SELECT payload FROM job_events WHERE job_id = ? ORDER BY seq", (job_id,)).fetchall()
+    return [json.loads(row["payload"]) for row in rows]
+
+
+class TestJobEventRows:
+    def test_status_change_records_image_and_job_progress(self, job_manager):
+        job = job_manager.create_job([{"filename": "a.jpg"}, {"filename": "b.jpg"}])
+        first, _ = job.images
+        job_manager.update_image_status(job.job_id, first, JobStatus.PROCESSING)
+        job_manager.update_image_status(job.job_id, first, JobStatus.COMPLETED, download_url="/d/a.png")
+
+        processing, completed = _events(job.job_id)
+        assert processing["image"]["status"] == "processing"
+        assert processing["status"] == "processing"
+        assert processing["completed_count"] == 0
+        assert completed["image"]["status"] == "completed"
+        assert completed["image"]["download_url"] == "/d/a.png"
+        assert completed["progress"] == 0.5
+        assert completed["total_count"] == 2
+
+    def test_events_are_deleted_with_their_job(self, job_manager):
+        job = job_manager.create_job([{"filename": "a.jpg"}])
+        job_manager.update_image_status(job.job_id, next(iter(job.images)), JobStatus.PROCESSING)
+        job_manager.delete_job(job.job_id)
+        assert _events(job.job_id) == []
+
+
+class TestJobEventHub:
+    async def test_delivers_only_the_subscribed_jobs_events(self, job_manager, fast_hub):
+        watched = job_manager.create_job([{"filename": "a.jpg"}])
+        other = job_manager.create_job([{"filename": "b.jpg"}])
+        events = fast_hub.subscribe(watched.job_id)
+        try:
+            job_manager.update_image_status(other.job_id, next(iter(other.images)), JobStatus.COMPLETED)
+            job_manager.update_image_status(watched.job_id, next(iter(watched.images)), JobStatus.COMPLETED)
+            event = await asyncio.wait_for(events.get(), 2)
+        finally:
+            fast_hub.unsubscribe(watched.job_id, events)
+
+        assert event.job_id == watched.job_id
+        assert event.status == JobStatus.COMPLETED
+        assert events.empty()
+
+    async def test_reader_stops_when_the_last_stream_closes(self, job_manager, fast_hub):
+        job = job_manager.create_job([{"filename": "a.jpg"}])
+        events = fast_hub.subscribe(job.job_id)
+        reader = fast_hub._thread
+        assert reader is not None and reader.is_alive()
+
+        fast_hub.unsubscribe(job.job_id, events)
+        reader.join(timeout=2)
+        assert not reader.is_alive()
+        assert fast_hub.subscriber_count() == 0
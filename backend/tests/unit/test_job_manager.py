@@ -97,6 +97,12 @@ class TestJobManager:
         assert retrieved is not None
         assert retrieved.job_id == job.job_id
 
+    def test_output_format_persisted(self, job_manager: JobManager):
+        job = job_manager.create_job([{"filename": "a.jpg"}], output_format="webp")
+        retrieved = job_manager.get_job(job.job_id)
+        assert retrieved is not None
+        assert all(img.output_format == "webp" for img in retrieved.images.values())
+
     def test_get_nonexistent_job(self, job_manager: JobManager):
         assert job_manager.get_job("nonexistent") is None
 
@@ -122,6 +128,30 @@ class TestJobManager:
         assert updated is not None
         assert updated.images[image_id].error == "Processing failed"
 
+    def test_each_start_counts_as_an_attempt(self, job_manager: JobManager):
+        job = job_manager.create_job([{"filename": "a.jpg"}])
+        image_id = list(job.images.keys())[0]
+        assert job_manager.get_attempts(image_id) == 0
+
+        job_manager.update_image_status(job.job_id, image_id, JobStatus.PROCESSING)
+        job_manager.update_image_status(job.job_id, image_id, JobStatus.PENDING)
+        job_manager.update_image_status(job.job_id, image_id, JobStatus.PROCESSING)
+        job_manager.update_image_status(job.job_id, image_id, JobStatus.COMPLETED)
+
+        assert job_manager.get_attempts(image_id) == 2
+
+    def test_partly_finished_job_is_processing(self, job_manager: JobManager):
+        """Images of one batch finished by one task while another task has not started yet."""
+        job = job_manager.create_job([{"filename": "a.jpg"}, {"filename": "b.jpg"}, {"filename": "c.jpg"}])
+        first, second, third = job.images
+
+        job_manager.update_image_status(job.job_id, first, JobStatus.COMPLETED)
+        job_manager.update_image_status(job.job_id, second, JobStatus.FAILED, error="boom")
+        assert job_manager.get_job(job.job_id).status == JobStatus.PROCESSING  # type: ignore[union-attr]
+
+        job_manager.update_image_status(job.job_id, third, JobStatus.COMPLETED)
+        assert job_manager.get_job(job.job_id).status == JobStatus.COMPLETED  # type: ignore[union-attr]
+
     def test_update_nonexistent_job(self, job_manager: JobManager):
         # Should not raise
         job_manager.update_image_status("fake", "fake", JobStatus.COMPLETED)
@@ -182,3 +212,26 @@ class TestJobManager:
         assert retrieved is not None
         assert retrieved.images[image_id].status == JobStatus.COMPLETED
         assert retrieved.images[image_id].download_url == "/dl"
+
+
+def test_init_db_migrates_output_format_column(tmp_path):
+    """Databases created before output formats existed gain the column on start-up."""
+    from app.db.database import init_db, reset_db_path, set_db_path
+
+    set_db_path(tmp_path / "old.db")
+    try:
+        with get_connection() as conn:
+            conn.execute(
+                "CREATE TABLE job_images (image_id TEXT PRIMARY KEY, job_id TEXT NOT NULL, "
+                "original_filename TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', download_url TEXT, error TEXT)"
+            )
+            conn.execute("INSERT INTO job_images (image_id, job_id, original_filename) VALUES ('i', 'j', 'a.jpg')")
+            conn.commit()
+
+        init_db()
+
+        with get_connection() as conn:
+            row = conn.execute("SELECT output_format FROM job_images WHERE image_id = 'i'").fetchone()
+        assert row["output_format"] == "png"
+    finally:
+        reset_db_path()
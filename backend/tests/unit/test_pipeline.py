@@ -0,0 +1,113 @@
+"""Tests for the staged processing pipeline."""
+
+import queue
+import threading
+import time
+
+import pytest
+
+from app.services.pipeline import Stage, StagedPipeline
+
+
+def _slow(seconds: float, fn=lambda x: x):
+    def stage(x):
+        time.sleep(seconds)
+        return fn(x)
+
+    return stage
+
+
+class TestStagedPipeline:
+    def test_runs_stages_in_order(self):
+        pipeline = StagedPipeline([Stage("add", lambda x: x + 1), Stage("double", lambda x: x * 2)], queue_size=2)
+        assert pipeline.run(3) == 8
+
+    def test_failure_fails_only_that_item(self):
+        def parse(x: str) -> int:
+            return int(x)
+
+        pipeline = StagedPipeline([Stage("parse", parse), Stage("square", lambda x: x * x)], queue_size=2)
+        good, bad = pipeline.submit("3"), pipeline.submit("x")
+
+        assert good.result(timeout=5) == 9
+        with pytest.raises(ValueError):
+            bad.result(timeout=5)
+
+    def test_batching_stage_takes_queued_items(self):
+        calls: list[int] = []
+
+        def batch(values: list[int]) -> list[int]:
+            calls.append(len(values))
+            return [v * 10 for v in values]
+
+        pipeline = StagedPipeline([Stage("batch", batch, batch_size=3, max_wait=1.0)], queue_size=3)
+        futures = [pipeline.submit(i) for i in range(3)]
+
+        assert [f.result(timeout=5) for f in futures] == [0, 10, 20]
+        assert calls == [3]
+
+    def test_batch_result_exception_fails_one_item(self):
+        pipeline = StagedPipeline(
+            [Stage("batch", lambda values: [ValueError("bad") if v < 0 else v for v in values], batch_size=2)],
+            queue_size=2,
+        )
+        good, bad = pipeline.submit(1), pipeline.submit(-1)
+
+        assert good.result(timeout=5) == 1
+        with pytest.raises(ValueError, match="bad"):
+            bad.result(timeout=5)
+
+    def test_stages_overlap(self):
+        pipeline = StagedPipeline([Stage("a", _slow(0.05)), Stage("b", _slow(0.05))], queue_size=4)
+        started = time.perf_counter()
+        futures = [pipeline.submit(i) for i in range(6)]
+        for f in futures:
+            f.result(timeout=5)
+
+        # Back to back this takes 6 x 2 x 50 ms; overlapped about 7 x 50 ms.
+        assert time.perf_counter() - started < 0.5
+
+    def test_bounded_queue_blocks_submit(self):
+        release = threading.Event()
+        pipeline = StagedPipeline([Stage("wait", lambda x: release.wait(5) and x)], queue_size=1)
+        pipeline.submit(0)
+        time.sleep(0.05)  # let the stage thread take the first item
+        pipeline.submit(1)  # fills the queue
+
+        blocked = threading.Thread(target=pipeline.submit, args=(2,), daemon=True)
+        blocked.start()
+        blocked.join(0.1)
+        assert blocked.is_alive()
+
+        release.set()
+        blocked.join(5)
+        assert not blocked.is_alive()
+
+    def test_submit_gives_up_after_timeout(self):
+        release = threading.Event()
+        pipeline = StagedPipeline([Stage("wait", lambda x: release.wait(5) and x)], queue_size=1)
+        pipeline.submit(0)
+        time.sleep(0.05)
+        pipeline.submit(1)
+
+        with pytest.raises(queue.Full):
+            pipeline.submit(2, timeout=0.05)
+        release.set()
+
+    def test_stats_report_bottleneck(self):
+        pipeline = StagedPipeline([Stage("fast", lambda x: x), Stage("slow", _slow(0.02))], queue_size=4)
+        for f in [pipeline.submit(i) for i in range(5)]:
+            f.result(timeout=5)
+
+        stats = pipeline.stats()
+        assert stats["completed"] == 5
+        assert [s["items"] for s in stats["stages"]] == [5, 5]
+        assert stats["bottleneck"] == "slow"
+        slow = stats["stages"][1]
+        assert slow["busy_seconds"] >= 0.1
+        assert 0 < slow["utilization"] <= 1
+
+    def test_stats_before_start(self):
+        stats = StagedPipeline([Stage("a", lambda x: x)], queue_size=1).stats()
+        assert stats["bottleneck"] is None
+        assert stats["stages"][0]["utilization"] == 0.0
@@ -0,0 +1,99 @@
+"""Tests for INT8 model variants."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from app.services import quantization
+from app.services.inference import MODEL_SPECS, ModelSpec, get_model_spec, predict_masks
+from app.services.quantization import QuantizedSession, mask_iou, quantize_model
+from app.services.runtime_profile import RuntimeProfile
+
+
+class TestInt8Specs:
+    def test_every_model_has_int8_variant(self):
+        for name, spec in list(MODEL_SPECS.items()):
+            if spec.base_model is None:
+                variant = get_model_spec(f"{name}-int8")
+                assert variant.base_model == name
+                assert variant.input_size == spec.input_size
+                assert variant.sigmoid == spec.sigmoid
+                assert variant.memory_mb < spec.memory_mb
+
+
+class TestMaskIou:
+    def test_identical_masks(self):
+        mask = np.zeros((4, 4), dtype=np.uint8)
+        mask[:2] = 255
+        assert mask_iou(mask, mask) == 1.0
+
+    def test_partial_overlap(self):
+        a = np.zeros((4, 4), dtype=np.uint8)
+        b = np.zeros((4, 4), dtype=np.uint8)
+        a[:2] = 255
+        b[1:3] = 255
+        assert mask_iou(a, b) == pytest.approx(4 / 12)
+
+    def test_both_empty(self):
+        empty = np.zeros((4, 4), dtype=np.uint8)
+        assert mask_iou(empty, empty) == 1.0
+
+
+class TestQuantizedSession:
+    def test_missing_model_explains_how_to_build(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(quantization, "quantized_model_path", lambda name: tmp_path / f"{name}-int8.onnx")
+        with pytest.raises(FileNotFoundError, match="app.commands.quantize build u2netp"):
+            QuantizedSession(get_model_spec("u2netp-int8"), None)
+
+
+class TestQuantizeModel:
+    @pytest.fixture
+    def tiny_model(self, tmp_path, monkeypatch):
+        """A one-conv ONNX model registered as ``tiny`` with a ``tiny-int8`` variant."""
+        onnx = pytest.importorskip("onnx")
+        from onnx import TensorProto, helper, numpy_helper
+
+        weights = numpy_helper.from_array(np.full((1, 3, 1, 1), 0.3, dtype=np.float32), "w")
+        graph = helper.make_graph(
+            [helper.make_node("Conv", ["input", "w"], ["output"])],
+            "tiny",
+            [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", 3, 16, 16])],
+            [helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch", 1, 16, 16])],
+            initializer=[weights],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        model.ir_version = 8
+        fp32_path = tmp_path / "tiny.onnx"
+        onnx.save(model, fp32_path)
+
+        monkeypatch.setattr(quantization, "fp32_model_path", lambda name: tmp_path / f"{name}.onnx")
+        monkeypatch.setattr(quantization, "quantized_model_path", lambda name: tmp_path / f"{name}-int8.onnx")
+        monkeypatch.setitem(MODEL_SPECS, "tiny", ModelSpec("tiny", (16, 16), sigmoid=True))
+        monkeypatch.setitem(MODEL_SPECS, "tiny-int8", ModelSpec("tiny-int8", (16, 16), sigmoid=True, base_model="tiny"))
+        return fp32_path
+
+    def test_dynamic_quantization_matches_fp32(self, tiny_model):
+        import onnxruntime as ort
+
+        path = quantize_model("tiny")
+        assert path.exists()
+
+        opts = RuntimeProfile(intra_op_threads=1).session_options()
+        int8 = QuantizedSession(get_model_spec("tiny-int8"), opts)
+        fp32 = SimpleNamespace(
+            model_name="tiny",
+            inner_session=ort.InferenceSession(str(tiny_model), opts, providers=["CPUExecutionProvider"]),
+        )
+
+        img = Image.new("RGB", (40, 30), color=(230, 230, 230))
+        ImageDraw.Draw(img).ellipse((8, 6, 32, 24), fill=(30, 60, 120))
+        expected = predict_masks(fp32, [img], get_model_spec("tiny"), 1)[0]
+        actual = predict_masks(int8, [img], get_model_spec("tiny-int8"), 1)[0]
+        assert 0 < (expected >= 128).sum() < expected.size
+        assert mask_iou(expected, actual) > 0.9
+
+    def test_static_quantization_requires_calibration_images(self, tiny_model):
+        with pytest.raises(ValueError, match="calibration images"):
+            quantize_model("tiny", static=True)
@@ -0,0 +1,63 @@
+"""Tests for the classification of worker failures, retry backoff and the quarantine table."""
+
+import sqlite3
+from unittest.mock import patch
+
+from app.config import settings
+from app.services.engine import EngineDiedError, EngineError, EngineTimeoutError
+from app.services.quarantine import (
+    PipelineBusyError,
+    ProcessingTimeoutError,
+    StorageUnavailableError,
+    backoff_delay,
+    is_transient,
+    quarantine_count,
+    quarantine_image,
+    quarantined_images,
+)
+
+
+class TestIsTransient:
+    def test_timeouts_storage_and_lost_engine_processes_are_transient(self):
+        for exc in (
+            ProcessingTimeoutError("slow"),
+            PipelineBusyError("queued"),
+            StorageUnavailableError("disk"),
+            EngineDiedError("died"),
+            EngineTimeoutError("slow"),
+            sqlite3.OperationalError("database is locked"),
+        ):
+            assert is_transient(exc), exc
+
+    def test_bad_inputs_are_not_transient(self):
+        # A decode error from PIL is an OSError, but fails the same way every time.
+        for exc in (ValueError("Original image not found"), OSError("image file is truncated"), EngineError("bad")):
+            assert not is_transient(exc), exc
+
+
+class TestBackoffDelay:
+    def test_doubles_per_attempt_up_to_the_cap(self):
+        with (
+            patch.object(settings, "retry_backoff_seconds", 5.0),
+            patch.object(settings, "retry_backoff_max_seconds", 30.0),
+        ):
+            assert [backoff_delay(n) for n in range(1, 6)] == [5.0, 10.0, 20.0, 30.0, 30.0]
+
+
+class TestQuarantine:
+    def test_records_diagnostics(self, _patch_settings):
+        image = {"image_id": "img-1", "original_path": "/o/a.png", "filename": "a.png", "pixels": 1200}
+        try:
+            raise EngineTimeoutError("Engine process took longer than 60s")
+        except EngineTimeoutError as e:
+            quarantine_image("job-1", image, "u2netp", 3, e)
+
+        assert quarantine_count() == 1
+        [entry] = quarantined_images()
+        assert entry["image_id"] == "img-1"
+        assert entry["model"] == "u2netp"
+        assert entry["pixels"] == 1200
+        assert entry["attempts"] == 3
+        assert entry["error"] == "EngineTimeoutError: Engine process took longer than 60s"
+        assert "Traceback" in entry["traceback"]
+        assert entry["worker_id"]
@@ -1,10 +1,13 @@
 """Tests for Huey task queue setup and task registration."""
 
-from unittest.mock import MagicMock, patch
+import time
+from unittest.mock import patch
 
+import numpy as np
 import pytest
+from huey.exceptions import RetryTask
 
-from tests.conftest import create_test_image
+from tests.conftest import create_test_image, fake_session
 
 
 class TestHueyQueue:
@@ -15,6 +18,13 @@ class TestHueyQueue:
         assert huey.name == "clearcut"
         assert "huey.db" in str(huey.storage_kwargs.get("filename", ""))
 
+    def test_queue_serves_by_priority_with_fifo_guard(self):
+        from app.config import settings
+        from app.tasks.queue import FairSqliteStorage, huey
+
+        assert isinstance(huey.storage, FairSqliteStorage)
+        assert huey.storage.fifo_every == settings.queue_fifo_every
+
     def test_tasks_registered(self):
         """Worker tasks should be registered with the Huey instance."""
         import app.tasks.worker  # noqa: F401
@@ -25,9 +35,75 @@ class TestHueyQueue:
         assert any("process_batch_task" in name for name in task_names)
 
 
+class TestWorkerStartup:
+    @pytest.fixture
+    def worker(self, _patch_settings, monkeypatch):
+        from app.services.worker_health import WorkerRegistry
+        from app.tasks import worker
+
+        monkeypatch.setattr(worker, "worker_registry", WorkerRegistry(interval_seconds=60))
+        monkeypatch.setattr(worker, "_active_threads", 0)
+        monkeypatch.setattr(worker, "_warmed", False)
+        yield worker
+        worker.worker_registry.stop()
+
+    def test_startup_hooks_registered(self):
+        from app.tasks.queue import huey
+
+        assert "start_worker" in huey._startup
+        assert "stop_worker" in huey._shutdown
+
+    def test_first_thread_warms_up_once(self, worker):
+        """Every worker thread runs the hook; only the first loads and warms the sessions."""
+        session = fake_session()
+        with (
+            patch("app.tasks.worker._get_session", return_value=session) as get_session,
+            patch.object(worker.settings, "microbatch_enabled", False),
+            patch.object(worker.settings, "inference_batch_size", 2),
+        ):
+            worker.start_worker()
+            worker.start_worker()
+
+        # The tier defaults, the models requests without ``model`` are served with.
+        loaded = [call.args[0] for call in get_session.call_args_list]
+        assert list(dict.fromkeys(loaded)) == ["birefnet-general-lite", "birefnet-general"]
+        # One single-image run and one full batch per model.
+        batch_sizes = [next(iter(call.args[1].values())).shape[0] for call in session.inner_session.run.call_args_list]
+        assert sorted(batch_sizes) == [1, 1, 2, 2]
+        [status] = worker.worker_registry.workers()
+        assert status["ready"]
+        assert status["models"] == ["birefnet-general-lite", "birefnet-general"]
+
+    def test_failed_warm_up_reports_degraded(self, worker):
+        with patch("app.tasks.worker.warm_up", side_effect=RuntimeError("download failed")):
+            worker.start_worker()
+
+        [status] = worker.worker_registry.workers()
+        assert status["status"] == "degraded"
+        assert not status["ready"]
+
+    def test_heartbeat_reports_micro_batching(self, worker):
+        with patch("app.tasks.worker.warm_up"):
+            worker.start_worker()
+
+        [status] = worker.worker_registry.workers()
+        assert status["pipeline"]["microbatch"] == worker.micro_batcher.stats()
+        assert "admission" in status["pipeline"]
+
+    def test_heartbeat_removed_after_last_thread_stops(self, worker):
+        with patch("app.tasks.worker.warm_up"):
+            worker.start_worker()
+            worker.start_worker()
+
+        worker.stop_worker()
+        assert len(worker.worker_registry.workers()) == 1
+        worker.stop_worker()
+        assert worker.worker_registry.workers() == []
+
+
 class TestProcessImageTask:
-    def test_task_calls_rembg(self, _patch_settings):
-        """process_image_task should invoke rembg and update job status."""
+    def test_task_runs_inference(self, _patch_settings):
+        """process_image_task should run the session and update job status."""
         from app.services.job_manager import job_manager
 
         job = job_manager.create_job([{"filename": "test.jpg"}])
@@ -42,18 +118,15 @@ class TestProcessImageTask:
         with open(original_path, "wb") as f:
             f.write(create_test_image())
 
-        fake_processed = b"\x89PNG-fake-output"
-        mock_session = MagicMock()
+        mock_session = fake_session()
 
-        with (
-            patch("rembg.remove", return_value=fake_processed),
-            patch("app.tasks.worker._get_session", return_value=mock_session),
-        ):
+        with patch("app.tasks.worker._get_session", return_value=mock_session):
             from app.tasks.worker import process_image_task
 
             result = process_image_task.call_local(job.job_id, image_id, original_path, "test.jpg")
 
         assert result is not None
+        mock_session.inner_session.run.assert_called_once()
 
         updated = job_manager.get_job(job.job_id)
         assert updated is not None
@@ -61,6 +134,63 @@ class TestProcessImageTask:
 
         assert updated.images[image_id].status == JobStatus.COMPLETED
 
+    def test_task_stores_result_in_cache(self, _patch_settings):
+        """A processed image should be cached under its content hash and model."""
+        from app.config import settings
+        from app.services.job_manager import job_manager
+        from app.services.result_cache import cache_key, result_cache
+        from app.tasks.worker import process_image_task
+
+        job = job_manager.create_job([{"filename": "test.jpg"}])
+        image_id = list(job.images.keys())[0]
+        data = create_test_image(40, 30)
+        path = settings.original_dir / "test.jpg"
+        path.write_bytes(data)
+
+        with patch("app.tasks.worker._get_session", return_value=fake_session()):
+            process_image_task.call_local(job.job_id, image_id, str(path), "test.jpg", "birefnet-general")
+
+        assert result_cache.get(cache_key(data, "birefnet-general", format="png", refine_edges=False)) is not None
+
+    def test_animated_input_saved_as_animated_webp(self, _patch_settings):
+        from PIL import Image
+
+        from app.config import settings
+        from app.services.job_manager import job_manager
+        from app.tasks.worker import process_image_task
+        from tests.unit.test_animation import CORNER_CUT, _animated_webp
+
+        job = job_manager.create_job([{"filename": "anim.webp"}])
+        image_id = list(job.images.keys())[0]
+        path = settings.original_dir / "anim.webp"
+        path.write_bytes(_animated_webp([0, 30]))
+
+        with patch("app.tasks.worker._get_session", return_value=fake_session("u2netp", 320, CORNER_CUT)):
+            saved = process_image_task.call_local(job.job_id, image_id, str(path), "anim.webp", "u2netp")
+
+        assert saved.endswith("anim.webp")
+        assert Image.open(saved).is_animated
+
+    def test_existing_cutout_skips_inference(self, _patch_settings):
+        from app.config import settings
+        from app.services.job_manager import job_manager
+        from app.tasks.worker import process_image_task
+        from tests.unit.test_transparency import _cutout, _png
+
+        job = job_manager.create_job([{"filename": "cutout.png"}])
+        image_id = list(job.images.keys())[0]
+        path = settings.original_dir / "cutout.png"
+        path.write_bytes(_png(_cutout()))
+
+        with patch("app.tasks.worker._get_session") as mock_get_session:
+            process_image_task.call_local(job.job_id, image_id, str(path), "cutout.png")
+
+        mock_get_session.assert_not_called()
+        updated = job_manager.get_job(job.job_id)
+        assert updated is not None
+        assert updated.images[image_id].status == "completed"
+        assert updated.images[image_id].inference_skipped
+
     def test_task_handles_failure(self, _patch_settings):
         """process_image_task should mark image as FAILED on error."""
         from app.services.job_manager import job_manager
@@ -79,3 +209,340 @@ class TestProcessImageTask:
         from app.models.schemas import JobStatus
 
         assert updated.images[image_id].status == JobStatus.FAILED
+
+
+class TestProcessBatchTask:
+    def test_batch_runs_single_session_call(self, _patch_settings):
+        """Without the pipeline, process_batch_task should run one batched inference call and complete every image."""
+        from app.config import settings
+        from app.models.schemas import JobStatus
+        from app.services.job_manager import job_manager
+
+        filenames = [f"img{i}.jpg" for i in range(3)]
+        job = job_manager.create_job([{"filename": name} for name in filenames])
+        job_dir = settings.original_dir / job.job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+
+        batch = []
+        for image_id, name in zip(job.images.keys(), filenames, strict=True):
+            path = job_dir / name
+            path.write_bytes(create_test_image(40, 30))
+            batch.append({"image_id": image_id, "original_path": str(path), "filename": name})
+
+        mock_session = fake_session()
+
+        with (
+            patch("app.tasks.worker._get_session", return_value=mock_session),
+            patch.object(settings, "inference_batch_size", 4),
+            patch.object(settings, "pipeline_enabled", False),
+        ):
+            from app.tasks.worker import process_batch_task
+
+            process_batch_task.call_local(job.job_id, batch)
+
+        assert mock_session.inner_session.run.call_count == 1
+        updated = job_manager.get_job(job.job_id)
+        assert updated is not None
+        assert all(img.status == JobStatus.COMPLETED for img in updated.images.values())
+
+    def test_batch_through_pipeline(self, _patch_settings):
+        """With the pipeline, every image goes through inference once and completes."""
+        from app.config import settings
+        from app.models.schemas import JobStatus
+        from app.services.job_manager import job_manager
+        from app.tasks.worker import image_pipeline, process_batch_task
+
+        job = job_manager.create_job([{"filename": f"img{i}.jpg"} for i in range(5)])
+        batch = []
+        for i, image_id in enumerate(job.images):
+            path = settings.original_dir / f"img{i}.jpg"
+            path.write_bytes(create_test_image(40, 30))
+            batch.append({"image_id": image_id, "original_path": str(path), "filename": f"img{i}.jpg"})
+
+        mock_session = fake_session()
+        with patch("app.tasks.worker._get_session", return_value=mock_session):
+            process_batch_task.call_local(job.job_id, batch)
+
+        inferred = sum(next(iter(c[0][1].values())).shape[0] for c in mock_session.inner_session.run.call_args_list)
+        assert inferred == 5
+        updated = job_manager.get_job(job.job_id)
+        assert updated is not None
+        assert all(img.status == JobStatus.COMPLETED for img in updated.images.values())
+        assert [s["name"] for s in image_pipeline.stats()["stages"]] == ["decode", "infer", "encode"]
+
+    def test_encode_stage_loads_session_only_for_tiling(self, _patch_settings):
+        """A session is only fetched in the encode stage when the image is large enough to be tiled."""
+        from app.config import settings
+        from app.services.inference import SourceImage
+        from app.tasks.worker import _encode_and_save, _ImageWork
+
+        def work() -> _ImageWork:
+            data = create_test_image(40, 30)
+            return _ImageWork(
+                "job-1",
+                {"image_id": "img-1", "original_path": "", "filename": "a.jpg"},
+                "birefnet-general",
+                "png",
+                False,
+                data=data,
+                source=SourceImage(data),
+                mask=np.full((30, 40), 255, dtype=np.uint8),
+            )
+
+        with patch("app.tasks.worker._get_session", return_value=fake_session()) as get_session:
+            _encode_and_save(work())
+            get_session.assert_not_called()
+            with patch.object(settings, "tiled_min_pixels", 100), patch.object(settings, "tile_size", 64):
+                _encode_and_save(work())
+            get_session.assert_called_once_with("birefnet-general")
+
+    def test_batch_skips_inference_for_existing_cutouts(self, _patch_settings):
+        from app.config import settings
+        from app.services.job_manager import job_manager
+        from app.tasks.worker import process_batch_task
+        from tests.unit.test_transparency import _cutout, _png
+
+        job = job_manager.create_job([{"filename": "photo.jpg"}, {"filename": "cutout.png"}])
+        photo_id, cutout_id = job.images.keys()
+        photo, cutout = settings.original_dir / "photo.jpg", settings.original_dir / "cutout.png"
+        photo.write_bytes(create_test_image(40, 30))
+        cutout.write_bytes(_png(_cutout()))
+        batch = [
+            {"image_id": photo_id, "original_path": str(photo), "filename": "photo.jpg"},
+            {"image_id": cutout_id, "original_path": str(cutout), "filename": "cutout.png"},
+        ]
+
+        mock_session = fake_session()
+        with patch("app.tasks.worker._get_session", return_value=mock_session):
+            process_batch_task.call_local(job.job_id, batch)
+
+        assert next(iter(mock_session.inner_session.run.call_args[0][1].values())).shape[0] == 1
+        updated = job_manager.get_job(job.job_id)
+        assert updated is not None
+        assert not updated.images[photo_id].inference_skipped
+        assert updated.images[cutout_id].inference_skipped
+
+    def test_batch_isolates_missing_file(self, _patch_settings):
+        """A missing original should fail only that image."""
+        from app.models.schemas import JobStatus
+        from app.services.job_manager import job_manager
+        from app.tasks.worker import process_batch_task
+
+        job = job_manager.create_job([{"filename": "gone.jpg"}])
+        image_id = list(job.images.keys())[0]
+
+        with patch("app.tasks.worker._get_session") as mock_get_session:
+            process_batch_task.call_local(
+                job.job_id, [{"image_id": image_id, "original_path": "/nonexistent/gone.jpg", "filename": "gone.jpg"}]
+            )
+
+        mock_get_session.assert_not_called()
+        updated = job_manager.get_job(job.job_id)
+        assert updated is not None
+        assert updated.images[image_id].status == JobStatus.FAILED
+
+
+class TestRetries:
+    @pytest.fixture
+    def single(self, _patch_settings):
+        from app.config import settings
+        from app.services.job_manager import job_manager
+
+        job = job_manager.create_job([{"filename": "test.jpg"}])
+        image_id = list(job.images.keys())[0]
+        path = settings.original_dir / "test.jpg"
+        path.write_bytes(create_test_image(40, 30))
+        return job.job_id, image_id, str(path)
+
+    def test_storage_failure_is_retried_with_backoff(self, single):
+        from app.config import settings
+        from app.models.schemas import JobStatus
+        from app.services.job_manager import job_manager
+        from app.tasks.worker import process_image_task, storage
+
+        job_id, image_id, path = single
+        with (
+            patch.object(storage, "map_file", side_effect=OSError("disk unavailable")),
+            patch.object(settings, "retry_backoff_seconds", 7.0),
+            pytest.raises(RetryTask) as retry,
+        ):
+            process_image_task.call_local(job_id, image_id, path, "test.jpg")
+
+        assert retry.value.delay == 7.0
+        assert job_manager.get_job(job_id).images[image_id].status == JobStatus.PENDING  # type: ignore[union-attr]
+
+    def test_repeated_failures_are_quarantined(self, single):
+        from app.config import settings
+        from app.models.schemas import JobStatus
+        from app.services.job_manager import job_manager
+        from app.services.quarantine import StorageUnavailableError, quarantined_images
+        from app.tasks.worker import process_image_task, storage
+
+        job_id, image_id, path = single
+        with (
+            patch.object(storage, "map_file", side_effect=OSError("disk unavailable")),
+            patch.object(settings, "task_max_attempts", 2),
+        ):
+            with pytest.raises(RetryTask):
+                process_image_task.call_local(job_id, image_id, path, "test.jpg")
+            with pytest.raises(StorageUnavailableError):
+                process_image_task.call_local(job_id, image_id, path, "test.jpg")
+
+        image = job_manager.get_job(job_id).images[image_id]  # type: ignore[union-attr]
+        assert image.status == JobStatus.FAILED
+        assert image.error is not None and image.error.startswith("Failed 2 times")
+        [entry] = quarantined_images()
+        assert entry["image_id"] == image_id
+        assert entry["attempts"] == 2
+        assert "disk unavailable" in entry["traceback"]
+
+    def test_bad_input_is_not_retried(self, single):
+        from app.services.quarantine import quarantine_count
+        from app.tasks.worker import process_image_task
+
+        job_id, image_id, path = single
+        with open(path, "wb") as f:
+            f.write(b"not an image")
+
+        with pytest.raises(Exception) as failure:
+            process_image_task.call_local(job_id, image_id, path, "test.jpg")
+
+        assert not isinstance(failure.value, RetryTask)
+        assert quarantine_count() == 0
+
+    def test_pipeline_deadline(self, single):
+        from concurrent.futures import Future
+
+        from app.config import settings
+        from app.services.admission import pixel_budget
+        from app.tasks.worker import image_pipeline, process_image_task
+
+        job_id, image_id, path = single
+        stuck: Future = Future()
+        started = []
+
+        def start_inference(work, timeout=None):
+            work.infer_started = time.monotonic()
+            work.reached_infer.set()
+            started.append(work)
+            return stuck
+
+        with (
+            patch.object(image_pipeline, "submit", side_effect=start_inference),
+            patch.object(settings, "processing_timeout", 0.05),
+            pytest.raises(RetryTask, match="not processed within"),
+        ):
+            process_image_task.call_local(job_id, image_id, path, "test.jpg", pixels=1200)
+
+        # The encode stage skips the image; the retry processes it again.
+        assert started[0].cancelled
+        # The image's pixels stay reserved until it really leaves the pipeline.
+        assert pixel_budget.stats()["in_flight_pixels"] == 1200
+        stuck.set_result(None)
+        assert pixel_budget.stats()["in_flight_pixels"] == 0
+
+    def test_waiting_behind_other_images_is_not_an_attempt(self, single):
+        from concurrent.futures import Future
+
+        from app.config import settings
+        from app.services.job_manager import job_manager
+        from app.services.quarantine import quarantine_count
+        from app.tasks.worker import image_pipeline, process_image_task
+
+        job_id, image_id, path = single
+        queued: Future = Future()  # never reaches the infer stage
+        with (
+            patch.object(image_pipeline, "submit", return_value=queued),
+            patch.object(settings, "pipeline_queue_timeout", 0.05),
+            patch.object(settings, "processing_timeout", 0.05),
+            patch.object(settings, "task_max_attempts", 1),
+        ):
+            for _ in range(2):
+                with pytest.raises(RetryTask, match="did not reach inference"):
+                    process_image_task.call_local(job_id, image_id, path, "test.jpg", pixels=1200)
+
+        assert job_manager.get_attempts(image_id) == 0
+        assert quarantine_count() == 0
+        queued.set_result(None)
+
+    def test_busy_retries_are_capped(self, single):
+        from concurrent.futures import Future
+
+        from app.config import settings
+        from app.services.quarantine import PipelineBusyError, quarantine_count
+        from app.tasks.worker import image_pipeline, process_image_task
+
+        job_id, image_id, path = single
+        queued: Future = Future()  # inference is stuck for good
+        with (
+            patch.object(image_pipeline, "submit", return_value=queued),
+            patch.object(settings, "pipeline_queue_timeout", 0.05),
+            patch.object(settings, "task_max_attempts", 1),
+            patch.object(settings, "task_max_busy_retries", 1),
+        ):
+            with pytest.raises(RetryTask):
+                process_image_task.call_local(job_id, image_id, path, "test.jpg", pixels=1200)
+            with pytest.raises(PipelineBusyError):
+                process_image_task.call_local(job_id, image_id, path, "test.jpg", pixels=1200)
+
+        assert quarantine_count() == 1
+        queued.set_result(None)
+
+    def test_stages_skip_images_their_task_gave_up_on(self, _patch_settings):
+        from concurrent.futures import CancelledError
+
+        from app.tasks.worker import _encode_and_save, _ImageWork, _infer, _read_and_decode
+
+        image = {"image_id": "img", "original_path": "missing.jpg", "filename": "test.jpg"}
+        work = _ImageWork("job", image, "birefnet-general", "png", False, cancelled=True)
+        with pytest.raises(CancelledError):
+            _read_and_decode(work)
+        with pytest.raises(CancelledError):
+            _encode_and_save(work)
+
+        work.model_input = np.zeros((1, 3, 1024, 1024), dtype=np.float32)
+        with patch("app.tasks.worker.predict_masks") as predict:
+            [result] = _infer([work])
+        assert isinstance(result, CancelledError)
+        assert work.model_input is None
+        predict.assert_not_called()
+
+    def test_full_pixel_budget_requeues_image(self, single):
+        from app.config import settings
+        from app.services.admission import pixel_budget
+        from app.services.job_manager import job_manager
+        from app.tasks.worker import process_image_task
+
+        job_id, image_id, path = single
+        with (
+            patch.object(settings, "pipeline_queue_timeout", 0.05),
+            patch.object(pixel_budget, "acquire", return_value=False),
+            pytest.raises(RetryTask, match="pixel budget"),
+        ):
+            process_image_task.call_local(job_id, image_id, path, "test.jpg", pixels=1200)
+
+        assert job_manager.get_attempts(image_id) == 0
+
+    def test_batch_image_retried_as_single_task(self, _patch_settings):
+        from app.config import settings
+        from app.models.api_key import Tier
+        from app.services.job_manager import job_manager
+        from app.services.scheduling import job_priority
+        from app.tasks.worker import process_batch_task, process_image_task, storage
+
+        job = job_manager.create_job([{"filename": "a.jpg"}], tier=Tier.PRO)
+        image_id = list(job.images.keys())[0]
+        image = {"image_id": image_id, "original_path": "/o/a.jpg", "filename": "a.jpg", "pixels": 1200}
+
+        with (
+            patch.object(storage, "map_file", side_effect=OSError("disk unavailable")),
+            patch.object(settings, "pipeline_enabled", False),
+            patch.object(process_image_task, "schedule") as schedule,
+        ):
+            process_batch_task.call_local(job.job_id, [image], "u2netp")
+
+        schedule.assert_called_once_with(
+            args=(job.job_id, image_id, "/o/a.jpg", "a.jpg", "u2netp", "png", False, 1200),
+            delay=settings.retry_backoff_seconds,
+            priority=job_priority(job.job_id),
+        )
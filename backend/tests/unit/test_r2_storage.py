@@ -1,5 +1,6 @@
 """Tests for Cloudflare R2 storage backend."""
 
+import io
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -41,6 +42,15 @@ class TestR2SaveOriginal:
         key = await r2_storage.save_original(content, "my image.png", "job-2")
         assert key == "original/job-2/my image.png"
 
+    def test_write_original_streams_file_object(self, r2_storage, mock_s3_client):
+        upload = io.BytesIO(create_test_image())
+        key = r2_storage.write_original(upload, "photo.jpg", "job-3")
+
+        assert key == "original/job-3/photo.jpg"
+        mock_s3_client.put_object.assert_called_once_with(
+            Bucket=r2_storage.bucket_name, Key="original/job-3/photo.jpg", Body=upload
+        )
+
 
 class TestR2SaveProcessed:
     async def test_save_processed_converts_to_png(self, r2_storage, mock_s3_client):
@@ -55,6 +65,12 @@ class TestR2SaveProcessed:
             ContentType="image/png",
         )
 
+    async def test_save_processed_jpeg_content_type(self, r2_storage, mock_s3_client):
+        key = await r2_storage.save_processed(b"data", "photo.png", "job-1", "jpeg")
+
+        assert key == "processed/job-1/photo.jpg"
+        assert mock_s3_client.put_object.call_args.kwargs["ContentType"] == "image/jpeg"
+
 
 class TestR2GetFile:
     async def test_get_file_success(self, r2_storage, mock_s3_client):
@@ -74,6 +90,33 @@ class TestR2GetFile:
         assert result is None
 
 
+class TestR2Sync:
+    def test_read_file_closes_body(self, r2_storage, mock_s3_client):
+        mock_body = MagicMock()
+        mock_body.read.return_value = b"file-content"
+        mock_s3_client.get_object.return_value = {"Body": mock_body}
+
+        assert r2_storage.read_file("original/job-1/photo.jpg") == b"file-content"
+        mock_body.close.assert_called_once()
+
+    def test_open_file_returns_streaming_body(self, r2_storage, mock_s3_client):
+        mock_body = MagicMock()
+        mock_s3_client.get_object.return_value = {"Body": mock_body}
+        assert r2_storage.open_file("original/job-1/photo.jpg") is mock_body
+
+        mock_s3_client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey", "Message": "Not found"}}, "GetObject"
+        )
+        assert r2_storage.open_file("missing/key") is None
+
+    def test_write_processed_uploads_file_object(self, r2_storage, mock_s3_client):
+        body = io.BytesIO(b"data")
+        key = r2_storage.write_processed(body, "photo.png", "job-1", "webp")
+        assert key == "processed/job-1/photo.webp"
+        assert mock_s3_client.put_object.call_args.kwargs["Body"] is body
+        assert mock_s3_client.put_object.call_args.kwargs["ContentType"] == "image/webp"
+
+
 class TestR2DeleteFile:
     async def test_delete_file_success(self, r2_storage, mock_s3_client):
         result = await r2_storage.delete_file("original/job-1/photo.jpg")
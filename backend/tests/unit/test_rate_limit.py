@@ -14,7 +14,6 @@ async def rate_client(_patch_settings):
     with (
         patch("app.api.v1.endpoints.images.process_image_task", MagicMock()),
         patch("app.api.v1.endpoints.images.process_batch_task", MagicMock()),
-        patch("app.services.image_processor.ImageProcessor.__init__", lambda self: None),
     ):
         from app.main import app
 
@@ -0,0 +1,80 @@
+"""Tests for the content-addressed result cache."""
+
+import os
+from unittest.mock import patch
+
+from app.config import settings
+from app.services.result_cache import ResultCache, cache_key
+
+
+class TestCacheKey:
+    def test_same_input_same_key(self):
+        assert cache_key(b"img", "u2netp") == cache_key(b"img", "u2netp")
+
+    def test_model_and_params_change_key(self):
+        base = cache_key(b"img", "u2netp")
+        assert cache_key(b"img", "silueta") != base
+        assert cache_key(b"other", "u2netp") != base
+        assert cache_key(b"img", "u2netp", format="webp") != base
+
+    def test_encoder_settings_change_key(self):
+        base = cache_key(b"img", "u2netp", format="jpeg")
+        for name, value in (
+            ("jpeg_quality", 75),
+            ("jpeg_background", "#000000"),
+            ("png_compress_level", 9),
+            ("webp_method", 6),
+        ):
+            with patch.object(settings, name, value):
+                assert cache_key(b"img", "u2netp", format="jpeg") != base, name
+
+
+class TestResultCache:
+    def test_miss_then_hit(self, tmp_path):
+        cache = ResultCache(tmp_path, max_mb=1)
+        assert cache.get("k") is None
+        cache.put("k", b"result")
+        assert cache.get("k") == b"result"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["entries"] == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ResultCache(tmp_path, max_mb=1)
+        chunk = b"x" * 400 * 1024
+        cache.put("a", chunk)
+        cache.put("b", chunk)
+        cache.get("a")
+        cache.put("c", chunk)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == chunk
+        assert cache.get("c") == chunk
+        assert not (tmp_path / "b").exists()
+
+    def test_index_rebuilt_from_disk_by_mtime(self, tmp_path):
+        chunk = b"x" * 400 * 1024
+        for i, key in enumerate(("old", "new")):
+            (tmp_path / key).write_bytes(chunk)
+            os.utime(tmp_path / key, (i, i))
+
+        cache = ResultCache(tmp_path, max_mb=1)
+        cache.put("newest", chunk)
+
+        assert not (tmp_path / "old").exists()
+        assert (tmp_path / "new").exists()
+
+    def test_sees_entries_written_by_another_process(self, tmp_path):
+        reader = ResultCache(tmp_path, max_mb=1)
+        reader.stats()
+        ResultCache(tmp_path, max_mb=1).put("k", b"result")
+        assert reader.get("k") == b"result"
+
+    def test_disabled_with_zero_size(self, tmp_path):
+        cache = ResultCache(tmp_path, max_mb=0)
+        cache.put("k", b"result")
+        assert cache.get("k") is None
+        assert not list(tmp_path.iterdir())
@@ -0,0 +1,124 @@
+"""Tests for ONNX Runtime profiles and CPU budget detection."""
+
+import json
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from app.commands.autotune import candidate_profiles
+from app.services.runtime_profile import (
+    RuntimeProfile,
+    available_cpus,
+    check_oversubscription,
+    concurrent_sessions,
+    default_profile,
+    load_profile,
+    save_profile,
+)
+
+
+class TestAvailableCpus:
+    def test_cgroup_v2_quota(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("200000 100000\n")
+        with patch("os.sched_getaffinity", return_value=set(range(16))):
+            assert available_cpus(tmp_path) == 2
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        with patch("os.sched_getaffinity", return_value=set(range(8))):
+            assert available_cpus(tmp_path) == 8
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("150000")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000")
+        with patch("os.sched_getaffinity", return_value=set(range(8))):
+            assert available_cpus(tmp_path) == 1
+
+    def test_no_cgroup_uses_affinity(self, tmp_path):
+        with patch("os.sched_getaffinity", return_value=set(range(4))):
+            assert available_cpus(tmp_path) == 4
+
+
+class TestProfiles:
+    def test_default_splits_cores_across_sessions(self):
+        assert default_profile(cpus=8, concurrency=2).intra_op_threads == 4
+        assert default_profile(cpus=1, concurrency=2).intra_op_threads == 1
+
+    def test_concurrent_sessions_follow_where_inference_runs(self):
+        from app.config import settings
+
+        with (
+            patch.object(settings, "worker_count", 4),
+            patch.object(settings, "engine_processes", 0),
+            patch.object(settings, "pipeline_infer_threads", 1),
+        ):
+            with patch.object(settings, "pipeline_enabled", True):
+                assert concurrent_sessions() == 1
+            with patch.object(settings, "pipeline_enabled", False):
+                assert concurrent_sessions() == 4
+            with patch.object(settings, "engine_processes", 3):
+                assert concurrent_sessions() == 3
+
+    def test_invalid_execution_mode(self):
+        with pytest.raises(ValueError, match="execution mode"):
+            RuntimeProfile(intra_op_threads=1, execution_mode="turbo")
+
+    def test_session_options(self):
+        import onnxruntime as ort
+
+        opts = RuntimeProfile(
+            intra_op_threads=3, inter_op_threads=2, execution_mode="parallel", enable_cpu_mem_arena=False
+        ).session_options()
+        assert opts.intra_op_num_threads == 3
+        assert opts.inter_op_num_threads == 2
+        assert opts.execution_mode == ort.ExecutionMode.ORT_PARALLEL
+        assert opts.enable_cpu_mem_arena is False
+
+    def test_oversubscription_warning(self, caplog):
+        profile = RuntimeProfile(intra_op_threads=4)
+        with caplog.at_level(logging.WARNING):
+            assert check_oversubscription(profile, concurrency=2, cpus=4) is True
+        assert "oversubscription" in caplog.text
+        assert check_oversubscription(profile, concurrency=1, cpus=4) is False
+
+
+class TestLoadProfile:
+    def test_saved_profile_wins(self, tmp_path):
+        from app.config import settings
+
+        path = tmp_path / "profile.json"
+        save_profile(RuntimeProfile(intra_op_threads=7, graph_optimization="basic"), path)
+        with patch.object(settings, "runtime_profile_path", path):
+            profile = load_profile()
+        assert profile.intra_op_threads == 7
+        assert profile.graph_optimization == "basic"
+
+    def test_settings_fill_in_without_file(self, tmp_path):
+        from app.config import settings
+
+        with (
+            patch.object(settings, "runtime_profile_path", tmp_path / "missing.json"),
+            patch.object(settings, "ort_intra_op_threads", 5),
+            patch.object(settings, "ort_enable_cpu_mem_arena", False),
+        ):
+            profile = load_profile()
+        assert profile.intra_op_threads == 5
+        assert profile.enable_cpu_mem_arena is False
+
+    def test_invalid_file_falls_back(self, tmp_path):
+        from app.config import settings
+
+        path = tmp_path / "profile.json"
+        path.write_text(json.dumps({"intra_op_threads": 2, "execution_mode": "bogus"}))
+        with patch.object(settings, "runtime_profile_path", path), patch.object(settings, "ort_intra_op_threads", 3):
+            assert load_profile().intra_op_threads == 3
+
+
+class TestAutotuneCandidates:
+    def test_candidates_are_unique_and_include_default(self):
+        candidates = candidate_profiles(cpus=8, concurrency=2)
+        assert len(candidates) == len(set(candidates))
+        assert default_profile(8, 2) in candidates
+        assert any(c.execution_mode == "parallel" for c in candidates)
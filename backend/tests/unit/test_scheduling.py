@@ -0,0 +1,104 @@
+"""Tests for tier-aware queue priority, the starvation guard and queue-wait metrics."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.database import get_connection
+from app.models.api_key import Tier
+from app.models.schemas import JobStatus
+from app.services.scheduling import job_priority, queue_priority, queue_wait_stats, tier_of
+from app.tasks.queue import FairSqliteStorage
+
+
+def _key(tier: str):
+    from app.services.api_key_service import ApiKeyService
+
+    return ApiKeyService().generate_key(f"{tier}@example.com", tier)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    def make(fifo_every: int) -> FairSqliteStorage:
+        return FairSqliteStorage("test", filename=str(tmp_path / f"huey-{fifo_every}.db"), fifo_every=fifo_every)
+
+    return make
+
+
+def _drain(storage: FairSqliteStorage) -> list[bytes]:
+    out = []
+    while (data := storage.dequeue()) is not None:
+        out.append(bytes(data))
+    return out
+
+
+class TestQueuePriority:
+    def test_paid_tiers_rank_above_free(self, _patch_settings):
+        assert queue_priority(_key(Tier.ENTERPRISE)) > queue_priority(_key(Tier.PRO)) > queue_priority(_key(Tier.FREE))
+
+    def test_anonymous_uploads_rank_as_free(self, _patch_settings):
+        assert tier_of(None) == "anonymous"
+        assert queue_priority(None) == queue_priority(_key(Tier.FREE))
+
+    def test_job_priority_from_recorded_tier(self, job_manager):
+        job = job_manager.create_job([{"filename": "a.jpg"}], tier=Tier.PRO)
+        assert job_priority(job.job_id) == queue_priority(_key(Tier.PRO))
+        assert job_priority("unknown") == queue_priority(None)
+
+
+class TestFairSqliteStorage:
+    def test_strict_priority_without_guard(self, storage):
+        queue = storage(0)
+        for data, priority in [(b"free1", 0), (b"free2", 0), (b"ent1", 100), (b"pro1", 50)]:
+            queue.enqueue(data, priority)
+        assert _drain(queue) == [b"ent1", b"pro1", b"free1", b"free2"]
+
+    def test_every_nth_task_is_the_oldest(self, storage):
+        queue = storage(3)
+        for data, priority in [(b"free1", 0), (b"free2", 0), (b"ent1", 100), (b"ent2", 100), (b"ent3", 100)]:
+            queue.enqueue(data, priority)
+        assert _drain(queue) == [b"ent1", b"ent2", b"free1", b"ent3", b"free2"]
+
+    def test_empty_polls_do_not_count(self, storage):
+        queue = storage(2)
+        for _ in range(5):
+            assert queue.dequeue() is None
+        queue.enqueue(b"free", 0)
+        queue.enqueue(b"ent", 100)
+        assert _drain(queue) == [b"ent", b"free"]
+
+
+class TestQueueWaitStats:
+    def test_waits_reported_per_tier(self, job_manager):
+        created = datetime.utcnow() - timedelta(seconds=30)
+        for tier, waits in [("enterprise", [1, 2, 3]), ("anonymous", [10, 20])]:
+            job = job_manager.create_job([{"filename": f"{i}.jpg"} for i in range(len(waits))], tier=tier)
+            with get_connection() as conn:
+                conn.execute("UPDATE jobs SET created_at = ? WHERE job_id = ?", (created.isoformat(), job.job_id))
+                for image_id, wait in zip(job.images, waits, strict=True):
+                    started = (created + timedelta(seconds=wait)).isoformat()
+                    conn.execute("UPDATE job_images SET started_at = ? WHERE image_id = ?", (started, image_id))
+                conn.commit()
+
+        tiers = queue_wait_stats()["tiers"]
+        assert tiers["enterprise"]["images"] == 3
+        assert tiers["enterprise"]["p50_seconds"] == pytest.approx(2, abs=0.01)
+        assert tiers["anonymous"]["max_seconds"] == pytest.approx(20, abs=0.01)
+
+    def test_processing_records_start_once(self, job_manager):
+        job = job_manager.create_job([{"filename": "a.jpg"}], tier="pro")
+        image_id = next(iter(job.images))
+        job_manager.update_image_status(job.job_id, image_id, JobStatus.PROCESSING)
+        with get_connection() as conn:
+            first = conn.execute("SELECT started_at FROM job_images WHERE image_id = ?", (image_id,)).fetchone()[0]
+        job_manager.update_image_status(job.job_id, image_id, JobStatus.PROCESSING)
+        job_manager.update_image_status(job.job_id, image_id, JobStatus.COMPLETED)
+        with get_connection() as conn:
+            row = conn.execute("SELECT started_at FROM job_images WHERE image_id = ?", (image_id,)).fetchone()
+        assert first is not None
+        assert row[0] == first
+        assert queue_wait_stats()["tiers"]["pro"]["images"] == 1
+
+    def test_unstarted_images_are_not_counted(self, job_manager):
+        job_manager.create_job([{"filename": "a.jpg"}], tier="pro")
+        assert queue_wait_stats()["tiers"] == {}
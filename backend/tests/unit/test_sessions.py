@@ -0,0 +1,136 @@
+"""Tests for the LRU session cache."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import inference
+from app.services.inference import ModelSpec
+from app.services.sessions import SessionCache, resident_mb
+
+
+@pytest.fixture(autouse=True)
+def _models(monkeypatch):
+    for name, memory_mb in (("small", 100), ("medium", 400), ("large", 900)):
+        monkeypatch.setitem(inference.MODEL_SPECS, name, ModelSpec(name, (8, 8), memory_mb=memory_mb))
+
+
+class TestSessionCache:
+    def test_loads_once_and_reuses(self):
+        loader = MagicMock(side_effect=lambda name: f"session-{name}")
+        cache = SessionCache(max_sessions=2, memory_budget_mb=10_000, loader=loader)
+
+        assert cache.get("small") == "session-small"
+        assert cache.get("small") == "session-small"
+        loader.assert_called_once_with("small")
+
+    def test_evicts_least_recently_used_by_count(self):
+        cache = SessionCache(max_sessions=2, memory_budget_mb=10_000, loader=lambda name: name)
+        cache.get("small")
+        cache.get("medium")
+        cache.get("small")
+        cache.get("large")
+
+        assert cache.loaded() == ["small", "large"]
+
+    def test_evicts_to_stay_within_memory_budget(self):
+        cache = SessionCache(max_sessions=5, memory_budget_mb=1000, loader=lambda name: name)
+        cache.get("small")
+        cache.get("medium")
+        cache.get("large")
+
+        assert cache.loaded() == ["large"]
+        assert cache.memory_mb == 900
+
+    def test_keeps_newest_session_even_over_budget(self):
+        cache = SessionCache(max_sessions=5, memory_budget_mb=50, loader=lambda name: name)
+        cache.get("large")
+        assert cache.loaded() == ["large"]
+
+    def test_unknown_model_rejected(self):
+        cache = SessionCache(max_sessions=2, memory_budget_mb=1000, loader=lambda name: name)
+        with pytest.raises(ValueError, match="Unsupported model"):
+            cache.get("nope")
+
+    def test_concurrent_requests_load_once(self):
+        """Threads asking for the same unloaded model share one load."""
+        calls = []
+
+        def slow_loader(name):
+            calls.append(name)
+            time.sleep(0.05)
+            return object()
+
+        cache = SessionCache(max_sessions=2, memory_budget_mb=10_000, loader=slow_loader)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("small"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert calls == ["small"]
+        assert len(results) == 8
+        assert all(r is results[0] for r in results)
+
+    def test_failed_load_reaches_waiters_and_is_retried(self):
+        attempts = []
+        started = threading.Event()
+
+        def failing_loader(name):
+            attempts.append(name)
+            started.set()
+            time.sleep(0.05)
+            raise RuntimeError("download failed")
+
+        cache = SessionCache(max_sessions=2, memory_budget_mb=10_000, loader=failing_loader)
+        errors = []
+
+        def get():
+            try:
+                cache.get("small")
+            except RuntimeError as e:
+                errors.append(e)
+
+        first = threading.Thread(target=get)
+        first.start()
+        started.wait()
+        second = threading.Thread(target=get)
+        second.start()
+        first.join()
+        second.join()
+
+        assert len(errors) == 2
+        assert attempts == ["small"]
+        with pytest.raises(RuntimeError):
+            cache.get("small")
+        assert attempts == ["small", "small"]
+
+    def test_stats_report_loaded_models(self):
+        cache = SessionCache(max_sessions=2, memory_budget_mb=10_000, loader=lambda name: name)
+        cache.get("medium")
+
+        stats = cache.stats()
+        assert stats["rss_mb"] == pytest.approx(resident_mb(), abs=50)
+        [model] = stats["models"]
+        assert model["name"] == "medium"
+        assert model["estimated_mb"] == 400
+        assert model["rss_mb"] >= 0
+
+    def test_reset_forgets_sessions(self):
+        """Forked children start empty instead of reusing the parent's sessions."""
+        cache = SessionCache(max_sessions=2, memory_budget_mb=10_000, loader=lambda name: name)
+        cache.get("small")
+        cache._reset()
+        assert cache.loaded() == []
+
+
+class TestImageProcessor:
+    def test_construction_does_not_load_a_model(self):
+        from app.services.image_processor import ImageProcessor
+
+        with patch("app.services.image_processor.session_cache") as cache:
+            ImageProcessor()
+        cache.get.assert_not_called()
@@ -1,3 +1,4 @@
+import io
 from pathlib import Path
 
 # ---------------------------------------------------------------------------
@@ -31,6 +32,10 @@ class TestLocalStorageSaveProcessed:
         content = Path(path).read_bytes()
         assert content == small_png
 
+    async def test_save_processed_uses_format_extension(self, local_storage, small_png: bytes):
+        path = await local_storage.save_processed(small_png, "photo.jpg", "job-1", "webp")
+        assert Path(path).name == "photo.webp"
+
 
 class TestLocalStorageGetFile:
     async def test_get_existing_file(self, local_storage, small_jpeg: bytes):
@@ -43,6 +48,94 @@ class TestLocalStorageGetFile:
         assert content is None
 
 
+class TestLocalStorageSync:
+    def test_read_file(self, local_storage, small_jpeg: bytes, tmp_path: Path):
+        path = tmp_path / "photo.jpg"
+        path.write_bytes(small_jpeg)
+        assert local_storage.read_file(str(path)) == small_jpeg
+        assert local_storage.read_file(str(tmp_path / "missing.jpg")) is None
+
+    def test_open_file_streams(self, local_storage, small_jpeg: bytes, tmp_path: Path):
+        path = tmp_path / "photo.jpg"
+        path.write_bytes(small_jpeg)
+        f = local_storage.open_file(str(path))
+        assert f is not None
+        with f:
+            assert f.read(2) == small_jpeg[:2]
+        assert local_storage.open_file(str(tmp_path / "missing.jpg")) is None
+
+    def test_write_processed_from_bytes_or_file(self, local_storage, small_png: bytes):
+        path = local_storage.write_processed(small_png, "photo.jpg", "job-1", "webp")
+        assert Path(path).name == "photo.webp"
+        assert Path(path).read_bytes() == small_png
+
+        path = local_storage.write_processed(io.BytesIO(small_png), "other.jpg", "job-1")
+        assert Path(path).read_bytes() == small_png
+
+
+class TestLocalStorageHandoff:
+    def test_map_file(self, local_storage, small_jpeg: bytes, tmp_path: Path):
+        import mmap
+
+        path = tmp_path / "photo.jpg"
+        path.write_bytes(small_jpeg)
+        mapped = local_storage.map_file(str(path))
+        assert isinstance(mapped, mmap.mmap)
+        assert mapped[:] == small_jpeg
+        assert local_storage.map_file(str(tmp_path / "missing.jpg")) is None
+
+    def test_write_original_from_spooled_upload(self, local_storage, small_jpeg: bytes):
+        """Spools still in memory are copied in chunks; spools on disk by the kernel."""
+        import tempfile
+
+        for max_size in (len(small_jpeg) * 2, 16):
+            with tempfile.SpooledTemporaryFile(max_size=max_size) as spool:
+                spool.write(small_jpeg)
+                path = local_storage.write_original(spool, "photo.jpg", f"job-{max_size}")
+            assert Path(path).read_bytes() == small_jpeg
+            assert Path(path).name == "photo.jpg"
+
+
+class TestAsyncOnlyBackend:
+    """Backends without synchronous methods fall back to the background event loop."""
+
+    def test_sync_methods_run_async_ones(self, small_png: bytes):
+        from app.services.storage.base import StorageBackend
+
+        class MemoryStorage(StorageBackend):
+            def __init__(self) -> None:
+                self.files: dict[str, bytes] = {}
+
+            async def save_original(self, file_content: bytes, filename: str, job_id: str) -> str:
+                raise NotImplementedError
+
+            async def save_processed(
+                self, file_content: bytes, filename: str, job_id: str, output_format: str = "png"
+            ) -> str:
+                key = f"{job_id}/{filename}.{output_format}"
+                self.files[key] = file_content
+                return key
+
+            async def get_file(self, path: str) -> bytes | None:
+                return self.files.get(path)
+
+            async def delete_file(self, path: str) -> bool:
+                return self.files.pop(path, None) is not None
+
+            async def list_files(self, prefix: str = "") -> list[str]:
+                return list(self.files)
+
+            async def get_file_path(self, path: str) -> Path | None:
+                return None
+
+        memory = MemoryStorage()
+        key = memory.write_processed(io.BytesIO(small_png), "photo", "job-1")
+        assert memory.read_file(key) == small_png
+        f = memory.open_file(key)
+        assert f is not None and f.read() == small_png
+        assert memory.read_file("missing") is None
+
+
 class TestLocalStorageDeleteFile:
     async def test_delete_existing_file(self, local_storage, small_jpeg: bytes):
         path = await local_storage.save_original(small_jpeg, "photo.jpg", "job-1")
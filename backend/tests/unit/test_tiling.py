@@ -0,0 +1,92 @@
+"""Tests for tiled edge refinement (fake session, no model)."""
+
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+from app.config import settings
+from app.services.inference import ModelSpec
+from app.services.tiling import blend_window, edge_tiles, needs_tiling, refine_tiled, tile_starts
+from tests.conftest import fake_session
+
+SPEC = ModelSpec("tiny", (16, 16))
+
+
+class TestTileStarts:
+    def test_single_tile_when_small(self):
+        assert tile_starts(100, 128, 16) == [0]
+
+    def test_covers_length_with_overlap(self):
+        starts = tile_starts(300, 128, 32)
+        assert starts == [0, 96, 172]
+        assert all(b - a <= 128 - 32 for a, b in zip(starts, starts[1:], strict=False))
+        assert starts[-1] + 128 == 300
+
+
+class TestEdgeTiles:
+    def test_only_tiles_with_uncertain_values(self):
+        coarse = np.zeros((16, 16), dtype=np.uint8)
+        coarse[:, 8:] = 255
+        coarse[0:2, 7:9] = 128  # an edge in the top-middle only
+
+        boxes = edge_tiles(coarse, (320, 320), tile=128, overlap=32)
+
+        assert boxes
+        assert all(top < 40 for _, top, _, _ in boxes)
+        assert all(left < 180 and right > 140 for left, _, right, _ in boxes)
+
+    def test_no_edges_no_tiles(self):
+        coarse = np.zeros((16, 16), dtype=np.uint8)
+        assert edge_tiles(coarse, (320, 320), tile=128, overlap=32) == []
+
+
+class TestBlendWindow:
+    def test_fades_only_interior_sides(self):
+        weights = blend_window((0, 0, 100, 100), (300, 100), overlap=20)
+        assert weights[50, 0] == 1.0  # left edge is the image border
+        assert weights[50, 99] < 0.1  # right edge borders another tile
+        assert weights[0, 50] == 1.0 and weights[99, 50] == 1.0
+
+
+class TestRefineTiled:
+    def test_returns_full_resolution_mask_with_refined_edges(self):
+        img = Image.new("RGB", (320, 200), (120, 120, 120))
+        coarse = np.zeros((16, 16), dtype=np.uint8)
+        coarse[:, 8] = 128
+
+        with (
+            patch.object(settings, "tile_size", 128),
+            patch.object(settings, "tile_overlap", 32),
+            patch.object(settings, "inference_batch_size", 2),
+        ):
+            session = fake_session("tiny", 16, 1.0)
+            alpha = refine_tiled(session, img, SPEC, coarse)
+
+        assert alpha.shape == (200, 320)
+        assert alpha.dtype == np.uint8
+        assert alpha[100, 160] == 255  # tile interior takes the tile prediction
+        assert alpha[100, 5] == 0  # untouched tile keeps the coarse mask
+        assert session.inner_session.run.call_count >= 1
+
+    def test_needs_tiling_threshold(self):
+        img = Image.new("RGB", (100, 100))
+        with patch.object(settings, "tiled_min_pixels", 0):
+            assert not needs_tiling(img)
+        with patch.object(settings, "tiled_min_pixels", 10_000):
+            assert needs_tiling(img)
+        with patch.object(settings, "tiled_min_pixels", 10_001):
+            assert not needs_tiling(img)
+
+    def test_on_by_default_only_for_very_large_images(self):
+        assert needs_tiling(Image.new("L", (4000, 4000)))
+        assert not needs_tiling(Image.new("L", (4000, 3000)))  # a 12 MP phone photo
+
+    def test_fully_refined_image_has_no_seams(self):
+        img = Image.new("RGB", (300, 260), (120, 120, 120))
+        coarse = np.full((16, 16), 128, dtype=np.uint8)
+
+        with patch.object(settings, "tile_size", 100), patch.object(settings, "tile_overlap", 30):
+            alpha = refine_tiled(fake_session("tiny", 16, 1.0), img, SPEC, coarse)
+
+        assert (alpha == 255).all()
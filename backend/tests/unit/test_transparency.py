@@ -0,0 +1,96 @@
+import io
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services.inference import SourceImage
+from app.services.transparency import has_alpha, is_cutout, reuse_existing_cutout
+from tests.conftest import create_test_image, create_test_png
+
+
+def _cutout(width: int = 200, height: int = 150) -> Image.Image:
+    """A red disc on a fully transparent background."""
+    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(img).ellipse((40, 20, width - 40, height - 20), fill=(255, 0, 0, 255))
+    return img
+
+
+def _png(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class TestHasAlpha:
+    def test_jpeg_has_no_alpha(self):
+        assert not has_alpha(create_test_image())
+
+    def test_rgba_png(self):
+        assert has_alpha(create_test_png())
+
+    def test_palette_with_transparency(self):
+        assert has_alpha(_png(_cutout().convert("P")))
+
+    def test_invalid_data(self):
+        assert not has_alpha(b"not an image")
+
+
+class TestIsCutout:
+    def test_subject_on_transparent_background(self):
+        assert is_cutout(_cutout())
+
+    def test_opaque_rgba_is_not_a_cutout(self):
+        assert not is_cutout(Image.new("RGBA", (100, 100), (255, 0, 0, 255)))
+
+    def test_rgb_is_not_a_cutout(self):
+        assert not is_cutout(Image.new("RGB", (100, 100)))
+
+    def test_translucent_overlay_is_not_a_cutout(self):
+        img = _cutout()
+        img.putalpha(Image.new("L", img.size, 128))
+        assert not is_cutout(img)
+
+    def test_rounded_corners_are_not_a_cutout(self):
+        mask = Image.new("L", (200, 200), 0)
+        ImageDraw.Draw(mask).rounded_rectangle((0, 0, 199, 199), radius=60, fill=255)
+        img = Image.new("RGB", (200, 200), (0, 0, 255))
+        img.putalpha(mask)
+        assert not is_cutout(img)
+
+    def test_subject_cut_off_at_the_bottom(self):
+        img = Image.new("RGBA", (200, 200), (0, 0, 0, 0))
+        ImageDraw.Draw(img).ellipse((30, 40, 170, 320), fill=(255, 0, 0, 255))
+        assert is_cutout(img)
+
+    def test_large_image_is_sampled(self):
+        assert is_cutout(_cutout(3000, 2000))
+
+
+class TestReuseExistingCutout:
+    def test_reencodes_cutout_with_its_own_alpha(self):
+        original = _cutout()
+        result = reuse_existing_cutout(SourceImage(_png(original)), "webp")
+
+        assert result is not None
+        out = Image.open(io.BytesIO(result))
+        assert out.format == "WEBP"
+        assert np.array_equal(np.asarray(out.getchannel("A")), np.asarray(original.getchannel("A")))
+
+    def test_mask_format(self):
+        original = _cutout()
+        result = reuse_existing_cutout(SourceImage(_png(original)), "mask")
+
+        assert result is not None
+        assert np.array_equal(np.asarray(Image.open(io.BytesIO(result))), np.asarray(original.getchannel("A")))
+
+    def test_jpeg_is_not_decoded(self):
+        source = SourceImage(create_test_image())
+        assert reuse_existing_cutout(source, "png") is None
+        assert source._full is None
+
+    def test_disabled_by_setting(self):
+        from app.config import settings
+
+        with patch.object(settings, "skip_existing_cutouts", False):
+            assert reuse_existing_cutout(SourceImage(_png(_cutout())), "png") is None
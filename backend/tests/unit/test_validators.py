@@ -5,7 +5,7 @@ import pytest
 from fastapi import HTTPException, UploadFile
 from PIL import Image
 
-from app.utils.validators import validate_batch, validate_image
+from app.utils.validators import validate_batch, validate_image, validate_model
 from tests.conftest import create_test_image
 
 # ---------------------------------------------------------------------------
@@ -173,3 +173,43 @@ class TestValidateBatch:
         ]
         with pytest.raises(HTTPException):
             await validate_batch(files)
+
+
+# ---------------------------------------------------------------------------
+# validate_model
+# ---------------------------------------------------------------------------
+
+
+class TestValidateModel:
+    def test_explicit_model(self):
+        assert validate_model("u2netp", None) == "u2netp"
+
+    def test_unknown_model_rejected(self):
+        with pytest.raises(HTTPException) as exc_info:
+            validate_model("not-a-model", None)
+        assert exc_info.value.status_code == 400
+        assert "Unsupported model" in exc_info.value.detail
+
+    def test_int8_variant_only_when_enabled(self):
+        from unittest.mock import patch
+
+        from app.config import settings
+
+        with patch.object(settings, "int8_models", []), pytest.raises(HTTPException) as exc_info:
+            validate_model("u2netp-int8", None)
+        assert exc_info.value.status_code == 400
+        assert "-int8" not in exc_info.value.detail.split("Available models:")[1]
+
+        with patch.object(settings, "int8_models", ["u2netp-int8"]):
+            assert validate_model("u2netp-int8", None) == "u2netp-int8"
+
+    def test_anonymous_callers_get_free_tier_default(self):
+        from app.models.api_key import TIER_LIMITS, Tier
+
+        assert validate_model(None, None) == TIER_LIMITS[Tier.FREE]["default_model"]
+
+    def test_tier_default(self):
+        from app.models.api_key import TIER_LIMITS, Tier
+
+        key = MagicMock(tier=Tier.FREE)
+        assert validate_model(None, key) == TIER_LIMITS[Tier.FREE]["default_model"]
@@ -0,0 +1,82 @@
+"""Tests for worker readiness heartbeats."""
+
+from datetime import datetime, timedelta
+from unittest.mock import PropertyMock, patch
+
+import pytest
+
+from app.db.database import get_connection
+from app.services.worker_health import WorkerRegistry, WorkerState
+
+
+@pytest.fixture
+def registry(_patch_settings):
+    registry = WorkerRegistry(interval_seconds=60)
+    yield registry
+    registry.stop()
+
+
+def _age(worker_id: str, seconds: int) -> None:
+    last_seen = (datetime.utcnow() - timedelta(seconds=seconds)).isoformat()
+    with get_connection() as conn:
+        conn.execute("UPDATE worker_heartbeats SET last_seen = ? WHERE worker_id = ?", (last_seen, worker_id))
+        conn.commit()
+
+
+class TestWorkerRegistry:
+    def test_start_records_warming_worker(self, registry):
+        registry.start(["birefnet-general"])
+        [worker] = registry.workers()
+        assert worker["worker_id"] == registry.worker_id
+        assert worker["status"] == WorkerState.WARMING
+        assert worker["models"] == ["birefnet-general"]
+        assert not worker["ready"]
+
+    def test_ready_after_warm_up(self, registry):
+        registry.start(["u2netp"])
+        registry.set_state(WorkerState.READY)
+        [worker] = registry.workers()
+        assert worker["ready"]
+        assert not worker["stale"]
+
+    def test_missed_heartbeats_make_worker_stale(self, registry):
+        registry.start(["u2netp"])
+        registry.set_state(WorkerState.READY)
+        _age(registry.worker_id, 3 * 60 + 1)
+        [worker] = registry.workers()
+        assert worker["stale"]
+        assert not worker["ready"]
+
+    def test_degraded_worker_is_not_ready(self, registry):
+        registry.start(["u2netp"])
+        registry.set_state(WorkerState.DEGRADED)
+        assert not registry.workers()[0]["ready"]
+
+    def test_stop_removes_row(self, registry):
+        registry.start(["u2netp"])
+        registry.stop()
+        assert registry.workers() == []
+
+    def test_start_drops_stale_rows_from_same_host(self, registry):
+        old_id = f"{registry.worker_id}-old"
+        with patch.object(WorkerRegistry, "worker_id", new_callable=PropertyMock, return_value=old_id):
+            WorkerRegistry(interval_seconds=60).beat()
+        _age(old_id, 3600)
+
+        registry.start(["u2netp"])
+        assert [w["worker_id"] for w in registry.workers()] == [registry.worker_id]
+
+    def test_heartbeat_reports_sessions(self, registry):
+        registry.start(["u2netp"])
+        sessions = registry.workers()[0]["sessions"]
+        assert sessions["pid"] > 0
+        assert "rss_mb" in sessions
+        assert sessions["models"] == []
+
+    def test_heartbeat_reports_pipeline_stats(self, registry):
+        registry.start(["u2netp"], lambda: {"bottleneck": "infer"})
+        assert registry.workers()[0]["pipeline"] == {"bottleneck": "infer"}
+
+    def test_filter_by_hostname(self, registry):
+        registry.start(["u2netp"])
+        assert registry.workers("some-other-host") == []